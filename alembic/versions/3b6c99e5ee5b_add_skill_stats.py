@@ -0,0 +1,70 @@
+"""add skill stats
+
+Revision ID: 3b6c99e5ee5b
+Revises: 9b7a2c1d4e5f
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b6c99e5ee5b'
+down_revision: Union[str, Sequence[str], None] = '9b7a2c1d4e5f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_BACKFILL_SQL = """
+INSERT INTO skill_stats (
+    skill_id, favorites_count, rating_sum, rating_count, comments_count, created_at, updated_at
+)
+SELECT
+    skills.id,
+    COALESCE(favorites.favorites_count, 0),
+    COALESCE(ratings.rating_sum, 0),
+    COALESCE(ratings.rating_count, 0),
+    COALESCE(comments.comments_count, 0),
+    CURRENT_TIMESTAMP,
+    CURRENT_TIMESTAMP
+FROM skills
+LEFT JOIN (
+    SELECT skill_id, COUNT(id) AS favorites_count FROM skill_favorites GROUP BY skill_id
+) AS favorites ON favorites.skill_id = skills.id
+LEFT JOIN (
+    SELECT skill_id, SUM(rating) AS rating_sum, COUNT(id) AS rating_count FROM skill_ratings GROUP BY skill_id
+) AS ratings ON ratings.skill_id = skills.id
+LEFT JOIN (
+    SELECT skill_id, COUNT(id) AS comments_count FROM skill_comments GROUP BY skill_id
+) AS comments ON comments.skill_id = skills.id
+"""
+
+
+def _timestamp_type() -> sa.types.TypeEngine:
+    return sa.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'skill_stats',
+        sa.Column('created_at', _timestamp_type(), nullable=False),
+        sa.Column('updated_at', _timestamp_type(), nullable=False),
+        sa.Column('skill_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('favorites_count', sa.Integer(), nullable=False),
+        sa.Column('rating_sum', sa.Integer(), nullable=False),
+        sa.Column('rating_count', sa.Integer(), nullable=False),
+        sa.Column('comments_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('skill_id'),
+    )
+    op.execute(_BACKFILL_SQL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('skill_stats')
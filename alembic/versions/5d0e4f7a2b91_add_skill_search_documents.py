@@ -0,0 +1,75 @@
+"""add skill search documents
+
+Revision ID: 5d0e4f7a2b91
+Revises: 3b6c99e5ee5b
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0e4f7a2b91'
+down_revision: Union[str, Sequence[str], None] = '3b6c99e5ee5b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Tags are copied as stored (JSON); the tokenizers on both backends skip the punctuation.
+_BACKFILL_SQL = """
+INSERT INTO skill_search_documents (
+    skill_id, version, name, description, tags, content, created_at, updated_at
+)
+SELECT
+    skills.id,
+    skill_versions.version,
+    skills.name,
+    skills.description,
+    COALESCE(skills.tags, ''),
+    skill_versions.content,
+    CURRENT_TIMESTAMP,
+    CURRENT_TIMESTAMP
+FROM skills
+JOIN skill_versions ON skill_versions.skill_id = skills.id
+WHERE skills.deleted = 0
+AND skill_versions.version = (
+    SELECT MAX(latest.version) FROM skill_versions AS latest WHERE latest.skill_id = skills.id
+)
+"""
+
+
+def _timestamp_type() -> sa.types.TypeEngine:
+    return sa.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'skill_search_documents',
+        sa.Column('created_at', _timestamp_type(), nullable=False),
+        sa.Column('updated_at', _timestamp_type(), nullable=False),
+        sa.Column('skill_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('tags', sa.Text(), nullable=False),
+        sa.Column('content', sa.Text().with_variant(mysql.MEDIUMTEXT(), 'mysql'), nullable=False),
+        sa.PrimaryKeyConstraint('skill_id'),
+    )
+    if op.get_bind().dialect.name == 'mysql':
+        op.execute(
+            'ALTER TABLE skill_search_documents '
+            'ADD FULLTEXT INDEX ft_skill_search_documents (name, description, tags, content) '
+            'WITH PARSER ngram'
+        )
+    op.execute(_BACKFILL_SQL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('skill_search_documents')
@@ -0,0 +1,41 @@
+"""add keyset pagination indexes
+
+Revision ID: a4c8e1f29d37
+Revises: 5d0e4f7a2b91
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e1f29d37'
+down_revision: Union[str, Sequence[str], None] = '5d0e4f7a2b91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_KEYSET_INDEXES = (
+    ('chat_messages', 'session_id'),
+    ('chat_sessions', 'user_id'),
+    ('skills', 'deleted'),
+    ('skill_comments', 'skill_id'),
+    ('notifications', 'user_id'),
+    ('skill_favorites', 'user_id'),
+    ('memories', 'user_id'),
+    ('reports', 'user_id'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in _KEYSET_INDEXES:
+        op.create_index(f'ix_{table}_{column}_created_at_id', table, [column, 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in reversed(_KEYSET_INDEXES):
+        op.drop_index(f'ix_{table}_{column}_created_at_id', table_name=table)
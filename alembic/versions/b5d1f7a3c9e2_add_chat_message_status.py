@@ -0,0 +1,36 @@
+"""add chat message status
+
+Revision ID: b5d1f7a3c9e2
+Revises: e2b7c4d9a1f3
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d1f7a3c9e2'
+down_revision: Union[str, Sequence[str], None] = 'e2b7c4d9a1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'chat_messages',
+        sa.Column(
+            'status',
+            sa.Enum('streaming', 'complete', 'error', name='chat_message_status'),
+            nullable=False,
+            server_default='complete',
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chat_messages', 'status')
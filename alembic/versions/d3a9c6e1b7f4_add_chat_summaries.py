@@ -0,0 +1,46 @@
+"""add chat summaries
+
+Revision ID: d3a9c6e1b7f4
+Revises: b5d1f7a3c9e2
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a9c6e1b7f4'
+down_revision: Union[str, Sequence[str], None] = 'b5d1f7a3c9e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TIMESTAMP = sa.DateTime(timezone=True).with_variant(mysql.DATETIME(fsp=6), 'mysql')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'chat_summaries',
+        sa.Column('created_at', _TIMESTAMP, nullable=False),
+        sa.Column('updated_at', _TIMESTAMP, nullable=False),
+        sa.Column('id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('session_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('covered_message_id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('covered_created_at', _TIMESTAMP, nullable=False),
+        sa.Column('covered_messages', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('session_id'),
+    )
+    op.create_index(op.f('ix_chat_summaries_id'), 'chat_summaries', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_chat_summaries_id'), table_name='chat_summaries')
+    op.drop_table('chat_summaries')
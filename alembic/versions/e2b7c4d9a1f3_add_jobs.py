@@ -0,0 +1,64 @@
+"""add jobs
+
+Revision ID: e2b7c4d9a1f3
+Revises: a4c8e1f29d37
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c4d9a1f3'
+down_revision: Union[str, Sequence[str], None] = 'a4c8e1f29d37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_TIMESTAMP = sa.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'jobs',
+        sa.Column('created_at', _TIMESTAMP, nullable=False),
+        sa.Column('updated_at', _TIMESTAMP, nullable=False),
+        sa.Column('id', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('job_type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('idempotency_key', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('pending', 'running', 'succeeded', 'failed', name='job_status'),
+            nullable=False,
+        ),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', _TIMESTAMP, nullable=False),
+        sa.Column('locked_by', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('locked_at', _TIMESTAMP, nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('job_type', 'idempotency_key'),
+    )
+    op.create_index(op.f('ix_jobs_id'), 'jobs', ['id'], unique=False)
+    op.create_index(
+        'ix_jobs_job_type_status_run_after',
+        'jobs',
+        ['job_type', 'status', 'run_after'],
+        unique=False,
+    )
+    op.create_index('ix_jobs_status_updated_at', 'jobs', ['status', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_status_updated_at', table_name='jobs')
+    op.drop_index('ix_jobs_job_type_status_run_after', table_name='jobs')
+    op.drop_index(op.f('ix_jobs_id'), table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,22 @@
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+
+from app.services.pagination import Cursor, decode_cursor, encode_cursor
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+def get_cursor(cursor: Optional[str] = Query(default=None)) -> Optional[Cursor]:
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor')
+
+
+def set_next_cursor(response: Response, records: Sequence, limit: Optional[int]) -> None:
+    if limit is None or not records or len(records) < limit:
+        return
+    response.headers[NEXT_CURSOR_HEADER] = encode_cursor(records[-1])
@@ -1,35 +1,44 @@
 import asyncio
-import json
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
 
 from loguru import logger
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from fastapi.responses import StreamingResponse
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import config
 from app.core.config import settings
 from app.core.providers import available_models, is_model_available
-from app.db.session import engine, get_session
-from app.models.enums import ChatRole
+from app.db.session import async_engine, get_async_session
+from app.models.enums import ChatMessageStatus, ChatRole
 from app.models.user import User
 from app.schemas.ai import AiChatStreamRequest, AiModelOut
 from app.services.auth_service import get_current_user
 from app.services.chat_service import (
-    create_message,
-    get_message,
-    get_session as get_chat_session,
-    list_messages,
-    update_message_content,
+    create_message_async,
+    get_message_async,
+    get_session_async as get_chat_session,
+    get_summary_async,
+    list_recent_messages_async,
+    update_message_content_async,
 )
 from app.services.ai_agent import stream_agent_text
-from app.services.ai_history import build_message_history, trim_latest_user_message
-from app.services.ai_stream_registry import stream_registry
+from app.services.ai_debug_trace import debug_trace_writer, digest_messages, should_sample
+from app.services.ai_message_checkpoint import MessageCheckpointer
+from app.services.ai_history import (
+    build_message_history,
+    history_token_budget,
+    trim_latest_user_message,
+    window_history,
+)
+from app.services.ai_stream_backends import StreamOverflowPolicy
+from app.services.ai_stream_registry import SSE_DONE, format_sse, iter_sse_frames, stream_registry
 from app.services.ai_types import AiDeps
-from app.services.ai_skill_suggestion import maybe_create_skill_suggestion
-from app.services.ai_skill_draft_suggestion import maybe_create_skill_draft_suggestion
+from app.services.ai_jobs import enqueue_post_turn_job, maybe_enqueue_summary_job
+from app.services.ai_summary import unsummarized_history
 
 router = APIRouter(prefix='/ai', tags=['ai'])
 
@@ -49,17 +58,12 @@ def _resolve_debug_log_path() -> Path:
 def _append_ai_debug_record(record: dict) -> None:
     if not _ai_debug_enabled():
         return
-    path = _resolve_debug_log_path()
-    try:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open('a', encoding='utf-8') as handle:
-            handle.write(json.dumps(record, ensure_ascii=False) + '\n')
-    except OSError:
-        logger.warning('ai_debug_log_write_failed', path=str(path))
+    # Encoding and file IO happen on the trace writer's thread, never on the event loop.
+    debug_trace_writer.submit(_resolve_debug_log_path(), record)
 
 
-def _ensure_session(session: Session, session_id: str, user: User):
-    record = get_chat_session(session, session_id)
+async def _ensure_session(session: AsyncSession, session_id: str, user: User):
+    record = await get_chat_session(session, session_id)
     if not record:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Chat session not found')
     if record.user_id != user.id:
@@ -79,46 +83,44 @@ def list_models() -> list[AiModelOut]:
 @router.post('/chat/stream')
 async def stream_chat(
     payload: AiChatStreamRequest,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user),
 ):
     if not _allowed_model(payload.model):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Model not available')
 
-    _ensure_session(session, payload.session_id, user)
-
-    create_message(session, payload.session_id, ChatRole.USER, payload.content, payload.skill_id)
-    history = list_messages(session, payload.session_id, limit=200, offset=0)
-    messages = [
-        {
-            'role': message.role.value if hasattr(message.role, 'value') else message.role,
-            'content': message.content,
-        }
-        for message in history
-    ]
-
-    assistant_record = create_message(session, payload.session_id, ChatRole.ASSISTANT, '', None)
+    await _ensure_session(session, payload.session_id, user)
+
+    await create_message_async(session, payload.session_id, ChatRole.USER, payload.content, payload.skill_id)
+    history = await list_recent_messages_async(session, payload.session_id, settings.AI_HISTORY_MAX_MESSAGES)
+    assistant_record = await create_message_async(
+        session,
+        payload.session_id,
+        ChatRole.ASSISTANT,
+        '',
+        None,
+        status=ChatMessageStatus.STREAMING,
+    )
 
+    # Only a fingerprint of the history goes to the log; full payloads are sampled into the debug trace.
     logger.info(
-        json.dumps(
-            {
-                'event': 'ai.chat.request',
-                'session_id': payload.session_id,
-                'user_id': user.id,
-                'model': payload.model,
-                'messages': messages,
-            },
-            ensure_ascii=False,
-        )
+        'ai.chat.request',
+        session_id=payload.session_id,
+        user_id=user.id,
+        model=payload.model,
+        **digest_messages(
+            (message.role.value if hasattr(message.role, 'value') else message.role, message.content)
+            for message in history
+        ),
     )
-    if _ai_debug_enabled():
+    traced = _ai_debug_enabled() and should_sample()
+    if traced:
         _append_ai_debug_record(
             {
                 'event': 'ai.chat.request',
                 'session_id': payload.session_id,
                 'user_id': user.id,
                 'model': payload.model,
-                'messages': messages,
                 'chat_messages': [
                     {
                         'id': message.id,
@@ -138,14 +140,33 @@ async def stream_chat(
         latest_content=payload.content,
         latest_skill_id=payload.skill_id,
     )
-    message_history = build_message_history(trimmed_history)
+    summary = await get_summary_async(session, payload.session_id)
+    pending = unsummarized_history(trimmed_history, summary)
+    window = window_history(
+        pending,
+        budget=history_token_budget(payload.model),
+        summary=summary.content if summary else None,
+    )
+    await maybe_enqueue_summary_job(session, session_id=payload.session_id, model_id=payload.model, pending=pending)
+    message_history = build_message_history(window.messages, window.summary)
+    logger.info(
+        'ai.chat.history',
+        session_id=payload.session_id,
+        model=payload.model,
+        kept=len(window.messages),
+        omitted=len(window.omitted),
+        summarized=summary.covered_messages if summary else 0,
+        tokens=window.tokens,
+    )
 
     async def event_stream():
         state = await stream_registry.start(payload.session_id, assistant_record.id)
-        queue: asyncio.Queue[dict[str, str] | None] = asyncio.Queue()
+        subscribed = await stream_registry.subscribe(payload.session_id)
 
         async def run_stream() -> None:
-            chunks: list[str] = []
+            checkpointer = MessageCheckpointer(assistant_record.id)
+            # Stays ERROR unless the model stream runs to completion, which also covers cancellation.
+            final_status = ChatMessageStatus.ERROR
             deps = AiDeps(
                 user=user,
                 session_id=payload.session_id,
@@ -165,20 +186,30 @@ async def stream_chat(
                     deps=deps,
                     prompt=payload.content,
                     message_history=message_history,
-                    raw_history=trimmed_history,
+                    raw_history=window.messages,
                 ):
-                    chunks.append(delta)
+                    checkpointer.add(delta)
                     await stream_registry.append(payload.session_id, delta)
+                final_status = ChatMessageStatus.COMPLETE
             except Exception as error:  # noqa: BLE001
                 await stream_registry.error(payload.session_id, str(error))
             finally:
-                if chunks:
-                    content = ''.join(chunks)
-                    with Session(engine) as background_session:
-                        record = get_message(background_session, assistant_record.id)
-                        if record:
-                            update_message_content(background_session, record, content)
-                    if _ai_debug_enabled():
+                # Let an in-flight checkpoint land first; the final write then always wins.
+                await checkpointer.drain()
+                content = checkpointer.content
+                async with AsyncSession(async_engine, expire_on_commit=False) as background_session:
+                    record = await get_message_async(background_session, assistant_record.id)
+                    if record:
+                        await update_message_content_async(background_session, record, content, final_status)
+                        if content:
+                            await enqueue_post_turn_job(
+                                background_session,
+                                deps,
+                                prompt=payload.content,
+                                message_id=assistant_record.id,
+                            )
+                if content:
+                    if traced:
                         _append_ai_debug_record(
                             {
                                 'event': 'ai.chat.response',
@@ -190,33 +221,13 @@ async def stream_chat(
                                 'created_at': datetime.now(timezone.utc).isoformat(),
                             }
                         )
-                    suggestion_task = asyncio.create_task(
-                        maybe_create_skill_suggestion(
-                            deps=deps,
-                            prompt=payload.content,
-                            history=history,
-                            assistant_message_id=assistant_record.id,
-                            assistant_content=content,
-                        )
-                    )
-                    suggestion_task.add_done_callback(_log_task_error)
-                    draft_task = asyncio.create_task(
-                        maybe_create_skill_draft_suggestion(
-                            deps=deps,
-                            prompt=payload.content,
-                            history=history,
-                            assistant_message_id=assistant_record.id,
-                            assistant_content=content,
-                        )
-                    )
-                    draft_task.add_done_callback(_log_task_error)
                     logger.info(
                         'ai.chat.stream.done',
                         session_id=payload.session_id,
                         user_id=user.id,
                         model=payload.model,
                         message_id=assistant_record.id,
-                        chunks=len(chunks),
+                        checkpoints=checkpointer.checkpoints,
                         content_len=len(content),
                     )
                 else:
@@ -230,6 +241,7 @@ async def stream_chat(
                 await stream_registry.finish(payload.session_id)
 
         task = asyncio.create_task(run_stream())
+        stream_registry.track(state, task)
 
         def _log_task_error(done_task: asyncio.Task[None]) -> None:
             if done_task.cancelled():
@@ -240,17 +252,17 @@ async def stream_chat(
 
         task.add_done_callback(_log_task_error)
 
-        state.subscribers.add(queue)
+        if subscribed is None:
+            # A newer turn for this session replaced the stream; the reply is still generated and saved.
+            yield SSE_DONE
+            return
+        subscription, _snapshot = subscribed
         try:
-            yield f"data: {json.dumps({'type': 'start', 'message_id': state.message_id}, ensure_ascii=False)}\n\n"
-            while True:
-                item = await queue.get()
-                if item is None:
-                    yield "data: [DONE]\n\n"
-                    break
-                yield f"data: {json.dumps(item, ensure_ascii=False)}\n\n"
+            yield format_sse({'type': 'start', 'message_id': state.message_id, 'seq': 0})
+            async for frame in iter_sse_frames(subscription.queue):
+                yield frame
         finally:
-            await stream_registry.unsubscribe(state, queue)
+            await stream_registry.unsubscribe(subscription)
 
     return StreamingResponse(event_stream(), media_type='text/event-stream')
 
@@ -258,26 +270,27 @@ async def stream_chat(
 @router.get('/chat/stream/watch')
 async def watch_chat_stream(
     session_id: str,
-    session: Session = Depends(get_session),
+    last_event_id: Optional[str] = Header(default=None),
+    overflow: Optional[StreamOverflowPolicy] = None,
+    session: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user),
 ):
-    _ensure_session(session, session_id, user)
+    await _ensure_session(session, session_id, user)
 
     async def event_stream():
-        subscription = await stream_registry.subscribe(session_id)
-        if not subscription:
-            yield "data: [DONE]\n\n"
+        subscribed = await stream_registry.subscribe(session_id, last_event_id, overflow)
+        if not subscribed:
+            yield SSE_DONE
             return
-        state, queue, snapshot = subscription
+        watched, snapshot = subscribed
         try:
-            yield f"data: {json.dumps({'type': 'snapshot', 'message_id': state.message_id, 'content': snapshot}, ensure_ascii=False)}\n\n"
-            while True:
-                item = await queue.get()
-                if item is None:
-                    yield "data: [DONE]\n\n"
-                    break
-                yield f"data: {json.dumps(item, ensure_ascii=False)}\n\n"
+            if not watched.resumed:
+                yield format_sse(
+                    {'type': 'snapshot', 'message_id': watched.message_id, 'content': snapshot, 'seq': watched.seq}
+                )
+            async for frame in iter_sse_frames(watched.queue):
+                yield frame
         finally:
-            await stream_registry.unsubscribe(state, queue)
+            await stream_registry.unsubscribe(watched)
 
     return StreamingResponse(event_stream(), media_type='text/event-stream')
@@ -70,6 +70,7 @@ def create_alias_message(
         role=record.role,
         content=record.content,
         skill_id=record.skill_id,
+        status=record.status,
         created_at=record.created_at,
     )
 
@@ -1,9 +1,10 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import settings
 from app.core.providers import available_models, is_model_available
-from app.db.session import get_session
+from app.db.session import get_async_session, get_session
 from app.models.user import User
 from app.schemas.chat import (
     ChatMessageCreate,
@@ -19,12 +20,15 @@ from app.schemas.chat import (
     SkillDraftSuggestionAcceptOut,
 )
 from app.services.auth_service import get_current_user
+from app.api.pagination import get_cursor, set_next_cursor
+from app.services.pagination import Cursor
 from app.services.chat_service import (
     create_message,
     create_session,
     create_suggestion,
     delete_session,
     get_session as get_chat_session,
+    get_session_async as get_chat_session_async,
     get_suggestion,
     has_rejection,
     list_messages,
@@ -38,8 +42,10 @@ from app.services.ai_tools import create_skill_data, generate_skill_data
 from app.services.ai_types import AiDeps
 from app.services.skill_draft_suggestion_service import (
     get_skill_draft_suggestion,
+    get_skill_draft_suggestion_async,
     list_skill_draft_suggestions,
     update_skill_draft_suggestion,
+    update_skill_draft_suggestion_async,
 )
 from app.services.skill_service import get_skill
 
@@ -55,6 +61,15 @@ def _ensure_session(session: Session, session_id: str, user: User):
     return record
 
 
+async def _ensure_session_async(session: AsyncSession, session_id: str, user: User):
+    record = await get_chat_session_async(session, session_id)
+    if not record:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Chat session not found')
+    if record.user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail='Not allowed')
+    return record
+
+
 def _ensure_skill(session: Session, skill_id: str) -> None:
     if not get_skill(session, skill_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Skill not found')
@@ -88,12 +103,15 @@ def create_chat_session(
 
 @router.get('', response_model=list[ChatSessionOut])
 def list_chat_sessions(
+    response: Response,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     session: Session = Depends(get_session),
     user: User = Depends(get_current_user),
 ) -> list[ChatSessionOut]:
-    sessions = list_sessions(session, user.id, limit=limit, offset=offset)
+    sessions = list_sessions(session, user.id, limit=limit, offset=offset, cursor=cursor)
+    set_next_cursor(response, sessions, limit)
     return [
         ChatSessionOut(
             id=record.id,
@@ -150,6 +168,7 @@ def create_chat_message(
         role=record.role,
         content=record.content,
         skill_id=record.skill_id,
+        status=record.status,
         created_at=record.created_at,
     )
 
@@ -157,13 +176,16 @@ def create_chat_message(
 @router.get('/{session_id}/messages', response_model=list[ChatMessageOut])
 def list_chat_messages(
     session_id: str,
+    response: Response,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     session: Session = Depends(get_session),
     user: User = Depends(get_current_user),
 ) -> list[ChatMessageOut]:
     _ensure_session(session, session_id, user)
-    messages = list_messages(session, session_id, limit=limit, offset=offset)
+    messages = list_messages(session, session_id, limit=limit, offset=offset, cursor=cursor)
+    set_next_cursor(response, messages, limit)
     return [
         ChatMessageOut(
             id=record.id,
@@ -171,6 +193,7 @@ def list_chat_messages(
             role=record.role,
             content=record.content,
             skill_id=record.skill_id,
+            status=record.status,
             created_at=record.created_at,
         )
         for record in messages
@@ -307,11 +330,11 @@ async def accept_skill_draft_suggestion_endpoint(
     session_id: str,
     suggestion_id: str,
     payload: SkillDraftSuggestionAcceptIn,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     user: User = Depends(get_current_user),
 ) -> SkillDraftSuggestionAcceptOut:
-    _ensure_session(session, session_id, user)
-    record = get_skill_draft_suggestion(session, suggestion_id)
+    await _ensure_session_async(session, session_id, user)
+    record = await get_skill_draft_suggestion_async(session, suggestion_id)
     if not record or record.session_id != session_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Suggestion not found')
     if record.status != SkillSuggestionStatus.PENDING:
@@ -333,7 +356,7 @@ async def accept_skill_draft_suggestion_endpoint(
         content=generated['content'],
         visibility=SkillVisibility.PRIVATE,
     )
-    record = update_skill_draft_suggestion(
+    record = await update_skill_draft_suggestion_async(
         session,
         record,
         SkillSuggestionStatus.ACCEPTED,
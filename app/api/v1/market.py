@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlmodel import Session
 from app.db.session import get_session
 from app.models.user import User
@@ -14,14 +15,15 @@ from app.schemas.market import (
     RatingSummary,
 )
 from app.services.auth_service import get_current_user
+from app.api.pagination import get_cursor, set_next_cursor
+from app.services.pagination import Cursor
 from app.services.market_service import (
+    SkillMarketStats,
     add_comment,
     add_favorite,
-    count_comments,
-    count_favorites,
-    get_rating_summary,
+    get_skill_market_stats,
     get_user_rating,
-    list_market_skills,
+    list_market_skills_with_stats,
     list_comments,
     list_favorites,
     remove_favorite,
@@ -37,32 +39,35 @@ def _ensure_skill(session: Session, skill_id: str) -> None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Skill not found')
 
 
+def _to_rating_summary(skill_id: str, stats: SkillMarketStats) -> RatingSummary:
+    return RatingSummary(skill_id=skill_id, average=stats.rating_average, count=stats.rating_count)
+
+
+def _to_market_skill_out(skill, stats: SkillMarketStats) -> MarketSkillOut:
+    return MarketSkillOut(
+        id=skill.id,
+        name=skill.name,
+        description=skill.description,
+        tags=skill_tags_to_list(skill),
+        visibility=skill.visibility,
+        avatar=skill.avatar,
+        favorites_count=stats.favorites_count,
+        rating=_to_rating_summary(skill.id, stats),
+        comments_count=stats.comments_count,
+    )
+
+
 @router.get('/skills', response_model=list[MarketSkillOut])
 def list_market_skills_endpoint(
+    response: Response,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     session: Session = Depends(get_session),
 ) -> list[MarketSkillOut]:
-    skills = list_market_skills(session, limit=limit, offset=offset)
-    items: list[MarketSkillOut] = []
-    for skill in skills:
-        favorites_count = count_favorites(session, skill.id)
-        average, count = get_rating_summary(session, skill.id)
-        comments_count = count_comments(session, skill.id)
-        items.append(
-            MarketSkillOut(
-                id=skill.id,
-                name=skill.name,
-                description=skill.description,
-                tags=skill_tags_to_list(skill),
-                visibility=skill.visibility,
-                avatar=skill.avatar,
-                favorites_count=favorites_count,
-                rating=RatingSummary(skill_id=skill.id, average=average, count=count),
-                comments_count=comments_count,
-            )
-        )
-    return items
+    rows = list_market_skills_with_stats(session, limit=limit, offset=offset, cursor=cursor)
+    set_next_cursor(response, [skill for skill, _ in rows], limit)
+    return [_to_market_skill_out(skill, stats) for skill, stats in rows]
 
 
 @router.get('/skills/{skill_id}', response_model=MarketSkillOut)
@@ -73,20 +78,7 @@ def get_market_skill_detail(
     skill = get_skill(session, skill_id)
     if not skill:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Skill not found')
-    favorites_count = count_favorites(session, skill_id)
-    average, count = get_rating_summary(session, skill_id)
-    comments_count = count_comments(session, skill_id)
-    return MarketSkillOut(
-        id=skill.id,
-        name=skill.name,
-        description=skill.description,
-        tags=skill_tags_to_list(skill),
-        visibility=skill.visibility,
-        avatar=skill.avatar,
-        favorites_count=favorites_count,
-        rating=RatingSummary(skill_id=skill.id, average=average, count=count),
-        comments_count=comments_count,
-    )
+    return _to_market_skill_out(skill, get_skill_market_stats(session, skill_id))
 
 
 @router.post('/favorites', response_model=FavoriteOut, status_code=status.HTTP_201_CREATED)
@@ -118,12 +110,15 @@ def delete_favorite(
 
 @router.get('/favorites', response_model=list[FavoriteOut])
 def list_favorites_endpoint(
+    response: Response,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     session: Session = Depends(get_session),
     user: User = Depends(get_current_user),
 ) -> list[FavoriteOut]:
-    favorites = list_favorites(session, user.id, limit=limit, offset=offset)
+    favorites = list_favorites(session, user.id, limit=limit, offset=offset, cursor=cursor)
+    set_next_cursor(response, favorites, limit)
     return [
         FavoriteOut(
             id=favorite.id,
@@ -155,8 +150,7 @@ def rate_skill(
 @router.get('/ratings/{skill_id}', response_model=RatingSummary)
 def rating_summary(skill_id: str, session: Session = Depends(get_session)) -> RatingSummary:
     _ensure_skill(session, skill_id)
-    average, count = get_rating_summary(session, skill_id)
-    return RatingSummary(skill_id=skill_id, average=average, count=count)
+    return _to_rating_summary(skill_id, get_skill_market_stats(session, skill_id))
 
 
 @router.get('/ratings/me/{skill_id}', response_model=RatingOut)
@@ -198,12 +192,15 @@ def create_comment(
 @router.get('/comments/{skill_id}', response_model=list[CommentOut])
 def list_comments_endpoint(
     skill_id: str,
+    response: Response,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     session: Session = Depends(get_session),
 ) -> list[CommentOut]:
     _ensure_skill(session, skill_id)
-    comments = list_comments(session, skill_id, limit=limit, offset=offset)
+    comments = list_comments(session, skill_id, limit=limit, offset=offset, cursor=cursor)
+    set_next_cursor(response, comments, limit)
     return [
         CommentOut(
             id=comment.id,
@@ -219,12 +216,10 @@ def list_comments_endpoint(
 @router.get('/skills/{skill_id}/stats', response_model=MarketStats)
 def skill_market_stats(skill_id: str, session: Session = Depends(get_session)) -> MarketStats:
     _ensure_skill(session, skill_id)
-    favorites_count = count_favorites(session, skill_id)
-    average, count = get_rating_summary(session, skill_id)
-    comments_count = count_comments(session, skill_id)
+    stats = get_skill_market_stats(session, skill_id)
     return MarketStats(
         skill_id=skill_id,
-        favorites_count=favorites_count,
-        rating=RatingSummary(skill_id=skill_id, average=average, count=count),
-        comments_count=comments_count,
+        favorites_count=stats.favorites_count,
+        rating=_to_rating_summary(skill_id, stats),
+        comments_count=stats.comments_count,
     )
@@ -1,5 +1,5 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlmodel import Session
 
 from app.db.session import get_session
@@ -7,6 +7,8 @@ from app.models.user import User
 from app.schemas.memory import MemoryCreate, MemoryOut
 from app.schemas.user import UserOut, UserUpdate
 from app.services.auth_service import get_current_user
+from app.api.pagination import get_cursor, set_next_cursor
+from app.services.pagination import Cursor
 from app.services.memory_service import list_memories, upsert_memory
 from app.services.user_service import to_user_out, update_user
 
@@ -44,13 +46,16 @@ def update_me(
 
 @router.get('/memory', response_model=list[MemoryOut])
 def list_me_memory(
+    response: Response,
     scope:Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     session: Session = Depends(get_session),
     user: User = Depends(get_current_user),
 ) -> list[MemoryOut]:
-    memories = list_memories(session, user.id, scope=scope, limit=limit, offset=offset)
+    memories = list_memories(session, user.id, scope=scope, limit=limit, offset=offset, cursor=cursor)
+    set_next_cursor(response, memories, limit)
     return [_to_memory_out(record) for record in memories]
 
 
@@ -1,10 +1,12 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlmodel import Session
 from app.db.session import get_session
 from app.models.user import User
 from app.schemas.memory import MemoryCreate, MemoryOut, MemoryUpdate
 from app.services.auth_service import get_current_user
+from app.api.pagination import get_cursor, set_next_cursor
+from app.services.pagination import Cursor
 from app.services.memory_service import delete_memory, get_memory, list_memories, update_memory, upsert_memory
 
 router = APIRouter(prefix='/memory', tags=['memory'])
@@ -34,13 +36,16 @@ def upsert_memory_endpoint(
 
 @router.get('', response_model=list[MemoryOut])
 def list_memory_endpoint(
+    response: Response,
     scope:Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     session: Session = Depends(get_session),
     user: User = Depends(get_current_user),
 ) -> list[MemoryOut]:
-    memories = list_memories(session, user.id, scope=scope, limit=limit, offset=offset)
+    memories = list_memories(session, user.id, scope=scope, limit=limit, offset=offset, cursor=cursor)
+    set_next_cursor(response, memories, limit)
     return [
         MemoryOut(
             id=record.id,
@@ -0,0 +1,31 @@
+import hmac
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, metrics
+from app.db.session import get_async_session, get_session
+from app.services.auth_service import get_current_user, require_admin, security
+from app.services.job_queue import refresh_job_queue_metrics
+
+router = APIRouter()
+
+
+def require_metrics_access(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: Session = Depends(get_session),
+) -> None:
+    token = settings.METRICS_TOKEN
+    if token and hmac.compare_digest(credentials.credentials.encode(), token.encode()):
+        return
+    require_admin(get_current_user(credentials, session))
+
+
+@router.get('/metrics', include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def prometheus_metrics(session: AsyncSession = Depends(get_async_session)):
+    await refresh_job_queue_metrics(session)
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlmodel import Session
 from app.db.session import get_session
 from app.models.user import User
 from app.schemas.notification import NotificationCreate, NotificationOut, NotificationUpdate
 from app.services.auth_service import get_current_user
+from app.api.pagination import get_cursor, set_next_cursor
+from app.services.pagination import Cursor
 from app.services.notification_service import (
     create_notification,
     get_notification,
@@ -39,9 +42,11 @@ def create_notification_endpoint(
 
 @router.get('', response_model=list[NotificationOut])
 def list_notifications_endpoint(
+    response: Response,
     unread_only: bool = False,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     session: Session = Depends(get_session),
     user: User = Depends(get_current_user),
 ) -> list[NotificationOut]:
@@ -51,7 +56,9 @@ def list_notifications_endpoint(
         unread_only=unread_only,
         limit=limit,
         offset=offset,
+        cursor=cursor,
     )
+    set_next_cursor(response, notifications, limit)
     return [
         NotificationOut(
             id=record.id,
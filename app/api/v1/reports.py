@@ -1,11 +1,13 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlmodel import Session
 from app.db.session import get_session
 from app.models.user import User
 from app.schemas.report import ReportCreate, ReportOut, ReportUpdate
 from app.models.enums import ReportStatus
 from app.services.auth_service import get_current_user
+from app.api.pagination import get_cursor, set_next_cursor
+from app.services.pagination import Cursor
 from app.services.report_service import create_report, delete_report, get_report, list_reports, update_report
 
 router = APIRouter(prefix='/reports', tags=['reports'])
@@ -36,13 +38,16 @@ def create_report_endpoint(
 
 @router.get('', response_model=list[ReportOut])
 def list_reports_endpoint(
+    response: Response,
     status:Optional[ReportStatus] = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     session: Session = Depends(get_session),
     user: User = Depends(get_current_user),
 ) -> list[ReportOut]:
-    reports = list_reports(session, user.id, status=status, limit=limit, offset=offset)
+    reports = list_reports(session, user.id, status=status, limit=limit, offset=offset, cursor=cursor)
+    set_next_cursor(response, reports, limit)
     return [
         ReportOut(
             id=record.id,
@@ -1,5 +1,5 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlmodel import Session
 from app.db.session import get_session
 from app.models.user import User
@@ -17,6 +17,8 @@ from app.schemas.skill import (
 )
 from app.models.enums import SkillVisibility
 from app.services.auth_service import get_current_user
+from app.api.pagination import get_cursor, set_next_cursor
+from app.services.pagination import Cursor
 from app.services.skill_service import (
     create_skill,
     create_version,
@@ -71,12 +73,14 @@ def create_skill_endpoint(
 
 @router.get('', response_model=list[SkillOut])
 def list_skills_endpoint(
+    response: Response,
     q:Optional[str] = None,
     visibility:Optional[SkillVisibility] = None,
     tags:Optional[str] = None,
     owner_id:Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = Depends(get_cursor),
     session: Session = Depends(get_session),
 ) -> list[SkillOut]:
     tag_list = [item.strip() for item in tags.split(',')] if tags else None
@@ -88,7 +92,9 @@ def list_skills_endpoint(
         owner_id=owner_id,
         limit=limit,
         offset=offset,
+        cursor=cursor,
     )
+    set_next_cursor(response, skills, limit)
     return [_to_skill_out(skill) for skill in skills]
 
 
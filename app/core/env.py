@@ -33,30 +33,57 @@ def _parse_env_line(line: str) -> tuple[str, str] | None:
     return key, value
 
 
-def _env_file_exists() -> bool:
-    return any(path.exists() for path in _iter_env_files())
-
-
-def _get_from_env_files(key: str) -> str | None:
-    for path in _iter_env_files():
-        if not path.exists():
-            continue
-        try:
-            content = path.read_text(encoding='utf-8')
-        except OSError:
-            continue
-        for line in content.splitlines():
-            parsed = _parse_env_line(line)
-            if not parsed:
-                continue
-            parsed_key, parsed_value = parsed
-            if parsed_key == key:
-                return parsed_value or None
-    return None
+_FileSignature = tuple[int, int, int, int]
+
+_env_file_cache: dict[Path, tuple[_FileSignature, dict[str, str]]] = {}
+
+
+def _file_signature(path: Path) -> _FileSignature | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _parse_env_file(path: Path) -> dict[str, str] | None:
+    try:
+        content = path.read_text(encoding='utf-8')
+    except OSError:
+        return None
+    values: dict[str, str] = {}
+    for line in content.splitlines():
+        parsed = _parse_env_line(line)
+        if parsed:
+            values.setdefault(*parsed)
+    return values
+
+
+def _load_env_file(path: Path) -> dict[str, str] | None:
+    signature = _file_signature(path)
+    if signature is None:
+        _env_file_cache.pop(path, None)
+        return None
+    cached = _env_file_cache.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    values = _parse_env_file(path)
+    if values is None:
+        return {}
+    _env_file_cache[path] = (signature, values)
+    return values
+
+
+def reload_env() -> None:
+    _env_file_cache.clear()
 
 
 def get_env_value(key: str) -> str | None:
-    if _env_file_exists():
-        return _get_from_env_files(key)
+    env_files = [values for values in map(_load_env_file, _iter_env_files()) if values is not None]
+    if env_files:
+        for values in env_files:
+            if key in values:
+                return values[key] or None
+        return None
     value = os.getenv(key)
     return value if value else None
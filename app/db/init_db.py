@@ -5,17 +5,21 @@ from app.models import (  # noqa: F401
     user,
     skill,
     skill_version,
+    skill_search_document,
     refresh_token,
     skill_favorite,
     skill_rating,
     skill_comment,
+    skill_stats,
     chat_session,
     chat_message,
+    chat_summary,
     skill_suggestion,
     skill_draft_suggestion,
     memory_item,
     notification,
     report,
+    job,
 )
 
 
@@ -1,9 +1,49 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+
+_ASYNC_DRIVERS = {
+    'mysql': 'mysql+aiomysql',
+    'mysql+pymysql': 'mysql+aiomysql',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+}
+
+
+def to_async_database_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _async_engine_kwargs(url: str) -> dict:
+    if make_url(url).drivername.startswith('sqlite'):
+        # SQLite connections are cheap and must not be shared across event loops.
+        return {'poolclass': NullPool}
+    return {'pool_pre_ping': True}
+
 
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+async_engine = create_async_engine(
+    to_async_database_url(settings.DATABASE_URL),
+    **_async_engine_kwargs(settings.DATABASE_URL),
+)
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
 
 
 def get_session():
     with Session(engine) as session:
         yield session
+
+
+async def get_async_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -1,15 +1,25 @@
 from contextlib import asynccontextmanager
+import asyncio
 import os
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
+from sqlmodel import Session
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.core.logging import configure_logging
+from app.core.metrics import MetricsMiddleware
 from app.core.providers import get_provider_registry
 from app.db.init_db import init_db
+from app.db.session import async_engine, engine
+from app.services import skill_search
+from app.services.ai_debug_trace import debug_trace_writer
+from app.services.ai_provider import close_openai_clients
+from app.services.ai_stream_registry import stream_registry
+from app.services.job_queue import job_worker
 
 configure_logging(settings.LOG_LEVEL)
 
@@ -18,7 +28,18 @@ configure_logging(settings.LOG_LEVEL)
 async def lifespan(_: FastAPI):
     get_provider_registry()
     init_db()
+    with Session(engine) as session:
+        if not skill_search.use_fulltext(session):
+            skill_search.rebuild_index(session)
+    if settings.JOB_WORKER_ENABLED:
+        job_worker.start()
+    stream_registry.start_sweeper()
     yield
+    await job_worker.stop()
+    await stream_registry.aclose()
+    await close_openai_clients()
+    await asyncio.to_thread(debug_trace_writer.close)
+    await async_engine.dispose()
 
 app = FastAPI(title=settings.PROJECT_NAME, debug=settings.DEBUG, lifespan=lifespan)
 
@@ -31,8 +52,12 @@ app.add_middleware(
     allow_credentials=allow_credentials,
     allow_methods=['*'],
     allow_headers=['*'],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router)
 
 
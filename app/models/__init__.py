@@ -2,19 +2,23 @@ from app.models.base import IDModel, TimestampModel
 from app.models.user import User
 from app.models.skill import Skill
 from app.models.skill_version import SkillVersion
+from app.models.skill_search_document import SkillSearchDocument
 from app.models.refresh_token import RefreshToken
 from app.models.skill_favorite import SkillFavorite
 from app.models.skill_rating import SkillRating
 from app.models.skill_comment import SkillComment
 from app.models.skill_comment_reply import SkillCommentReply
 from app.models.skill_comment_like import SkillCommentLike
+from app.models.skill_stats import SkillStats
 from app.models.chat_session import ChatSession
 from app.models.chat_message import ChatMessage
+from app.models.chat_summary import ChatSummary
 from app.models.skill_suggestion import SkillSuggestion
 from app.models.skill_draft_suggestion import SkillDraftSuggestion
 from app.models.memory_item import MemoryItem
 from app.models.notification import Notification
 from app.models.report import Report
+from app.models.job import Job
 
 __all__ = [
     'IDModel',
@@ -22,17 +26,21 @@ __all__ = [
     'User',
     'Skill',
     'SkillVersion',
+    'SkillSearchDocument',
     'RefreshToken',
     'SkillFavorite',
     'SkillRating',
     'SkillComment',
     'SkillCommentReply',
     'SkillCommentLike',
+    'SkillStats',
     'ChatSession',
     'ChatMessage',
+    'ChatSummary',
     'SkillSuggestion',
     'SkillDraftSuggestion',
     'MemoryItem',
     'Notification',
     'Report',
+    'Job',
 ]
@@ -1,13 +1,19 @@
 from typing import Optional
+import sqlalchemy as sa
 from sqlmodel import Field, SQLModel
 from app.models.base import IDModel, TimestampModel
-from app.models.enums import ChatRole, enum_column
+from app.models.enums import ChatMessageStatus, ChatRole, enum_column
 
 
 class ChatMessage(IDModel, TimestampModel, SQLModel, table=True):
     __tablename__ = 'chat_messages'
+    __table_args__ = (sa.Index('ix_chat_messages_session_id_created_at_id', 'session_id', 'created_at', 'id'),)
 
     session_id: str = Field(index=True)
     role: ChatRole = Field(sa_column=enum_column(ChatRole, 'chat_role'))
     content: str
     skill_id: Optional[str] = Field(default=None, index=True)
+    status: ChatMessageStatus = Field(
+        default=ChatMessageStatus.COMPLETE,
+        sa_column=enum_column(ChatMessageStatus, 'chat_message_status'),
+    )
@@ -1,10 +1,12 @@
 from typing import Optional
+import sqlalchemy as sa
 from sqlmodel import Field, SQLModel
 from app.models.base import IDModel, TimestampModel
 
 
 class ChatSession(IDModel, TimestampModel, SQLModel, table=True):
     __tablename__ = 'chat_sessions'
+    __table_args__ = (sa.Index('ix_chat_sessions_user_id_created_at_id', 'user_id', 'created_at', 'id'),)
 
     user_id: str = Field(index=True)
     title: Optional[str] = None
@@ -0,0 +1,20 @@
+from datetime import datetime
+import sqlalchemy as sa
+from sqlalchemy.dialects.mysql import DATETIME as MySQLDateTime
+from sqlmodel import Field, SQLModel
+
+from app.models.base import IDModel, TimestampModel
+
+_TIMESTAMP = sa.DateTime(timezone=True).with_variant(MySQLDateTime(fsp=6), 'mysql')
+
+
+class ChatSummary(IDModel, TimestampModel, SQLModel, table=True):
+    __tablename__ = 'chat_summaries'
+    __table_args__ = (sa.UniqueConstraint('session_id'),)
+
+    session_id: str
+    content: str = Field(sa_column=sa.Column(sa.Text(), nullable=False))
+    # The newest message folded into the summary; later messages are replayed verbatim.
+    covered_message_id: str
+    covered_created_at: datetime = Field(sa_type=_TIMESTAMP, sa_column_kwargs={'nullable': False})
+    covered_messages: int = Field(default=0)
@@ -26,12 +26,25 @@ class ChatRole(str, Enum):
     SYSTEM = 'system'
 
 
+class ChatMessageStatus(str, Enum):
+    STREAMING = 'streaming'
+    COMPLETE = 'complete'
+    ERROR = 'error'
+
+
 class ReportStatus(str, Enum):
     OPEN = 'open'
     RESOLVED = 'resolved'
     DISMISSED = 'dismissed'
 
 
+class JobStatus(str, Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+
 def enum_column(enum_cls: type[Enum], name: str) -> Column:
     return Column(
         sa.Enum(
@@ -0,0 +1,44 @@
+from datetime import datetime, timezone
+from typing import Optional
+import sqlalchemy as sa
+from sqlalchemy.dialects.mysql import DATETIME as MySQLDateTime
+from sqlmodel import Field, SQLModel
+
+from app.models.base import IDModel
+from app.models.enums import JobStatus, enum_column
+
+_TIMESTAMP = sa.DateTime().with_variant(MySQLDateTime(fsp=6), 'mysql')
+
+
+def _utc_now():
+    # Naive UTC throughout, matching the DATETIME columns; the queue compares these values in SQL.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Job(IDModel, SQLModel, table=True):
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        sa.UniqueConstraint('job_type', 'idempotency_key'),
+        sa.Index('ix_jobs_job_type_status_run_after', 'job_type', 'status', 'run_after'),
+        sa.Index('ix_jobs_status_updated_at', 'status', 'updated_at'),
+    )
+
+    job_type: str
+    idempotency_key: str
+    payload: str = Field(sa_column=sa.Column(sa.Text(), nullable=False))
+    status: JobStatus = Field(
+        default=JobStatus.PENDING,
+        sa_column=enum_column(JobStatus, 'job_status'),
+    )
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    run_after: datetime = Field(default_factory=_utc_now, sa_type=_TIMESTAMP, sa_column_kwargs={'nullable': False})
+    locked_by: Optional[str] = Field(default=None)
+    locked_at: Optional[datetime] = Field(default=None, sa_type=_TIMESTAMP)
+    last_error: Optional[str] = Field(default=None, sa_column=sa.Column(sa.Text()))
+    created_at: datetime = Field(default_factory=_utc_now, sa_type=_TIMESTAMP, sa_column_kwargs={'nullable': False})
+    updated_at: datetime = Field(
+        default_factory=_utc_now,
+        sa_type=_TIMESTAMP,
+        sa_column_kwargs={'nullable': False, 'onupdate': _utc_now},
+    )
@@ -6,7 +6,10 @@ from app.models.base import IDModel, TimestampModel
 
 class MemoryItem(IDModel, TimestampModel, SQLModel, table=True):
     __tablename__ = 'memories'
-    __table_args__ = (sa.UniqueConstraint('user_id', 'key', 'scope'),)
+    __table_args__ = (
+        sa.UniqueConstraint('user_id', 'key', 'scope'),
+        sa.Index('ix_memories_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
 
     user_id: str = Field(index=True)
     key: str = Field(index=True)
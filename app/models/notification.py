@@ -1,9 +1,11 @@
+import sqlalchemy as sa
 from sqlmodel import Field, SQLModel
 from app.models.base import IDModel, TimestampModel
 
 
 class Notification(IDModel, TimestampModel, SQLModel, table=True):
     __tablename__ = 'notifications'
+    __table_args__ = (sa.Index('ix_notifications_user_id_created_at_id', 'user_id', 'created_at', 'id'),)
 
     user_id: str = Field(index=True)
     type: str
@@ -1,3 +1,4 @@
+import sqlalchemy as sa
 from sqlmodel import Field, SQLModel
 from app.models.base import IDModel, TimestampModel
 from app.models.enums import ReportStatus, enum_column
@@ -5,6 +6,7 @@ from app.models.enums import ReportStatus, enum_column
 
 class Report(IDModel, TimestampModel, SQLModel, table=True):
     __tablename__ = 'reports'
+    __table_args__ = (sa.Index('ix_reports_user_id_created_at_id', 'user_id', 'created_at', 'id'),)
 
     user_id: str = Field(index=True)
     target_type: str = Field(index=True)
@@ -8,6 +8,7 @@ from app.models.enums import SkillVisibility, enum_column
 
 class Skill(IDModel, TimestampModel, SQLModel, table=True):
     __tablename__ = 'skills'
+    __table_args__ = (sa.Index('ix_skills_deleted_created_at_id', 'deleted', 'created_at', 'id'),)
 
     name: str
     description: str
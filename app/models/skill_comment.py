@@ -1,9 +1,11 @@
+import sqlalchemy as sa
 from sqlmodel import Field, SQLModel
 from app.models.base import IDModel, TimestampModel
 
 
 class SkillComment(IDModel, TimestampModel, SQLModel, table=True):
     __tablename__ = 'skill_comments'
+    __table_args__ = (sa.Index('ix_skill_comments_skill_id_created_at_id', 'skill_id', 'created_at', 'id'),)
 
     user_id: str = Field(index=True)
     skill_id: str = Field(index=True)
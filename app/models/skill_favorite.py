@@ -5,7 +5,10 @@ from app.models.base import IDModel, TimestampModel
 
 class SkillFavorite(IDModel, TimestampModel, SQLModel, table=True):
     __tablename__ = 'skill_favorites'
-    __table_args__ = (sa.UniqueConstraint('user_id', 'skill_id'),)
+    __table_args__ = (
+        sa.UniqueConstraint('user_id', 'skill_id'),
+        sa.Index('ix_skill_favorites_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
 
     user_id: str = Field(index=True)
     skill_id: str = Field(index=True)
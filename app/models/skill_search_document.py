@@ -0,0 +1,30 @@
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+from sqlmodel import Field, SQLModel
+from app.models.base import TimestampModel
+
+
+def _long_text() -> sa.types.TypeEngine:
+    return sa.Text().with_variant(mysql.MEDIUMTEXT(), 'mysql')
+
+
+class SkillSearchDocument(TimestampModel, SQLModel, table=True):
+    __tablename__ = 'skill_search_documents'
+    __table_args__ = (
+        sa.Index(
+            'ft_skill_search_documents',
+            'name',
+            'description',
+            'tags',
+            'content',
+            mysql_prefix='FULLTEXT',
+            mysql_with_parser='ngram',
+        ).ddl_if(dialect='mysql'),
+    )
+
+    skill_id: str = Field(primary_key=True)
+    version: int = 1
+    name: str
+    description: str = Field(sa_column=sa.Column(sa.Text(), nullable=False))
+    tags: str = Field(default='', sa_column=sa.Column(sa.Text(), nullable=False))
+    content: str = Field(sa_column=sa.Column(_long_text(), nullable=False))
@@ -0,0 +1,12 @@
+from sqlmodel import Field, SQLModel
+from app.models.base import TimestampModel
+
+
+class SkillStats(TimestampModel, SQLModel, table=True):
+    __tablename__ = 'skill_stats'
+
+    skill_id: str = Field(primary_key=True)
+    favorites_count: int = 0
+    rating_sum: int = 0
+    rating_count: int = 0
+    comments_count: int = 0
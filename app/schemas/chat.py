@@ -1,7 +1,7 @@
 from typing import Optional
 from datetime import datetime
 from pydantic import BaseModel
-from app.models.enums import ChatRole, SkillSuggestionStatus
+from app.models.enums import ChatMessageStatus, ChatRole, SkillSuggestionStatus
 
 
 class ChatSessionCreate(BaseModel):
@@ -27,6 +27,7 @@ class ChatMessageOut(BaseModel):
     role: ChatRole
     content: str
     skill_id: Optional[str] = None
+    status: ChatMessageStatus = ChatMessageStatus.COMPLETE
     created_at: datetime
 
 
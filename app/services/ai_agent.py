@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import re
+from collections import Counter
 from collections.abc import AsyncIterator, Sequence
+from contextlib import suppress
+from dataclasses import dataclass
 from pathlib import Path
 from time import perf_counter
 
@@ -10,6 +14,8 @@ from loguru import logger
 from pydantic import BaseModel
 from pydantic_ai import Agent
 
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.models.chat_message import ChatMessage
 from app.models.enums import ChatRole
 from app.services.ai_prompts import read_prompt_file
@@ -37,6 +43,65 @@ _CLARIFY_FORCE_PATTERNS = [
     re.compile(r'.*(怎么弄|怎么做|如何做|咋弄|怎么搞)$'),
 ]
 
+# Local clarify scoring: only clear-cut prompts are decided here, the rest go to the LLM decider.
+_QUESTION_PATTERN = re.compile(
+    r'(什么|怎么|如何|为什么|为何|哪些|哪个|是否|多少|吗|呢|[?？]|\b(what|how|why|which|when|where)\b)',
+    re.IGNORECASE,
+)
+# Code-like tokens only: plain words are not details. Identifiers need `_`, `.` or camelCase to count.
+_CONCRETE_DETAIL_PATTERN = re.compile(
+    r'(\d|`|https?://|\b[A-Za-z_]\w*[_.]\w+|\b[A-Za-z][a-z0-9]+[A-Z]\w*)'
+)
+_VAGUE_REFERENCE_PATTERN = re.compile(
+    r'(^(这个|那个|它|这样|那样|弄一下|搞一下|处理一下|看看)|'
+    r'\b(this|that|these|those) (thing|stuff)s?\b|\ball of (this|that)\b|\bsomething\b)',
+    re.IGNORECASE,
+)
+# Something specific to talk about: an acronym, a capitalised name mid-sentence, or a stated topic.
+_NAMED_SUBJECT_PATTERN = re.compile(r'(\b[A-Z]{2,}\b|\s[A-Z][a-z]+|关于|有关|区别|差异|原理|优缺点)')
+_TASK_VERB_PATTERN = re.compile(
+    r'(写|翻译|解释|总结|介绍|比较|列出|改写|润色|\b(explain|write|translate|summari[sz]e|compare|list|describe|define)\b)',
+    re.IGNORECASE,
+)
+_CLARIFY_TINY_PROMPT_LEN = 4
+_CLARIFY_MEDIUM_PROMPT_LEN = 15
+_CLARIFY_LONG_PROMPT_LEN = 40
+# Negative weights argue for answering directly, positive ones for asking first. Thresholds live in settings.
+_CLARIFY_FEATURE_WEIGHTS = {
+    'greeting': -4.0,
+    'clarify_response': -4.0,
+    'long_prompt': -1.0,
+    'medium_prompt': -0.5,
+    'tiny_prompt': 1.5,
+    'question': -1.0,
+    'concrete_detail': -1.5,
+    'named_subject': -1.0,
+    'task_verb': -0.5,
+    'vague_reference': 1.5,
+    'skill_intent': -1.5,
+    'history_depth': -0.5,
+}
+_local_clarify_counts: Counter[str] = Counter()
+
+_FIRST_TOKEN_SECONDS = metrics.histogram(
+    'ai_stream_first_token_seconds',
+    'Time from the start of a routed chat turn to its first streamed delta.',
+    ('model', 'route'),
+    buckets=(0.25, 0.5, 1, 1.5, 2, 3, 5, 8, 13, 21, 34, 60),
+)
+_STREAM_SECONDS = metrics.histogram(
+    'ai_stream_duration_seconds',
+    'Total duration of routed chat turns.',
+    ('model', 'route'),
+    buckets=(1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300, 600),
+)
+_CLARIFY_DECIDER_SECONDS = metrics.histogram(
+    'ai_clarify_decider_seconds',
+    'Latency of the model call deciding whether a prompt needs clarification.',
+    ('model', 'outcome'),
+    buckets=(0.1, 0.25, 0.5, 1, 1.5, 2, 3, 5, 8, 13, 21),
+)
+
 _GENERAL_SYSTEM_PROMPT = """
 你是 WenDui 的通用 AI Agent。必须遵守以下规则：
 1) 始终使用中文回复用户。
@@ -188,6 +253,72 @@ def _force_clarify(text: str) -> bool:
     return any(pattern.search(stripped) for pattern in _CLARIFY_FORCE_PATTERNS)
 
 
+@dataclass(frozen=True)
+class LocalClarifyVerdict:
+    should_clarify: bool | None
+    score: float
+    features: tuple[str, ...]
+
+
+def _score_clarify_features(
+    prompt: str,
+    history: Sequence[ChatMessage],
+    selected_skill_id: str | None,
+) -> tuple[float, list[str]]:
+    stripped = prompt.strip()
+    score = 0.0
+    features: list[str] = []
+
+    def _hit(name: str) -> None:
+        nonlocal score
+        score += _CLARIFY_FEATURE_WEIGHTS[name]
+        features.append(name)
+
+    if _is_greeting(stripped):
+        _hit('greeting')
+    if _is_clarify_response(stripped):
+        _hit('clarify_response')
+    # Length alone never settles a prompt; it needs a question, subject or detail alongside.
+    if len(stripped) >= _CLARIFY_LONG_PROMPT_LEN:
+        _hit('long_prompt')
+    elif len(stripped) >= _CLARIFY_MEDIUM_PROMPT_LEN:
+        _hit('medium_prompt')
+    elif len(stripped) <= _CLARIFY_TINY_PROMPT_LEN:
+        _hit('tiny_prompt')
+    if _QUESTION_PATTERN.search(stripped):
+        _hit('question')
+    if _CONCRETE_DETAIL_PATTERN.search(stripped):
+        _hit('concrete_detail')
+    if _NAMED_SUBJECT_PATTERN.search(stripped):
+        _hit('named_subject')
+    if _TASK_VERB_PATTERN.search(stripped):
+        _hit('task_verb')
+    if _VAGUE_REFERENCE_PATTERN.search(stripped):
+        _hit('vague_reference')
+    if selected_skill_id or _looks_like_skill_request(stripped):
+        _hit('skill_intent')
+    user_turns = sum(1 for message in history if _role_value(message.role) == ChatRole.USER.value)
+    if user_turns >= 2:
+        _hit('history_depth')
+    return score, features
+
+
+def _local_clarify_decision(
+    prompt: str,
+    history: Sequence[ChatMessage],
+    selected_skill_id: str | None,
+) -> LocalClarifyVerdict:
+    score, features = _score_clarify_features(prompt, history, selected_skill_id)
+    if score >= settings.AI_LOCAL_CLARIFY_YES_SCORE:
+        should_clarify: bool | None = True
+    elif score <= settings.AI_LOCAL_CLARIFY_NO_SCORE:
+        should_clarify = False
+    else:
+        should_clarify = None
+    _local_clarify_counts['hit' if should_clarify is not None else 'escalated'] += 1
+    return LocalClarifyVerdict(should_clarify=should_clarify, score=score, features=tuple(features))
+
+
 def _last_user_message_without_clarify(history: Sequence[ChatMessage]) -> ChatMessage | None:
     for message in reversed(history):
         if _role_value(message.role) != ChatRole.USER.value:
@@ -274,6 +405,7 @@ async def _should_trigger_clarify(
     model,
 ) -> ClarifyDecision | None:
     agent = get_clarify_decider()
+    started = perf_counter()
     try:
         result = await agent.run(
             prompt,
@@ -282,106 +414,91 @@ async def _should_trigger_clarify(
             message_history=message_history,
         )
     except Exception as exc:  # noqa: BLE001
+        _CLARIFY_DECIDER_SECONDS.labels(deps.model_id, 'error').observe(perf_counter() - started)
         logger.warning('ai.clarify.decider_failed', error=str(exc))
         return None
+    _CLARIFY_DECIDER_SECONDS.labels(deps.model_id, 'ok').observe(perf_counter() - started)
     return result.output
 
 
-async def stream_agent_text(
+@dataclass
+class _StreamStats:
+    delta_count: int = 0
+    char_count: int = 0
+    fallback_len: int = 0
+
+
+_STREAM_END = object()
+
+
+def _log_clarify_decision(deps: AiDeps, decision: ClarifyDecision | None, prompt: str) -> tuple[bool, str | None]:
+    should_clarify = bool(decision and decision.should_clarify)
+    clarify_reason = decision.reason if decision else 'decider_unavailable'
+    logger.info(
+        'ai.clarify.decision',
+        session_id=deps.session_id,
+        user_id=deps.user.id,
+        model=deps.model_id,
+        should_clarify=should_clarify,
+        reason=clarify_reason,
+        prompt_len=len(prompt),
+        prompt_preview=_preview(prompt),
+    )
+    return should_clarify, clarify_reason
+
+
+async def _run_clarify_agent(
     *,
     deps: AiDeps,
     prompt: str,
     message_history: Sequence,
-    raw_history: Sequence[ChatMessage],
-) -> AsyncIterator[str]:
-    model = build_openai_chat_model(deps.model_id)
-    prompt_preview = _preview(prompt)
-    clarify_reason = None
-    if _force_clarify(prompt):
-        should_clarify = True
-        clarify_reason = 'heuristic'
-        logger.info(
-            'ai.clarify.force',
-            session_id=deps.session_id,
-            user_id=deps.user.id,
-            model=deps.model_id,
-            prompt_len=len(prompt),
-            prompt_preview=prompt_preview,
-        )
-    else:
-        decision = await _should_trigger_clarify(
-            deps=deps,
-            prompt=prompt,
-            message_history=message_history,
-            model=model,
-        )
-        should_clarify = bool(decision and decision.should_clarify)
-        clarify_reason = decision.reason if decision else 'decider_unavailable'
-        logger.info(
-            'ai.clarify.decision',
-            session_id=deps.session_id,
-            user_id=deps.user.id,
-            model=deps.model_id,
-            should_clarify=should_clarify,
-            reason=clarify_reason,
-            prompt_len=len(prompt),
-            prompt_preview=prompt_preview,
-        )
-
-    if should_clarify:
-        logger.info(
-            'ai.agent.route',
-            session_id=deps.session_id,
-            user_id=deps.user.id,
-            model=deps.model_id,
-            route='clarify',
-            reason=clarify_reason,
-            selected_skill_id=deps.selected_skill_id,
-        )
-        agent = get_clarify_agent()
-        logger.info(
-            'ai.clarify.run',
-            session_id=deps.session_id,
-            user_id=deps.user.id,
-            model=deps.model_id,
-        )
-        result = await agent.run(
-            prompt,
-            model=model,
-            deps=deps,
-            message_history=message_history,
-        )
-        output_text = str(result.output or '')
-        logger.info(
-            'ai.clarify.result',
-            session_id=deps.session_id,
-            user_id=deps.user.id,
-            model=deps.model_id,
-            output_len=len(output_text),
-        )
-        yield _ensure_clarify_marker(output_text)
-        return
-
-    use_skill_agent = should_use_skill_agent(
-        prompt=prompt,
-        history=raw_history,
-        selected_skill_id=deps.selected_skill_id,
-    )
-    agent = get_skill_agent() if use_skill_agent else get_general_agent()
-    instructions = _build_skill_instructions(deps.selected_skill_id) if use_skill_agent else []
-    route = 'skill' if use_skill_agent else 'general'
+    model,
+    reason: str | None,
+) -> str:
     logger.info(
         'ai.agent.route',
         session_id=deps.session_id,
         user_id=deps.user.id,
         model=deps.model_id,
-        route=route,
+        route='clarify',
+        reason=reason,
         selected_skill_id=deps.selected_skill_id,
     )
-    start_ts = perf_counter()
-    delta_count = 0
-    char_count = 0
-    fallback_len = 0
+    agent = get_clarify_agent()
+    logger.info(
+        'ai.clarify.run',
+        session_id=deps.session_id,
+        user_id=deps.user.id,
+        model=deps.model_id,
+    )
+    result = await agent.run(
+        prompt,
+        model=model,
+        deps=deps,
+        message_history=message_history,
+    )
+    output_text = str(result.output or '')
+    logger.info(
+        'ai.clarify.result',
+        session_id=deps.session_id,
+        user_id=deps.user.id,
+        model=deps.model_id,
+        output_len=len(output_text),
+    )
+    return _ensure_clarify_marker(output_text)
+
+
+async def _stream_routed_agent(
+    *,
+    deps: AiDeps,
+    agent: Agent[AiDeps],
+    route: str,
+    prompt: str,
+    message_history: Sequence,
+    instructions: list[str],
+    model,
+    stats: _StreamStats,
+) -> AsyncIterator[str]:
     async with agent.run_stream(
         prompt,
         model=model,
@@ -392,10 +509,10 @@ async def stream_agent_text(
         async for delta in stream.stream_text(delta=True, debounce_by=None):
             if not delta:
                 continue
-            delta_count += 1
-            char_count += len(delta)
+            stats.delta_count += 1
+            stats.char_count += len(delta)
             yield delta
-        if delta_count == 0:
+        if stats.delta_count == 0:
             try:
                 fallback_output = await stream.get_output()
             except Exception as exc:  # noqa: BLE001
@@ -409,14 +526,14 @@ async def stream_agent_text(
                 )
             else:
                 if isinstance(fallback_output, str) and fallback_output:
-                    fallback_len = len(fallback_output)
+                    stats.fallback_len = len(fallback_output)
                     logger.warning(
                         'ai.agent.stream.fallback',
                         session_id=deps.session_id,
                         user_id=deps.user.id,
                         model=deps.model_id,
                         route=route,
-                        output_len=fallback_len,
+                        output_len=stats.fallback_len,
                     )
                     yield fallback_output
                 else:
@@ -428,15 +545,169 @@ async def stream_agent_text(
                         route=route,
                         output_type=type(fallback_output).__name__,
                     )
-    duration_ms = int((perf_counter() - start_ts) * 1000)
+
+
+async def _pump_stream(source: AsyncIterator[str], queue: asyncio.Queue) -> None:
+    # Runs the whole agent stream inside one task so cancelling it tears the HTTP stream down cleanly.
+    try:
+        async for delta in source:
+            queue.put_nowait(delta)
+    except Exception as exc:  # noqa: BLE001
+        queue.put_nowait(exc)
+    finally:
+        queue.put_nowait(_STREAM_END)
+
+
+async def stream_agent_text(
+    *,
+    deps: AiDeps,
+    prompt: str,
+    message_history: Sequence,
+    raw_history: Sequence[ChatMessage],
+) -> AsyncIterator[str]:
+    start_ts = perf_counter()
+    model = build_openai_chat_model(deps.model_id)
+    if _force_clarify(prompt):
+        logger.info(
+            'ai.clarify.force',
+            session_id=deps.session_id,
+            user_id=deps.user.id,
+            model=deps.model_id,
+            prompt_len=len(prompt),
+            prompt_preview=_preview(prompt),
+        )
+        yield await _run_clarify_agent(
+            deps=deps,
+            prompt=prompt,
+            message_history=message_history,
+            model=model,
+            reason='heuristic',
+        )
+        return
+
+    local = _local_clarify_decision(prompt, raw_history, deps.selected_skill_id)
+    logger.info(
+        'ai.clarify.local',
+        session_id=deps.session_id,
+        user_id=deps.user.id,
+        model=deps.model_id,
+        outcome='escalate' if local.should_clarify is None else str(local.should_clarify).lower(),
+        score=local.score,
+        features=list(local.features),
+        hit_count=_local_clarify_counts['hit'],
+        escalated_count=_local_clarify_counts['escalated'],
+    )
+    if local.should_clarify:
+        yield await _run_clarify_agent(
+            deps=deps,
+            prompt=prompt,
+            message_history=message_history,
+            model=model,
+            reason='local',
+        )
+        return
+
+    use_skill_agent = should_use_skill_agent(
+        prompt=prompt,
+        history=raw_history,
+        selected_skill_id=deps.selected_skill_id,
+    )
+    agent = get_skill_agent() if use_skill_agent else get_general_agent()
+    instructions = _build_skill_instructions(deps.selected_skill_id) if use_skill_agent else []
+    route = 'skill' if use_skill_agent else 'general'
+    escalate = local.should_clarify is None
+    # Only the tool-free general agent runs ahead of the decider: skill tools save skills and call the model,
+    # and cancelling the task would not undo either.
+    speculative = escalate and settings.AI_SPECULATIVE_CLARIFY and not use_skill_agent
+    stats = _StreamStats()
+    routed = _stream_routed_agent(
+        deps=deps,
+        agent=agent,
+        route=route,
+        prompt=prompt,
+        message_history=message_history,
+        instructions=instructions,
+        model=model,
+        stats=stats,
+    )
+    queue: asyncio.Queue = asyncio.Queue()
+    agent_task: asyncio.Task | None = None
+    first_token_ms: int | None = None
+    try:
+        if speculative:
+            # Start the routed agent right away; its deltas wait in the queue until the decider answers.
+            agent_task = asyncio.create_task(_pump_stream(routed, queue))
+        should_clarify = False
+        if escalate:
+            decision = await _should_trigger_clarify(
+                deps=deps,
+                prompt=prompt,
+                message_history=message_history,
+                model=model,
+            )
+            should_clarify, clarify_reason = _log_clarify_decision(deps, decision, prompt)
+        if should_clarify:
+            if agent_task is not None:
+                agent_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await agent_task
+                logger.info(
+                    'ai.agent.speculation.cancelled',
+                    session_id=deps.session_id,
+                    user_id=deps.user.id,
+                    model=deps.model_id,
+                    route=route,
+                    buffered_deltas=stats.delta_count,
+                )
+            else:
+                await routed.aclose()
+            yield await _run_clarify_agent(
+                deps=deps,
+                prompt=prompt,
+                message_history=message_history,
+                model=model,
+                reason=clarify_reason,
+            )
+            return
+
+        logger.info(
+            'ai.agent.route',
+            session_id=deps.session_id,
+            user_id=deps.user.id,
+            model=deps.model_id,
+            route=route,
+            selected_skill_id=deps.selected_skill_id,
+        )
+        if agent_task is None:
+            agent_task = asyncio.create_task(_pump_stream(routed, queue))
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if first_token_ms is None:
+                first_token_ms = int((perf_counter() - start_ts) * 1000)
+                _FIRST_TOKEN_SECONDS.labels(deps.model_id, route).observe(perf_counter() - start_ts)
+            yield item
+    finally:
+        if agent_task is not None and not agent_task.done():
+            agent_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await agent_task
+    duration = perf_counter() - start_ts
+    duration_ms = int(duration * 1000)
+    _STREAM_SECONDS.labels(deps.model_id, route).observe(duration)
     logger.info(
         'ai.agent.stream.done',
         session_id=deps.session_id,
         user_id=deps.user.id,
         model=deps.model_id,
         route=route,
-        delta_count=delta_count,
-        char_count=char_count,
-        fallback_len=fallback_len,
+        speculative=speculative,
+        delta_count=stats.delta_count,
+        char_count=stats.char_count,
+        fallback_len=stats.fallback_len,
+        first_token_ms=first_token_ms,
         duration_ms=duration_ms,
     )
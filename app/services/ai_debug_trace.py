@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import queue
+import random
+import shutil
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+
+_BATCH_SIZE = 256
+_CLOSE_TIMEOUT_SECONDS = 5.0
+
+
+def digest_messages(messages: Iterable[tuple[str, str]]) -> dict[str, Any]:
+    """Count, size and fingerprint of (role, content) pairs, cheap enough for every request log line."""
+    digest = hashlib.blake2b(digest_size=8)
+    count = 0
+    chars = 0
+    for role, content in messages:
+        digest.update(role.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(content.encode('utf-8'))
+        digest.update(b'\0')
+        count += 1
+        chars += len(content)
+    return {'message_count': count, 'message_chars': chars, 'messages_hash': digest.hexdigest()}
+
+
+def should_sample() -> bool:
+    rate = settings.AI_DEBUG_TRACE_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+class DebugTraceWriter:
+    """Appends trace records as JSON lines from a background thread, rotating files into gzip archives."""
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue[Optional[tuple[Path, dict[str, Any]]]] = queue.Queue(
+            maxsize=settings.AI_DEBUG_TRACE_QUEUE_SIZE
+        )
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    def submit(self, path: Path, record: dict[str, Any]) -> bool:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((path, record))
+        except queue.Full:
+            # Tracing must never slow a turn down; losing a sample is fine.
+            self.dropped += 1
+            return False
+        return True
+
+    def flush(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(None)
+        thread.join(_CLOSE_TIMEOUT_SECONDS)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='ai-debug-trace', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < _BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            try:
+                self._write([item for item in batch if item is not None])
+            except Exception as exc:  # noqa: BLE001
+                logger.warning('ai.debug_trace.write_failed', error=str(exc))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: list[tuple[Path, dict[str, Any]]]) -> None:
+        lines: dict[Path, list[str]] = defaultdict(list)
+        for path, record in batch:
+            lines[path].append(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        for path, chunk in lines.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._rotate(path)
+            with path.open('a', encoding='utf-8') as handle:
+                handle.write(''.join(chunk))
+            self.written += len(chunk)
+
+    def _rotate(self, path: Path) -> None:
+        max_bytes = settings.AI_DEBUG_TRACE_MAX_BYTES
+        if max_bytes <= 0:
+            return
+        try:
+            if path.stat().st_size < max_bytes:
+                return
+        except FileNotFoundError:
+            return
+        stamp = time.strftime('%Y%m%dT%H%M%S')
+        archive = path.with_name(f'{path.name}.{stamp}.gz')
+        suffix = 1
+        while archive.exists():
+            archive = path.with_name(f'{path.name}.{stamp}-{suffix}.gz')
+            suffix += 1
+        with path.open('rb') as source, gzip.open(archive, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        path.unlink()
+        archives = sorted(path.parent.glob(f'{path.name}.*.gz'), key=lambda item: item.stat().st_mtime)
+        for stale in archives[: max(len(archives) - settings.AI_DEBUG_TRACE_BACKUPS, 0)]:
+            stale.unlink(missing_ok=True)
+
+
+debug_trace_writer = DebugTraceWriter()
@@ -1,12 +1,24 @@
 from __future__ import annotations
 
-from typing import Iterable, Sequence
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable, Optional, Sequence
 
 from pydantic_ai import messages as ai_messages
 
+from app.core.config import settings
 from app.models.chat_message import ChatMessage
 from app.models.enums import ChatRole
 
+# CJK and full-width characters are roughly a token each; other text averages about four characters a token.
+_WIDE_CHARS = re.compile(r'[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]')
+_CHARS_PER_TOKEN = 4
+# Role markers and separators the provider adds around every message.
+_MESSAGE_OVERHEAD_TOKENS = 4
+_TOKEN_CACHE_SIZE = 8192
+_token_cache: OrderedDict[tuple[str, int], int] = OrderedDict()
+
 
 def _format_user_content(message: ChatMessage) -> str:
     if message.skill_id:
@@ -14,10 +26,84 @@ def _format_user_content(message: ChatMessage) -> str:
     return message.content
 
 
-def build_message_history(history: Sequence[ChatMessage]) -> list[ai_messages.ModelMessage]:
+def message_role(message: ChatMessage) -> str:
+    return message.role.value if hasattr(message.role, 'value') else message.role
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    wide = len(_WIDE_CHARS.findall(text))
+    return wide + -(-(len(text) - wide) // _CHARS_PER_TOKEN)
+
+
+def message_tokens(message: ChatMessage) -> int:
+    # Messages only change while streaming, and then their length changes too.
+    key = (message.id, len(message.content))
+    tokens = _token_cache.get(key)
+    if tokens is None:
+        tokens = estimate_tokens(message.content) + _MESSAGE_OVERHEAD_TOKENS
+        _token_cache[key] = tokens
+        if len(_token_cache) > _TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    else:
+        _token_cache.move_to_end(key)
+    return tokens
+
+
+def history_token_budget(model_id: str) -> int:
+    return settings.AI_HISTORY_TOKEN_BUDGETS.get(model_id, settings.AI_HISTORY_TOKEN_BUDGET)
+
+
+@dataclass
+class HistoryWindow:
+    messages: list[ChatMessage] = field(default_factory=list)
+    omitted: list[ChatMessage] = field(default_factory=list)
+    summary: Optional[str] = None
+    tokens: int = 0
+
+
+def window_history(
+    history: Sequence[ChatMessage],
+    *,
+    budget: int,
+    summary: Optional[str] = None,
+) -> HistoryWindow:
+    # The summary stands in for everything omitted, so it is paid for first.
+    used = estimate_tokens(summary) + _MESSAGE_OVERHEAD_TOKENS if summary else 0
+    start = len(history)
+    while start > 0:
+        tokens = message_tokens(history[start - 1])
+        # The newest message is always kept, even alone over budget.
+        if used + tokens > budget and start < len(history):
+            break
+        used += tokens
+        start -= 1
+    # Do not open the window with a reply whose question was cut off.
+    while start < len(history) - 1 and start > 0 and message_role(history[start]) == ChatRole.ASSISTANT.value:
+        used -= message_tokens(history[start])
+        start += 1
+    return HistoryWindow(
+        messages=list(history[start:]),
+        omitted=list(history[:start]),
+        summary=summary,
+        tokens=used,
+    )
+
+
+def build_message_history(
+    history: Sequence[ChatMessage],
+    summary: Optional[str] = None,
+) -> list[ai_messages.ModelMessage]:
     messages: list[ai_messages.ModelMessage] = []
+    if summary:
+        messages.append(
+            ai_messages.ModelRequest(
+                parts=[ai_messages.SystemPromptPart(content=f'以下是较早对话的摘要：\n{summary}')]
+            )
+        )
     for item in history:
-        role = item.role.value if hasattr(item.role, 'value') else item.role
+        role = message_role(item)
         if role == ChatRole.USER.value:
             messages.append(
                 ai_messages.ModelRequest(
@@ -49,7 +135,7 @@ def trim_latest_user_message(
     if not items:
         return items
     last = items[-1]
-    last_role = last.role.value if hasattr(last.role, 'value') else last.role
+    last_role = message_role(last)
     if last_role != ChatRole.USER.value:
         return items
     if last.content != latest_content:
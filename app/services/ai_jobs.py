@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from typing import Any, Optional
+
+from loguru import logger
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_engine
+from app.models.chat_message import ChatMessage
+from app.models.user import User
+from app.services.ai_post_turn import maybe_run_post_turn_analysis
+from app.services.ai_summary import fold_session_summary, pending_summary_tokens
+from app.services.ai_types import AiDeps
+from app.services.chat_service import get_message_async, list_messages_async, list_recent_messages_async
+from app.services.job_queue import enqueue_job_async, register_job_type
+from app.services.pagination import Cursor
+
+POST_TURN_JOB = 'ai.post_turn'
+SUMMARY_JOB = 'ai.summary'
+
+_HISTORY_LIMIT = 200
+
+
+async def _load_post_turn_context(
+    payload: dict[str, Any],
+) -> Optional[tuple[AiDeps, list[ChatMessage], ChatMessage]]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        user = await session.get(User, payload['user_id'])
+        assistant = await get_message_async(session, payload['message_id'])
+        if user is None or assistant is None:
+            return None
+        # Everything before the assistant reply, as the chat request saw it; usually still in the history cache.
+        recent = await list_recent_messages_async(session, payload['session_id'], settings.AI_HISTORY_MAX_MESSAGES)
+        ids = [message.id for message in recent]
+        index = ids.index(assistant.id) if assistant.id in ids else -1
+        # The slice is complete when it is long enough or the whole session was loaded.
+        if index >= _HISTORY_LIMIT or (index >= 0 and len(recent) < settings.AI_HISTORY_MAX_MESSAGES):
+            previous = recent[:index][-_HISTORY_LIMIT:]
+        else:
+            previous = await list_messages_async(
+                session,
+                payload['session_id'],
+                limit=_HISTORY_LIMIT,
+                cursor=Cursor(created_at=assistant.created_at, id=assistant.id),
+                descending=True,
+            )
+            previous.reverse()
+    deps = AiDeps(
+        user=user,
+        session_id=payload['session_id'],
+        model_id=payload['model_id'],
+        selected_skill_id=payload.get('selected_skill_id'),
+        skill_content_max_len=settings.SKILL_CONTENT_MAX_LEN,
+    )
+    return deps, previous, assistant
+
+
+async def run_post_turn_job(payload: dict[str, Any]) -> None:
+    context = await _load_post_turn_context(payload)
+    if context is None:
+        return
+    deps, history, assistant = context
+    await maybe_run_post_turn_analysis(
+        deps=deps,
+        prompt=payload['prompt'],
+        history=history,
+        assistant_message_id=assistant.id,
+        assistant_content=assistant.content,
+    )
+
+
+register_job_type(POST_TURN_JOB, run_post_turn_job)
+
+
+async def enqueue_post_turn_job(session: AsyncSession, deps: AiDeps, *, prompt: str, message_id: str) -> None:
+    payload = {
+        'user_id': deps.user.id,
+        'session_id': deps.session_id,
+        'model_id': deps.model_id,
+        'selected_skill_id': deps.selected_skill_id,
+        'message_id': message_id,
+        'prompt': prompt,
+    }
+    try:
+        await enqueue_job_async(session, POST_TURN_JOB, f'{deps.session_id}:{message_id}', payload)
+    except Exception:  # noqa: BLE001
+        logger.exception('ai.jobs.enqueue_failed', job_type=POST_TURN_JOB, message_id=message_id)
+
+
+async def run_summary_job(payload: dict[str, Any]) -> None:
+    covered_id = await fold_session_summary(payload['session_id'], payload['model_id'])
+    if covered_id is not None:
+        # A long backlog is folded one batch per job.
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            await enqueue_job_async(session, SUMMARY_JOB, f"{payload['session_id']}:after:{covered_id}", payload)
+
+
+register_job_type(SUMMARY_JOB, run_summary_job)
+
+
+async def maybe_enqueue_summary_job(
+    session: AsyncSession,
+    *,
+    session_id: str,
+    model_id: str,
+    pending: Sequence[ChatMessage],
+) -> None:
+    if not settings.AI_SUMMARY_ENABLED or not pending:
+        return
+    if pending_summary_tokens(pending) < settings.AI_SUMMARY_TRIGGER_TOKENS:
+        return
+    payload = {'session_id': session_id, 'model_id': model_id}
+    try:
+        await enqueue_job_async(session, SUMMARY_JOB, f'{session_id}:{pending[-1].id}', payload)
+    except Exception:  # noqa: BLE001
+        logger.exception('ai.jobs.enqueue_failed', job_type=SUMMARY_JOB, session_id=session_id)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Optional
+
+from loguru import logger
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_engine
+from app.services.chat_service import checkpoint_message_content_async
+
+
+async def _write_checkpoint(message_id: str, content: str) -> bool:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        return await checkpoint_message_content_async(session, message_id, content)
+
+
+class MessageCheckpointer:
+    """Accumulates a streaming reply and periodically saves the partial content to its message row."""
+
+    def __init__(self, message_id: str) -> None:
+        self.message_id = message_id
+        self.chunks: list[str] = []
+        self.checkpoints = 0
+        self._unsaved_chars = 0
+        self._saved_at = time.monotonic()
+        self._task: Optional[asyncio.Task[bool]] = None
+
+    @property
+    def content(self) -> str:
+        if len(self.chunks) > 1:
+            self.chunks[:] = [''.join(self.chunks)]
+        return self.chunks[0] if self.chunks else ''
+
+    def add(self, delta: str) -> None:
+        self.chunks.append(delta)
+        self._unsaved_chars += len(delta)
+        interval_ms = settings.AI_STREAM_CHECKPOINT_INTERVAL_MS
+        if interval_ms <= 0 or (self._task is not None and not self._task.done()):
+            return
+        due = (time.monotonic() - self._saved_at) * 1000 >= interval_ms
+        if not due and self._unsaved_chars < settings.AI_STREAM_CHECKPOINT_CHARS:
+            return
+        self._unsaved_chars = 0
+        self._saved_at = time.monotonic()
+        self.checkpoints += 1
+        # Written from its own task so a slow write never stalls the stream.
+        self._task = asyncio.create_task(_write_checkpoint(self.message_id, self.content))
+        self._task.add_done_callback(self._log_failure)
+
+    def _log_failure(self, task: asyncio.Task[bool]) -> None:
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.warning('ai.chat.checkpoint_failed', message_id=self.message_id, error=str(error))
+
+    async def drain(self) -> None:
+        if self._task is not None and not self._task.done():
+            await asyncio.wait([self._task])
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from loguru import logger
+from pydantic import BaseModel, ConfigDict
+from pydantic_ai import Agent
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_engine
+from app.models.chat_message import ChatMessage
+from app.services.ai_provider import build_openai_chat_model
+from app.services.ai_skill_draft_suggestion import (
+    SkillDraftSuggestionResult,
+    drafts_open,
+    resolve_draft,
+    store_draft,
+)
+from app.services.ai_skill_suggestion import (
+    SkillMatchResult,
+    build_skill_instruction,
+    build_skill_summaries,
+    prerank_candidates,
+    resolve_match,
+    store_match,
+    suggestions_open,
+    within_candidates,
+)
+from app.services.ai_suggestion_common import build_context_snippet, draft_eligible, passes_common_gates
+from app.services.ai_types import AiDeps
+from app.services.skill_summary_cache import SkillSummaries
+
+_SKIP_MATCH_INSTRUCTION = '本轮跳过 skill_match：matched=false，skill_id=null。'
+_SKIP_DRAFT_INSTRUCTION = '本轮跳过 skill_draft：should_suggest=false，goal=null。'
+
+
+class PostTurnAnalysis(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    skill_match: SkillMatchResult
+    skill_draft: SkillDraftSuggestionResult
+
+
+@dataclass
+class PostTurnOutcome:
+    match: SkillMatchResult | None = None
+    draft: SkillDraftSuggestionResult | None = None
+
+
+_post_turn_agent: Agent[AiDeps] | None = None
+
+
+def _get_post_turn_agent() -> Agent[AiDeps]:
+    global _post_turn_agent
+    if _post_turn_agent is not None:
+        return _post_turn_agent
+    _post_turn_agent = Agent(
+        model=None,
+        output_type=PostTurnAnalysis,
+        system_prompt=(
+            '你是对话后分析器，需要根据对话上下文一次完成两项判断。'
+            'skill_match：结合候选技能摘要判断是否应推荐已有技能。'
+            '仅在匹配度高且有明确用途时推荐，只能从候选技能 id 中选择，不能臆造。'
+            '若没有合适匹配，matched=false 且 skill_id=null；'
+            '当 matched=true 时，reason 给出一句简短中文理由（不超过20字）。'
+            'skill_draft：判断是否存在可复用的流程/方法/清单，值得沉淀成新技能。'
+            '若值得，should_suggest=true，并给出简短 goal（<=20字）'
+            '和关键约束（<=60字，可为空），reason 为一句话理由（<=20字）。'
+            '若不值得，should_suggest=false 且 goal=null。'
+        ),
+        defer_model_check=True,
+    )
+    return _post_turn_agent
+
+
+async def analyze_post_turn(
+    deps: AiDeps,
+    *,
+    prompt: str,
+    history: Sequence[ChatMessage],
+    assistant_content: str,
+    summaries: SkillSummaries | None,
+    want_draft: bool,
+) -> PostTurnOutcome:
+    want_match = bool(summaries)
+    if not want_match and not want_draft:
+        return PostTurnOutcome()
+    instructions: list[str] = []
+    candidates = None
+    if want_match:
+        candidates = prerank_candidates(prompt, history, summaries, settings.SKILL_MATCH_TOP_K)
+        instructions.append(build_skill_instruction(candidates))
+    else:
+        instructions.append(_SKIP_MATCH_INSTRUCTION)
+    if not want_draft:
+        instructions.append(_SKIP_DRAFT_INSTRUCTION)
+
+    model = build_openai_chat_model(deps.model_id)
+    agent = _get_post_turn_agent()
+    snippet = build_context_snippet(history, prompt, assistant_content)
+    try:
+        result = await agent.run(snippet, model=model, deps=deps, instructions=instructions)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning('ai.post_turn.failed', error=str(exc))
+        # Same as the split analysers: the match still gets its keyword fallback, the draft does not.
+        if not want_match:
+            return PostTurnOutcome()
+        match = resolve_match(None, prompt=prompt, history=history, summaries=summaries, session_id=deps.session_id)
+        return PostTurnOutcome(match=match)
+
+    outcome = PostTurnOutcome()
+    if want_match:
+        match = within_candidates(result.output.skill_match, candidates, deps.session_id)
+        outcome.match = resolve_match(
+            match,
+            prompt=prompt,
+            history=history,
+            summaries=summaries,
+            session_id=deps.session_id,
+        )
+    if want_draft:
+        outcome.draft = resolve_draft(result.output.skill_draft, prompt=prompt, assistant_content=assistant_content)
+    return outcome
+
+
+async def maybe_run_post_turn_analysis(
+    *,
+    deps: AiDeps,
+    prompt: str,
+    history: Sequence[ChatMessage],
+    assistant_message_id: str,
+    assistant_content: str,
+) -> None:
+    if not passes_common_gates(deps, prompt, assistant_content):
+        return
+    want_draft = draft_eligible(assistant_content)
+    summaries = await build_skill_summaries(deps.user.id)
+    if not summaries and not want_draft:
+        return
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        if summaries and not await suggestions_open(session, deps.session_id):
+            summaries = None
+        if want_draft and not await drafts_open(session, deps.session_id):
+            want_draft = False
+
+    started = time.perf_counter()
+    outcome = await analyze_post_turn(
+        deps,
+        prompt=prompt,
+        history=history,
+        assistant_content=assistant_content,
+        summaries=summaries,
+        want_draft=want_draft,
+    )
+    logger.info(
+        'ai.post_turn.analyzed',
+        session_id=deps.session_id,
+        want_match=bool(summaries),
+        want_draft=want_draft,
+        matched=outcome.match is not None,
+        drafted=outcome.draft is not None,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+    if outcome.match is not None:
+        await store_match(deps, outcome.match, assistant_message_id)
+    if outcome.draft is not None:
+        await store_draft(deps, outcome.draft, assistant_message_id)
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+import importlib.util
+import threading
+import time
+from dataclasses import dataclass, field
 
+import httpx
 from loguru import logger
 
+from app.core.config import settings
 from app.core.env import get_env_value
 from app.core.providers import get_provider_registry
 
@@ -12,7 +18,6 @@ try:
 except Exception:  # pragma: no cover - optional for tests
     AsyncOpenAI = None  # type: ignore[assignment]
 
-from pydantic_ai.models import cached_async_http_client
 from pydantic_ai.models.openai import OpenAIChatModel
 from pydantic_ai.providers import Provider
 
@@ -24,14 +29,102 @@ class ProviderInfo:
     api_key: str
 
 
+ClientSignature = tuple[str, str]
+
+# HTTP/2 needs the optional h2 package (httpx[http2]); fall back to HTTP/1.1 keep-alive without it.
+_HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+_RETIRED_CLIENT_GRACE_SECONDS = 600.0
+
+
+@dataclass
+class _PooledClient:
+    client: AsyncOpenAI
+    provider: OpenAICompatProvider
+    signature: ClientSignature
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class OpenAIClientPool:
+    def __init__(self) -> None:
+        # One client per provider name, so a rotated key or base URL replaces the entry rather than adding one.
+        self._clients: dict[str, _PooledClient] = {}
+        self._retired: list[tuple[float, AsyncOpenAI]] = []
+        self._lock = threading.Lock()
+
+    def get(self, name: str, base_url: str, api_key: str) -> _PooledClient:
+        signature = (base_url, api_key)
+        now = time.monotonic()
+        with self._lock:
+            pooled = self._clients.get(name)
+            if (
+                pooled is not None
+                and pooled.signature == signature
+                and now - pooled.created_at < settings.AI_CLIENT_TTL_SECONDS
+            ):
+                return pooled
+            if pooled is not None:
+                # Streams may still be reading from the old client, so close it only after a grace period.
+                self._retired.append((now, pooled.client))
+            client = _build_async_openai(base_url, api_key)
+            pooled = _PooledClient(
+                client=client,
+                provider=OpenAICompatProvider(name=name, base_url=base_url, api_key=api_key, client=client),
+                signature=signature,
+            )
+            self._clients[name] = pooled
+            expired = [
+                client for retired_at, client in self._retired if now - retired_at >= _RETIRED_CLIENT_GRACE_SECONDS
+            ]
+            self._retired = [item for item in self._retired if now - item[0] < _RETIRED_CLIENT_GRACE_SECONDS]
+        if expired:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is not None:
+                for client in expired:
+                    loop.create_task(client.close())
+        return pooled
+
+    async def aclose(self) -> None:
+        with self._lock:
+            clients = [pooled.client for pooled in self._clients.values()]
+            clients.extend(client for _, client in self._retired)
+            self._clients = {}
+            self._retired = []
+        for client in clients:
+            await client.close()
+
+
+def _build_async_openai(base_url: str, api_key: str) -> AsyncOpenAI:
+    if AsyncOpenAI is None:
+        raise RuntimeError('openai SDK is not installed')
+    http_client = httpx.AsyncClient(
+        http2=_HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(timeout=600, connect=5),
+        limits=httpx.Limits(
+            max_connections=settings.AI_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AI_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.AI_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+    return AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=http_client)
+
+
 class OpenAICompatProvider(Provider[AsyncOpenAI]):
-    def __init__(self, *, name: str, base_url: str, api_key: str | None) -> None:
+    def __init__(
+        self,
+        *,
+        name: str,
+        base_url: str,
+        api_key: str | None,
+        client: AsyncOpenAI | None = None,
+    ) -> None:
         if AsyncOpenAI is None:
             raise RuntimeError('openai SDK is not installed')
         if api_key is None:
             api_key = 'api-key-not-set'
-        http_client = cached_async_http_client(provider=name)
-        self._client = AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=http_client)
+        self._client = client or _build_async_openai(base_url, api_key)
         self._name = name
         self._base_url = base_url
 
@@ -57,8 +150,19 @@ def resolve_provider_info(model_id: str) -> ProviderInfo:
     return ProviderInfo(name=provider.host, base_url=provider.base_url, api_key=api_key)
 
 
+client_pool = OpenAIClientPool()
+
+
+def get_openai_client(name: str, base_url: str, api_key: str) -> AsyncOpenAI:
+    return client_pool.get(name, base_url, api_key).client
+
+
+async def close_openai_clients() -> None:
+    await client_pool.aclose()
+
+
 def build_openai_chat_model(model_id: str) -> OpenAIChatModel:
     info = resolve_provider_info(model_id)
     logger.debug('ai.provider.selected', provider=info.name, model=model_id)
-    provider = OpenAICompatProvider(name=info.name, base_url=info.base_url, api_key=info.api_key)
+    provider = client_pool.get(info.name, info.base_url, info.api_key).provider
     return OpenAIChatModel(model_id, provider=provider)
@@ -6,27 +6,20 @@ from collections.abc import Sequence
 from loguru import logger
 from pydantic import BaseModel, ConfigDict
 from pydantic_ai import Agent
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db.session import engine
+from app.db.session import async_engine
 from app.models.chat_message import ChatMessage
-from app.models.enums import ChatRole, SkillSuggestionStatus
+from app.models.enums import SkillSuggestionStatus
 from app.services.ai_provider import build_openai_chat_model
+from app.services.ai_suggestion_common import build_context_snippet, draft_eligible, passes_common_gates
 from app.services.ai_types import AiDeps
 from app.services.skill_draft_suggestion_service import (
-    create_skill_draft_suggestion,
-    has_draft_rejection,
-    list_skill_draft_suggestions,
+    create_skill_draft_suggestion_async,
+    has_draft_rejection_async,
+    list_skill_draft_suggestions_async,
 )
 
-_CLARIFY_MARKER = '<!-- Clarification chain -->'
-_CLARIFY_RESPONSE_KEY = 'clarify_chain_response'
-
-_SKILL_INTENT_PATTERN = re.compile(
-    r'(技能|skill|skill_id|read_skill|generate_skill|create_skill|'
-    r'生成技能|创建技能|保存技能|总结成技能|沉淀技能|技能库|技能模板)',
-    re.IGNORECASE,
-)
 _FALLBACK_FLOW_PATTERN = re.compile(r'(步骤|流程|清单|计划|方案|第[一二三四五六七八九十]|\\n\\d+\\.|\\n\\d+、)')
 
 
@@ -60,22 +53,6 @@ def _get_skill_draft_agent() -> Agent[AiDeps]:
     return _skill_draft_agent
 
 
-def _role_value(role) -> str:
-    return role.value if hasattr(role, 'value') else str(role)
-
-
-def _contains_clarify_chain(text: str) -> bool:
-    return _CLARIFY_MARKER.lower() in text.lower()
-
-
-def _is_clarify_response(text: str) -> bool:
-    return _CLARIFY_RESPONSE_KEY in text
-
-
-def _looks_like_skill_intent(text: str) -> bool:
-    return bool(_SKILL_INTENT_PATTERN.search(text))
-
-
 def _fallback_goal(prompt: str) -> str:
     stripped = prompt.strip()
     if not stripped:
@@ -101,85 +78,57 @@ def _fallback_suggestion(prompt: str, assistant_content: str) -> SkillDraftSugge
     )
 
 
-def _build_context_snippet(
-    history: Sequence[ChatMessage],
+async def drafts_open(session: AsyncSession, session_id: str) -> bool:
+    if await has_draft_rejection_async(session, session_id):
+        return False
+    pending = await list_skill_draft_suggestions_async(
+        session,
+        session_id,
+        status=SkillSuggestionStatus.PENDING,
+    )
+    return not pending
+
+
+def resolve_draft(
+    payload: SkillDraftSuggestionResult | None,
+    *,
     prompt: str,
     assistant_content: str,
-    limit: int = 6,
-) -> str:
-    lines = ['对话摘要：']
-    recent = list(history)[-limit:] if history else []
-    for item in recent:
-        role = _role_value(item.role)
-        if role == ChatRole.USER.value:
-            speaker = '用户'
-        elif role == ChatRole.ASSISTANT.value:
-            speaker = '助手'
-        else:
-            speaker = '系统'
-        content = item.content.strip()
-        if content:
-            lines.append(f'{speaker}: {content}')
-    if prompt.strip():
-        lines.append(f'当前用户输入: {prompt.strip()}')
-    if assistant_content.strip():
-        lines.append(f'最新助手回复: {assistant_content.strip()}')
-    return '\n'.join(lines).strip()
+) -> SkillDraftSuggestionResult | None:
+    if not payload or not payload.should_suggest or not payload.goal:
+        payload = _fallback_suggestion(prompt, assistant_content)
+    if not payload or not payload.should_suggest or not payload.goal:
+        return None
+    if not payload.goal.strip():
+        return None
+    return payload
 
 
-async def maybe_create_skill_draft_suggestion(
-    *,
+async def suggest_draft(
     deps: AiDeps,
+    *,
     prompt: str,
     history: Sequence[ChatMessage],
-    assistant_message_id: str,
     assistant_content: str,
-) -> None:
-    if deps.selected_skill_id:
-        return
-    if not prompt.strip():
-        return
-    if not assistant_content.strip():
-        return
-    if _contains_clarify_chain(assistant_content):
-        return
-    if _is_clarify_response(prompt):
-        return
-    if _looks_like_skill_intent(prompt) or _looks_like_skill_intent(assistant_content):
-        return
-    if len(assistant_content.strip()) < 120:
-        return
-
-    with Session(engine) as session:
-        if has_draft_rejection(session, deps.session_id):
-            return
-        pending = list_skill_draft_suggestions(session, deps.session_id, status=SkillSuggestionStatus.PENDING)
-        if pending:
-            return
-
+) -> SkillDraftSuggestionResult | None:
     model = build_openai_chat_model(deps.model_id)
     agent = _get_skill_draft_agent()
-    snippet = _build_context_snippet(history, prompt, assistant_content)
+    snippet = build_context_snippet(history, prompt, assistant_content)
     try:
         result = await agent.run(snippet, model=model, deps=deps)
     except Exception as exc:  # noqa: BLE001
         logger.warning('ai.skill_draft.match_failed', error=str(exc))
-        return
+        return None
+    return resolve_draft(result.output, prompt=prompt, assistant_content=assistant_content)
 
-    payload = result.output
-    if not payload.should_suggest or not payload.goal:
-        payload = _fallback_suggestion(prompt, assistant_content)
-    if not payload or not payload.should_suggest or not payload.goal:
-        return
 
+async def store_draft(deps: AiDeps, payload: SkillDraftSuggestionResult, assistant_message_id: str) -> None:
     goal = payload.goal.strip()
-    if not goal:
-        return
     constraints = payload.constraints.strip() if payload.constraints else None
     reason = payload.reason.strip() if payload.reason else None
 
-    with Session(engine) as session:
-        record = create_skill_draft_suggestion(
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        record = await create_skill_draft_suggestion_async(
             session,
             deps.session_id,
             assistant_message_id,
@@ -193,3 +142,26 @@ async def maybe_create_skill_draft_suggestion(
             user_id=deps.user.id,
             suggestion_id=record.id,
         )
+
+
+async def maybe_create_skill_draft_suggestion(
+    *,
+    deps: AiDeps,
+    prompt: str,
+    history: Sequence[ChatMessage],
+    assistant_message_id: str,
+    assistant_content: str,
+) -> None:
+    if not passes_common_gates(deps, prompt, assistant_content):
+        return
+    if not draft_eligible(assistant_content):
+        return
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        if not await drafts_open(session, deps.session_id):
+            return
+
+    payload = await suggest_draft(deps, prompt=prompt, history=history, assistant_content=assistant_content)
+    if payload is None:
+        return
+    await store_draft(deps, payload, assistant_message_id)
@@ -1,31 +1,26 @@
 from __future__ import annotations
 
-import json
 import re
+import time
 from collections.abc import Sequence
 
 from loguru import logger
 from pydantic import BaseModel, ConfigDict
 from pydantic_ai import Agent
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db.session import engine
+from app.core.config import settings
+from app.db.session import async_engine
 from app.models.chat_message import ChatMessage
 from app.models.enums import ChatRole, SkillSuggestionStatus, SkillVisibility
 from app.models.skill import Skill
 from app.services.ai_provider import build_openai_chat_model
+from app.services.ai_suggestion_common import build_context_snippet, passes_common_gates, role_value
 from app.services.ai_types import AiDeps
-from app.services.chat_service import create_suggestion, has_rejection, list_suggestions
+from app.services.chat_service import create_suggestion_async, has_rejection_async, list_suggestions_async
 from app.services.skill_service import skill_tags_to_list
-
-_CLARIFY_MARKER = '<!-- Clarification chain -->'
-_CLARIFY_RESPONSE_KEY = 'clarify_chain_response'
-
-_SKILL_INTENT_PATTERN = re.compile(
-    r'(技能|skill|skill_id|read_skill|generate_skill|create_skill|'
-    r'生成技能|创建技能|保存技能|总结成技能|沉淀技能|技能库|技能模板)',
-    re.IGNORECASE,
-)
+from app.services.skill_summary_cache import SkillSummaries, build_summaries, skill_summary_cache
 
 _KEYWORD_RULES: list[dict] = [
     {
@@ -79,69 +74,43 @@ def _get_skill_match_agent() -> Agent[AiDeps]:
     return _skill_match_agent
 
 
-def _build_skill_summaries(user_id: str) -> list[dict]:
-    with Session(engine) as session:
-        statement = select(Skill).where(Skill.deleted.is_(False))
-        statement = statement.where(
-            (Skill.owner_id == user_id) | (Skill.visibility == SkillVisibility.PUBLIC)
-        )
-        skills = list(session.exec(statement).all())
-    summaries: list[dict] = []
-    seen: set[str] = set()
-    for skill in skills:
-        if skill.id in seen:
-            continue
-        seen.add(skill.id)
-        summaries.append(
-            {
-                'id': skill.id,
-                'name': skill.name,
-                'description': skill.description,
-                'tags': skill_tags_to_list(skill),
-                'visibility': skill.visibility.value if hasattr(skill.visibility, 'value') else skill.visibility,
-            }
+def _to_summary(skill: Skill) -> dict:
+    return {
+        'id': skill.id,
+        'name': skill.name,
+        'description': skill.description,
+        'tags': skill_tags_to_list(skill),
+        'visibility': skill.visibility.value if hasattr(skill.visibility, 'value') else skill.visibility,
+    }
+
+
+async def build_skill_summaries(user_id: str) -> SkillSummaries:
+    cached = skill_summary_cache.get(user_id)
+    if cached is not None:
+        return cached
+    version = skill_summary_cache.public_version
+    public = skill_summary_cache.get_public()
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        if public is None:
+            result = await session.exec(
+                select(Skill)
+                .where(Skill.deleted.is_(False))
+                .where(Skill.visibility == SkillVisibility.PUBLIC)
+            )
+            public = build_summaries([_to_summary(skill) for skill in result.all()])
+            skill_summary_cache.store_public(public, version)
+        result = await session.exec(
+            select(Skill)
+            .where(Skill.deleted.is_(False))
+            .where(Skill.owner_id == user_id)
+            .where(Skill.visibility != SkillVisibility.PUBLIC)
         )
-    return summaries
-
-
-def _build_context_snippet(history: Sequence[ChatMessage], prompt: str, limit: int = 6) -> str:
-    lines = ['对话摘要：']
-    recent = list(history)[-limit:] if history else []
-    for item in recent:
-        role = item.role.value if hasattr(item.role, 'value') else str(item.role)
-        if role == ChatRole.USER.value:
-            speaker = '用户'
-        elif role == ChatRole.ASSISTANT.value:
-            speaker = '助手'
-        else:
-            speaker = '系统'
-        content = item.content.strip()
-        if content:
-            lines.append(f'{speaker}: {content}')
-    if prompt.strip():
-        lines.append(f'当前用户输入: {prompt.strip()}')
-    return '\n'.join(lines).strip()
-
-
-def _build_skill_instruction(summaries: list[dict]) -> str:
-    payload = json.dumps(summaries, ensure_ascii=False)
-    return f'候选技能摘要（仅可从这些技能中选择）：\n{payload}'
-
+        private = build_summaries([_to_summary(skill) for skill in result.all()])
+    return skill_summary_cache.store_user(user_id, private, public, version)
 
-def _contains_clarify_chain(text: str) -> bool:
-    return _CLARIFY_MARKER.lower() in text.lower()
 
-
-def _is_clarify_response(text: str) -> bool:
-    return _CLARIFY_RESPONSE_KEY in text
-
-
-def _looks_like_skill_intent(text: str) -> bool:
-    return bool(_SKILL_INTENT_PATTERN.search(text))
-
-
-def _role_value(role) -> str:
-    return role.value if hasattr(role, 'value') else str(role)
+def build_skill_instruction(summaries: SkillSummaries) -> str:
+    return f'候选技能摘要（仅可从这些技能中选择）：\n{summaries.payload}'
 
 
 def _normalize_text(text: str) -> tuple[str, str]:
@@ -168,11 +137,15 @@ def _find_skill_by_hints(
     return None
 
 
-def _fallback_match(prompt: str, history: Sequence[ChatMessage], summaries: list[dict]) -> SkillMatchResult | None:
+def _match_text(prompt: str, history: Sequence[ChatMessage]) -> str:
     recent_user = ' '.join(
-        item.content for item in history if _role_value(item.role) == ChatRole.USER.value
+        item.content for item in history if role_value(item.role) == ChatRole.USER.value
     )
-    text = f"{prompt} {recent_user}".strip()
+    return f"{prompt} {recent_user}".strip()
+
+
+def _fallback_match(prompt: str, history: Sequence[ChatMessage], summaries: list[dict]) -> SkillMatchResult | None:
+    text = _match_text(prompt, history)
     if not text:
         return None
     lowered, compact = _normalize_text(text)
@@ -211,69 +184,101 @@ def _fallback_match(prompt: str, history: Sequence[ChatMessage], summaries: list
     return None
 
 
-async def _match_skill(
+def prerank_candidates(
+    prompt: str,
+    history: Sequence[ChatMessage],
+    summaries: SkillSummaries,
+    top_k: int,
+) -> SkillSummaries:
+    if top_k <= 0 or len(summaries.items) <= top_k:
+        return summaries
+    started = time.perf_counter()
+    ranked = summaries.index.search(_match_text(prompt, history), limit=top_k)
+    # A keyword-rule hit is what the fallback would pick anyway, so never rank it out.
+    rule_match = _fallback_match(prompt, history, summaries.items)
+    rule_id = rule_match.skill_id if rule_match else None
+    if rule_id and rule_id not in ranked:
+        ranked = [rule_id, *ranked[: top_k - 1]]
+    selected = set(ranked)
+    scored = len(selected)
+    # Pad with catalogue order so the matcher still sees K skills when few share terms with the chat.
+    for item in summaries.items:
+        if len(selected) >= top_k:
+            break
+        selected.add(item['id'])
+    candidates = build_summaries([item for item in summaries.items if item['id'] in selected])
+    logger.info(
+        'ai.skill.prerank',
+        total=len(summaries.items),
+        top_k=top_k,
+        scored=scored,
+        rule_hit=rule_id is not None,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+    return candidates
+
+
+async def match_skill(
     deps: AiDeps,
     *,
     prompt: str,
     history: Sequence[ChatMessage],
-    summaries: list[dict],
+    summaries: SkillSummaries,
 ) -> SkillMatchResult | None:
     if not summaries:
         return None
+    candidates = prerank_candidates(prompt, history, summaries, settings.SKILL_MATCH_TOP_K)
     model = build_openai_chat_model(deps.model_id)
     agent = _get_skill_match_agent()
-    instruction = _build_skill_instruction(summaries)
-    snippet = _build_context_snippet(history, prompt)
+    instruction = build_skill_instruction(candidates)
+    snippet = build_context_snippet(history, prompt)
     try:
         result = await agent.run(snippet, model=model, deps=deps, instructions=[instruction])
     except Exception as exc:  # noqa: BLE001
         logger.warning('ai.skill.match_failed', error=str(exc))
         return None
-    return result.output
+    return within_candidates(result.output, candidates, deps.session_id)
 
 
-async def maybe_create_skill_suggestion(
-    *,
-    deps: AiDeps,
-    prompt: str,
-    history: Sequence[ChatMessage],
-    assistant_message_id: str,
-    assistant_content: str,
-) -> None:
-    if deps.selected_skill_id:
-        return
-    if not prompt.strip():
-        return
-    if _contains_clarify_chain(assistant_content):
-        return
-    if _is_clarify_response(prompt):
-        return
-    if _looks_like_skill_intent(prompt):
-        return
+def within_candidates(
+    match: SkillMatchResult | None,
+    candidates: SkillSummaries,
+    session_id: str,
+) -> SkillMatchResult | None:
+    if match and match.matched and match.skill_id and match.skill_id not in candidates.ids:
+        logger.warning('ai.skill.match_outside_candidates', skill_id=match.skill_id, session_id=session_id)
+        return None
+    return match
 
-    summaries = _build_skill_summaries(deps.user.id)
-    if not summaries:
-        return
-    candidate_ids = {item['id'] for item in summaries}
 
-    with Session(engine) as session:
-        if has_rejection(session, deps.session_id):
-            return
-        pending = list_suggestions(session, deps.session_id, status=SkillSuggestionStatus.PENDING)
-        if pending:
-            return
+async def suggestions_open(session: AsyncSession, session_id: str) -> bool:
+    if await has_rejection_async(session, session_id):
+        return False
+    pending = await list_suggestions_async(session, session_id, status=SkillSuggestionStatus.PENDING)
+    return not pending
 
-    match = await _match_skill(deps, prompt=prompt, history=history, summaries=summaries)
+
+def resolve_match(
+    match: SkillMatchResult | None,
+    *,
+    prompt: str,
+    history: Sequence[ChatMessage],
+    summaries: SkillSummaries,
+    session_id: str,
+) -> SkillMatchResult | None:
     if not match or not match.matched or not match.skill_id:
-        match = _fallback_match(prompt, history, summaries)
+        match = _fallback_match(prompt, history, summaries.items)
     if not match or not match.matched or not match.skill_id:
-        return
-    if match.skill_id not in candidate_ids:
-        logger.warning('ai.skill.match_invalid', skill_id=match.skill_id, session_id=deps.session_id)
-        return
+        return None
+    if match.skill_id not in summaries.ids:
+        logger.warning('ai.skill.match_invalid', skill_id=match.skill_id, session_id=session_id)
+        return None
+    return match
 
-    with Session(engine) as session:
-        record = create_suggestion(
+
+async def store_match(deps: AiDeps, match: SkillMatchResult, assistant_message_id: str) -> None:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        record = await create_suggestion_async(
             session,
             deps.session_id,
             match.skill_id,
@@ -286,3 +291,29 @@ async def maybe_create_skill_suggestion(
             user_id=deps.user.id,
             skill_id=record.skill_id,
         )
+
+
+async def maybe_create_skill_suggestion(
+    *,
+    deps: AiDeps,
+    prompt: str,
+    history: Sequence[ChatMessage],
+    assistant_message_id: str,
+    assistant_content: str,
+) -> None:
+    if not passes_common_gates(deps, prompt, assistant_content):
+        return
+
+    summaries = await build_skill_summaries(deps.user.id)
+    if not summaries:
+        return
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        if not await suggestions_open(session, deps.session_id):
+            return
+
+    match = await match_skill(deps, prompt=prompt, history=history, summaries=summaries)
+    match = resolve_match(match, prompt=prompt, history=history, summaries=summaries, session_id=deps.session_id)
+    if match is None:
+        return
+    await store_match(deps, match, assistant_message_id)
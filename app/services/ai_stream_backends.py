@@ -0,0 +1,498 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Optional, Protocol
+
+from loguru import logger
+
+from app.core.config import settings
+
+StreamPayload = dict[str, Any]
+StreamQueue = asyncio.Queue[Optional[StreamPayload]]
+
+# Snapshots travel as a single line, so allow long replies.
+BROKER_LINE_LIMIT = 16 * 1024 * 1024
+_RECONNECT_SECONDS = 5.0
+
+
+class StreamOverflowPolicy(str, Enum):
+    # Replace everything queued with one snapshot frame of the reply so far.
+    RESNAPSHOT = 'resnapshot'
+    # Merge queued deltas into fewer frames; falls back to a snapshot if that is not enough.
+    COALESCE = 'coalesce'
+    # End the subscriber's stream; the client reconnects with Last-Event-ID.
+    DISCONNECT = 'disconnect'
+
+
+@dataclass
+class SubscriberQueueStats:
+    dropped_frames: int = 0
+    coalesced_frames: int = 0
+    resnapshots: int = 0
+    disconnects: int = 0
+
+
+queue_stats = SubscriberQueueStats()
+
+
+class SubscriberQueue(asyncio.Queue[Optional[StreamPayload]]):
+    """Frames waiting for one subscriber. The limit is enforced by the channel so the end marker always fits."""
+
+    def __init__(self, limit: int, policy: StreamOverflowPolicy) -> None:
+        super().__init__()
+        self.limit = limit
+        self.policy = policy
+        self.dropped = 0
+
+    def over_limit(self) -> bool:
+        return 0 < self.limit <= self.qsize()
+
+    def drain(self) -> list[Optional[StreamPayload]]:
+        items = []
+        while not self.empty():
+            items.append(self.get_nowait())
+        return items
+
+    def coalesce(self, payload: StreamPayload) -> bool:
+        queued = self.drain()
+        merged: list[StreamPayload] = []
+        for item in [*queued, payload]:
+            if merged and item['type'] == 'delta' and merged[-1]['type'] == 'delta':
+                merged[-1] = {**merged[-1], 'content': merged[-1]['content'] + item['content'], 'seq': item['seq']}
+            else:
+                merged.append(item)
+        kept = merged if len(merged) <= self.limit else queued
+        for item in kept:
+            self.put_nowait(item)
+        if kept is queued:
+            return False
+        queue_stats.coalesced_frames += len(queued) + 1 - len(merged)
+        return True
+
+
+def format_event_id(message_id: str, seq: int) -> str:
+    return f'{message_id}:{seq}'
+
+
+def parse_event_id(value: Optional[str]) -> Optional[tuple[str, int]]:
+    if not value:
+        return None
+    message_id, _, seq = value.rpartition(':')
+    if not message_id or not seq.isdigit():
+        return None
+    return message_id, int(seq)
+
+
+@dataclass
+class StreamSubscription:
+    session_id: str
+    message_id: str
+    queue: StreamQueue
+    # Sequence number the snapshot is current to.
+    seq: int = 0
+    # True when missed frames were replayed into the queue and no snapshot is needed.
+    resumed: bool = False
+
+
+def _replay_buffer() -> deque[StreamPayload]:
+    return deque(maxlen=settings.AI_STREAM_REPLAY_FRAMES)
+
+
+@dataclass
+class StreamChannel:
+    message_id: str
+    chunks: list[str] = field(default_factory=list)
+    subscribers: set[SubscriberQueue] = field(default_factory=set)
+    done: bool = False
+    mirror: bool = False
+    seq: int = 0
+    recent: deque[StreamPayload] = field(default_factory=_replay_buffer)
+    # Watchers on other workers, as last reported by the broker.
+    remote_subscribers: int = 0
+
+    @property
+    def content(self) -> str:
+        # Join lazily and keep the result, so repeated snapshots only pay for what arrived since.
+        if len(self.chunks) > 1:
+            self.chunks[:] = [''.join(self.chunks)]
+        return self.chunks[0] if self.chunks else ''
+
+    def apply(self, payload: Optional[StreamPayload]) -> None:
+        if payload is None:
+            self.done = True
+            for queue in self.subscribers:
+                queue.put_nowait(None)
+            self.subscribers.clear()
+            return
+        # Producers number frames; mirrors and the broker keep the producer's numbers.
+        payload.setdefault('seq', self.seq + 1)
+        self.seq = payload['seq']
+        self.recent.append(payload)
+        if payload.get('type') == 'delta':
+            self.chunks.append(payload['content'])
+        overflowed = [queue for queue in self.subscribers if not self._deliver(queue, payload)]
+        for queue in overflowed:
+            self.subscribers.discard(queue)
+
+    def _deliver(self, queue: SubscriberQueue, payload: StreamPayload) -> bool:
+        if not queue.over_limit():
+            queue.put_nowait(payload)
+            return True
+        if queue.policy is StreamOverflowPolicy.COALESCE and queue.coalesce(payload):
+            return True
+        if queue.policy is StreamOverflowPolicy.DISCONNECT:
+            dropped = len(queue.drain()) + 1
+            queue.put_nowait(None)
+            queue_stats.disconnects += 1
+        else:
+            # Everything queued, and this frame if it is a delta, is already part of the content.
+            dropped = len(queue.drain())
+            delta = payload['type'] == 'delta'
+            queue.put_nowait(
+                {
+                    'type': 'snapshot',
+                    'message_id': self.message_id,
+                    'content': self.content,
+                    'seq': self.seq if delta else self.seq - 1,
+                }
+            )
+            if delta:
+                dropped += 1
+            else:
+                queue.put_nowait(payload)
+            queue_stats.resnapshots += 1
+        queue.dropped += dropped
+        queue_stats.dropped_frames += dropped
+        logger.info(
+            'ai.stream.subscriber_overflow',
+            message_id=self.message_id,
+            policy=queue.policy.value,
+            dropped=dropped,
+            total_dropped=queue.dropped,
+        )
+        return queue.policy is not StreamOverflowPolicy.DISCONNECT
+
+    def replay_after(self, last_event_id: Optional[str]) -> Optional[list[StreamPayload]]:
+        parsed = parse_event_id(last_event_id)
+        if parsed is None or parsed[0] != self.message_id or parsed[1] > self.seq:
+            return None
+        seq = parsed[1]
+        if seq == self.seq:
+            return []
+        if not self.recent or self.recent[0]['seq'] > seq + 1:
+            return None
+        return [payload for payload in self.recent if payload['seq'] > seq]
+
+
+class StreamBackend(Protocol):
+    async def open(self, session_id: str, message_id: str) -> None: ...
+
+    def publish(self, session_id: str, payload: Optional[StreamPayload]) -> None: ...
+
+    async def snapshot(self, session_id: str) -> Optional[tuple[str, str]]: ...
+
+    async def subscribe(
+        self,
+        session_id: str,
+        last_event_id: Optional[str] = None,
+        policy: Optional[StreamOverflowPolicy] = None,
+    ) -> Optional[tuple[StreamSubscription, str]]: ...
+
+    async def unsubscribe(self, subscription: StreamSubscription) -> None: ...
+
+    def subscriber_count(self, session_id: str) -> int: ...
+
+    def queue_depths(self) -> list[int]: ...
+
+    async def aclose(self) -> None: ...
+
+
+class MemoryStreamBackend:
+    def __init__(self) -> None:
+        self._channels: dict[str, StreamChannel] = {}
+
+    async def open(self, session_id: str, message_id: str) -> None:
+        self._open(session_id, message_id)
+
+    def _open(self, session_id: str, message_id: str, *, mirror: bool = False) -> StreamChannel:
+        previous = self._channels.get(session_id)
+        if previous is not None and not previous.done:
+            previous.apply(None)
+        channel = StreamChannel(message_id=message_id, mirror=mirror)
+        self._channels[session_id] = channel
+        return channel
+
+    def publish(self, session_id: str, payload: Optional[StreamPayload]) -> None:
+        channel = self._channels.get(session_id)
+        if channel is None or channel.done:
+            return
+        channel.apply(payload)
+        if channel.done:
+            self._channels.pop(session_id, None)
+
+    def channel(self, session_id: str) -> Optional[StreamChannel]:
+        channel = self._channels.get(session_id)
+        if channel is None or channel.done:
+            return None
+        return channel
+
+    async def snapshot(self, session_id: str) -> Optional[tuple[str, str]]:
+        channel = self.channel(session_id)
+        if channel is None:
+            return None
+        return channel.message_id, channel.content
+
+    async def subscribe(
+        self,
+        session_id: str,
+        last_event_id: Optional[str] = None,
+        policy: Optional[StreamOverflowPolicy] = None,
+    ) -> Optional[tuple[StreamSubscription, str]]:
+        channel = self.channel(session_id)
+        if channel is None:
+            return None
+        return self._attach(session_id, channel, last_event_id, policy)
+
+    def _attach(
+        self,
+        session_id: str,
+        channel: StreamChannel,
+        last_event_id: Optional[str],
+        policy: Optional[StreamOverflowPolicy],
+    ) -> tuple[StreamSubscription, str]:
+        queue = SubscriberQueue(
+            settings.AI_STREAM_SUBSCRIBER_QUEUE_SIZE,
+            policy or StreamOverflowPolicy(settings.AI_STREAM_OVERFLOW_POLICY),
+        )
+        subscription = StreamSubscription(
+            session_id=session_id,
+            message_id=channel.message_id,
+            queue=queue,
+            seq=channel.seq,
+        )
+        replay = channel.replay_after(last_event_id)
+        if replay is not None:
+            for payload in replay:
+                queue.put_nowait(payload)
+            subscription.resumed = True
+        channel.subscribers.add(queue)
+        return subscription, ('' if subscription.resumed else channel.content)
+
+    async def unsubscribe(self, subscription: StreamSubscription) -> None:
+        channel = self._channels.get(subscription.session_id)
+        if channel is not None:
+            channel.subscribers.discard(subscription.queue)
+
+    def subscriber_count(self, session_id: str) -> int:
+        channel = self.channel(session_id)
+        if channel is None:
+            return 0
+        return len(channel.subscribers) + channel.remote_subscribers
+
+    def queue_depths(self) -> list[int]:
+        return [queue.qsize() for channel in self._channels.values() for queue in channel.subscribers]
+
+    async def aclose(self) -> None:
+        for session_id in list(self._channels):
+            self.publish(session_id, None)
+
+
+class BrokerStreamBackend(MemoryStreamBackend):
+    """Streams produced here are served locally and mirrored to a shared broker for other workers."""
+
+    def __init__(self, url: str) -> None:
+        super().__init__()
+        self._url = url
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task[None]] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._retry_at = 0.0
+        self._pending: dict[str, asyncio.Future[Optional[dict[str, Any]]]] = {}
+
+    async def _connect(self) -> bool:
+        if self._writer is not None and not self._writer.is_closing():
+            return True
+        if time.monotonic() < self._retry_at:
+            return False
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is not None and not self._writer.is_closing():
+                return True
+            try:
+                self._reader, self._writer = await open_broker_connection(self._url)
+            except OSError as exc:
+                self._retry_at = time.monotonic() + _RECONNECT_SECONDS
+                logger.warning('ai.stream.broker.unavailable', url=self._url, error=str(exc))
+                return False
+            if settings.AI_STREAM_BROKER_TOKEN:
+                self._send({'op': 'hello', 'token': settings.AI_STREAM_BROKER_TOKEN})
+            self._read_task = asyncio.create_task(self._read_loop(self._reader))
+            return True
+
+    def _send(self, message: dict[str, Any]) -> bool:
+        writer = self._writer
+        if writer is None:
+            return False
+        return write_broker_message(writer, message)
+
+    async def open(self, session_id: str, message_id: str) -> None:
+        self._open(session_id, message_id)
+        if await self._connect():
+            self._send({'op': 'open', 'session_id': session_id, 'message_id': message_id})
+
+    def publish(self, session_id: str, payload: Optional[StreamPayload]) -> None:
+        channel = self._channels.get(session_id)
+        if channel is None or channel.done or channel.mirror:
+            return
+        super().publish(session_id, payload)
+        self._send({'op': 'publish', 'session_id': session_id, 'payload': payload})
+
+    async def snapshot(self, session_id: str) -> Optional[tuple[str, str]]:
+        local = await super().snapshot(session_id)
+        if local is not None:
+            return local
+        reply = await self._request({'op': 'snapshot', 'session_id': session_id})
+        if not reply:
+            return None
+        return reply['message_id'], reply['content']
+
+    async def subscribe(
+        self,
+        session_id: str,
+        last_event_id: Optional[str] = None,
+        policy: Optional[StreamOverflowPolicy] = None,
+    ) -> Optional[tuple[StreamSubscription, str]]:
+        channel = self.channel(session_id)
+        if channel is None:
+            await self._request({'op': 'subscribe', 'session_id': session_id})
+            # The reader installs the mirror before handling later frames, so none are missed.
+            channel = self.channel(session_id)
+        if channel is None:
+            return None
+        return self._attach(session_id, channel, last_event_id, policy)
+
+    async def unsubscribe(self, subscription: StreamSubscription) -> None:
+        await super().unsubscribe(subscription)
+        channel = self._channels.get(subscription.session_id)
+        if channel is not None and channel.mirror and not channel.subscribers:
+            self._channels.pop(subscription.session_id, None)
+            self._send({'op': 'unsubscribe', 'session_id': subscription.session_id})
+
+    async def _request(self, message: dict[str, Any]) -> Optional[dict[str, Any]]:
+        if not await self._connect():
+            return None
+        key = f"{message['op']}:{message['session_id']}"
+        future = self._pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            if not self._send(message):
+                self._pending.pop(key, None)
+                return None
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self._pending.get(key) is future and future.done():
+                self._pending.pop(key, None)
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._dispatch(json.loads(line))
+        except (OSError, ValueError) as exc:
+            logger.warning('ai.stream.broker.read_failed', error=str(exc))
+        finally:
+            self._disconnected()
+
+    def _dispatch(self, message: dict[str, Any]) -> None:
+        op = message.get('op')
+        session_id = message.get('session_id', '')
+        if op == 'frame':
+            channel = self._channels.get(session_id)
+            if channel is not None and channel.mirror:
+                super().publish(session_id, message.get('payload'))
+            return
+        if op == 'watchers':
+            channel = self._channels.get(session_id)
+            if channel is not None and not channel.mirror:
+                channel.remote_subscribers = message.get('count', 0)
+            return
+        request = message.get('request')
+        if request == 'subscribe' and op == 'snapshot' and self.channel(session_id) is None:
+            channel = self._open(session_id, message['message_id'], mirror=True)
+            if message['content']:
+                channel.chunks.append(message['content'])
+            channel.seq = message.get('seq', 0)
+            channel.recent.extend(message.get('recent', []))
+        future = self._pending.pop(f'{request}:{session_id}', None)
+        if future is not None and not future.done():
+            future.set_result(message if op == 'snapshot' else None)
+
+    def _disconnected(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result(None)
+        self._pending.clear()
+        # Mirrors can no longer receive frames; end them so watchers reconnect.
+        for session_id, channel in list(self._channels.items()):
+            channel.remote_subscribers = 0
+            if channel.mirror:
+                super().publish(session_id, None)
+
+    async def aclose(self) -> None:
+        await super().aclose()
+        if self._read_task is not None:
+            self._read_task.cancel()
+            try:
+                await self._read_task
+            except asyncio.CancelledError:
+                pass
+            self._read_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def write_broker_message(writer: asyncio.StreamWriter, message: dict[str, Any]) -> bool:
+    if writer.is_closing():
+        return False
+    # A peer that stopped reading would otherwise grow the transport buffer without bound; drop it and
+    # let both sides fall back to their reconnect and resubscribe paths.
+    buffered = writer.transport.get_write_buffer_size()
+    if buffered > settings.AI_STREAM_BROKER_MAX_BUFFER_BYTES:
+        logger.warning('ai.stream.broker.slow_peer', buffered=buffered)
+        writer.transport.abort()
+        return False
+    writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+    return True
+
+
+async def open_broker_connection(url: str) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    if url.startswith('unix://'):
+        return await asyncio.open_unix_connection(url[len('unix://'):], limit=BROKER_LINE_LIMIT)
+    if url.startswith('tcp://'):
+        host, _, port = url[len('tcp://'):].rpartition(':')
+        return await asyncio.open_connection(host, int(port), limit=BROKER_LINE_LIMIT)
+    raise ValueError(f'Unsupported stream broker url: {url}')
+
+
+def build_stream_backend(name: str, url: str) -> StreamBackend:
+    if name == 'broker':
+        return BrokerStreamBackend(url)
+    if name == 'memory':
+        return MemoryStreamBackend()
+    raise ValueError(f'Unknown stream backend: {name}')
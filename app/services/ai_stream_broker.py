@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hmac
+import ipaddress
+import json
+import os
+from typing import Any, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.services.ai_stream_backends import BROKER_LINE_LIMIT, StreamChannel, write_broker_message
+
+
+def _is_loopback(host: str) -> bool:
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host.strip('[]')).is_loopback
+    except ValueError:
+        return False
+
+
+class _Client:
+    def __init__(self, writer: asyncio.StreamWriter, authenticated: bool) -> None:
+        self.writer = writer
+        self.authenticated = authenticated
+        self.subscriptions: set[str] = set()
+        self.owned: set[str] = set()
+
+    def send(self, message: dict[str, Any]) -> None:
+        write_broker_message(self.writer, message)
+
+
+class StreamBroker:
+    """Relays stream frames between API workers; each worker keeps serving its own streams locally."""
+
+    def __init__(self) -> None:
+        self._channels: dict[str, StreamChannel] = {}
+        self._owners: dict[str, _Client] = {}
+        self._watchers: dict[str, set[_Client]] = {}
+        self._server: Optional[asyncio.Server] = None
+
+    async def start(self, url: str) -> None:
+        if url.startswith('unix://'):
+            path = url[len('unix://'):]
+            if os.path.exists(path):
+                os.unlink(path)
+            self._server = await asyncio.start_unix_server(self._handle, path, limit=BROKER_LINE_LIMIT)
+        elif url.startswith('tcp://'):
+            host, _, port = url[len('tcp://'):].rpartition(':')
+            # Frames carry chat content, so only loopback may connect without the shared token.
+            if not _is_loopback(host) and not settings.AI_STREAM_BROKER_TOKEN:
+                raise ValueError(f'Refusing to listen on {host} without AI_STREAM_BROKER_TOKEN')
+            self._server = await asyncio.start_server(self._handle, host, int(port), limit=BROKER_LINE_LIMIT)
+        else:
+            raise ValueError(f'Unsupported stream broker url: {url}')
+        logger.info('ai.stream.broker.start', url=url)
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = _Client(writer, authenticated=not settings.AI_STREAM_BROKER_TOKEN)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if not client.authenticated:
+                    if message.get('op') != 'hello' or not hmac.compare_digest(
+                        str(message.get('token', '')), settings.AI_STREAM_BROKER_TOKEN
+                    ):
+                        logger.warning('ai.stream.broker.unauthenticated')
+                        break
+                    client.authenticated = True
+                    continue
+                self._dispatch(client, message)
+        except (OSError, ValueError) as exc:
+            logger.warning('ai.stream.broker.client_failed', error=str(exc))
+        finally:
+            self._drop(client)
+            writer.close()
+
+    def _dispatch(self, client: _Client, message: dict[str, Any]) -> None:
+        op = message.get('op')
+        session_id = message.get('session_id', '')
+        if op == 'open':
+            self._close_channel(session_id)
+            self._channels[session_id] = StreamChannel(message_id=message['message_id'])
+            self._owners[session_id] = client
+            client.owned.add(session_id)
+        elif op == 'publish':
+            if self._owners.get(session_id) is client:
+                self._publish(session_id, message.get('payload'))
+        elif op in ('subscribe', 'snapshot'):
+            channel = self._channels.get(session_id)
+            if channel is None:
+                client.send({'op': 'missing', 'request': op, 'session_id': session_id})
+                return
+            if op == 'subscribe':
+                self._watchers.setdefault(session_id, set()).add(client)
+                client.subscriptions.add(session_id)
+                self._report_watchers(session_id)
+            client.send(
+                {
+                    'op': 'snapshot',
+                    'request': op,
+                    'session_id': session_id,
+                    'message_id': channel.message_id,
+                    'content': channel.content,
+                    'seq': channel.seq,
+                    'recent': list(channel.recent) if op == 'subscribe' else [],
+                }
+            )
+        elif op == 'unsubscribe':
+            self._watchers.get(session_id, set()).discard(client)
+            client.subscriptions.discard(session_id)
+            self._report_watchers(session_id)
+
+    def _report_watchers(self, session_id: str) -> None:
+        # The owner counts these when deciding whether anyone still reads its stream.
+        owner = self._owners.get(session_id)
+        if owner is not None:
+            owner.send({'op': 'watchers', 'session_id': session_id, 'count': len(self._watchers.get(session_id, ()))})
+
+    def _publish(self, session_id: str, payload: Optional[dict[str, str]]) -> None:
+        channel = self._channels.get(session_id)
+        if channel is None:
+            return
+        channel.apply(payload)
+        frame = {'op': 'frame', 'session_id': session_id, 'payload': payload}
+        for watcher in self._watchers.get(session_id, ()):
+            watcher.send(frame)
+        if channel.done:
+            self._forget(session_id)
+
+    def _close_channel(self, session_id: str) -> None:
+        if session_id in self._channels:
+            self._publish(session_id, None)
+
+    def _forget(self, session_id: str) -> None:
+        self._channels.pop(session_id, None)
+        owner = self._owners.pop(session_id, None)
+        if owner is not None:
+            owner.owned.discard(session_id)
+        for watcher in self._watchers.pop(session_id, set()):
+            watcher.subscriptions.discard(session_id)
+
+    def _drop(self, client: _Client) -> None:
+        # A worker that went away cannot finish its streams; end them for everyone watching.
+        for session_id in list(client.owned):
+            self._close_channel(session_id)
+        for session_id in list(client.subscriptions):
+            self._watchers.get(session_id, set()).discard(client)
+            self._report_watchers(session_id)
+
+
+async def serve(url: str) -> None:
+    broker = StreamBroker()
+    await broker.start(url)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await broker.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Relay AI chat stream frames between API workers.')
+    parser.add_argument('--url', default=settings.AI_STREAM_BROKER_URL, help='unix:///path.sock or tcp://host:port')
+    args = parser.parse_args()
+    asyncio.run(serve(args.url))
+
+
+if __name__ == '__main__':
+    main()
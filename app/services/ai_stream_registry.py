@@ -1,27 +1,75 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass, field
-from typing import Optional
-
-
-StreamPayload = dict[str, str]
+import json
+import time
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.ai_stream_backends import (
+    StreamBackend,
+    StreamOverflowPolicy,
+    StreamPayload,
+    StreamQueue,
+    StreamSubscription,
+    build_stream_backend,
+    format_event_id,
+    queue_stats,
+)
+
+SSE_DONE = "data: [DONE]\n\n"
+
+
+def format_sse(payload: StreamPayload) -> str:
+    data = json.dumps(payload, ensure_ascii=False)
+    if 'seq' in payload:
+        return f"id: {format_event_id(payload['message_id'], payload['seq'])}\ndata: {data}\n\n"
+    return f"data: {data}\n\n"
+
+
+async def iter_sse_frames(queue: StreamQueue) -> AsyncIterator[str]:
+    while True:
+        frames: list[str] = []
+        item = await queue.get()
+        # A client that fell behind gets everything already queued in a single write.
+        while True:
+            if item is None:
+                frames.append(SSE_DONE)
+                yield ''.join(frames)
+                return
+            frames.append(format_sse(item))
+            if queue.empty():
+                break
+            item = queue.get_nowait()
+        yield ''.join(frames)
 
 
 @dataclass
 class StreamState:
     session_id: str
     message_id: str
-    content: str = ''
     done: bool = False
-    subscribers: set[asyncio.Queue[Optional[StreamPayload]]] = field(default_factory=set)
-    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    pending: list[str] = field(default_factory=list)
+    pending_chars: int = 0
+    flush_handle: Optional[asyncio.TimerHandle] = None
+    # Task producing the stream; cancelled when the stream is abandoned or runs too long.
+    task: Optional[asyncio.Task[None]] = None
+    started_at: float = field(default_factory=time.monotonic)
+    unwatched_since: Optional[float] = None
+    abandoned: Optional[str] = None
 
 
 class AiStreamRegistry:
-    def __init__(self) -> None:
+    def __init__(self, backend: StreamBackend) -> None:
+        self.backend = backend
         self._streams: dict[str, StreamState] = {}
         self._lock = asyncio.Lock()
+        self._sweeper: Optional[asyncio.Task[None]] = None
 
     async def start(self, session_id: str, message_id: str) -> StreamState:
         existing = None
@@ -32,60 +80,176 @@ class AiStreamRegistry:
         async with self._lock:
             state = StreamState(session_id=session_id, message_id=message_id)
             self._streams[session_id] = state
-            return state
+        await self.backend.open(session_id, message_id)
+        return state
 
     async def get(self, session_id: str) -> Optional[StreamState]:
         return self._streams.get(session_id)
 
+    def track(self, state: StreamState, task: asyncio.Task[None]) -> None:
+        state.task = task
+
+    def start_sweeper(self) -> None:
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is None:
+            return
+        self._sweeper.cancel()
+        try:
+            await self._sweeper
+        except asyncio.CancelledError:
+            pass
+        self._sweeper = None
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.AI_STREAM_SWEEP_INTERVAL_SECONDS)
+            try:
+                await self.sweep()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning('ai.stream.sweep_failed', error=str(exc))
+
+    async def sweep(self) -> int:
+        now = time.monotonic()
+        reaped = 0
+        for session_id, state in list(self._streams.items()):
+            if state.done or (state.task is not None and state.task.done()):
+                # The producer died without finishing; release the stream and its watchers.
+                await self.finish(session_id)
+                reaped += 1
+                continue
+            if state.abandoned:
+                continue
+            max_seconds = settings.AI_STREAM_MAX_DURATION_SECONDS
+            if 0 < max_seconds <= now - state.started_at:
+                await self.error(session_id, 'Stream exceeded the maximum duration.')
+                await self._abandon(state, 'max_duration')
+                reaped += 1
+                continue
+            if self.backend.subscriber_count(session_id):
+                state.unwatched_since = None
+                continue
+            if state.unwatched_since is None:
+                state.unwatched_since = now
+            grace = settings.AI_STREAM_UNWATCHED_GRACE_SECONDS
+            if settings.AI_STREAM_CANCEL_UNWATCHED and now - state.unwatched_since >= grace:
+                await self._abandon(state, 'unwatched')
+                reaped += 1
+        return reaped
+
+    async def _abandon(self, state: StreamState, reason: str) -> None:
+        state.abandoned = reason
+        logger.info(
+            'ai.stream.abandoned',
+            session_id=state.session_id,
+            message_id=state.message_id,
+            reason=reason,
+            elapsed_s=round(time.monotonic() - state.started_at, 1),
+        )
+        if state.task is None:
+            await self.finish(state.session_id)
+            return
+        # The producer's own cleanup persists what was generated and finishes the stream.
+        state.task.cancel()
+
     async def append(self, session_id: str, delta: str) -> None:
         state = self._streams.get(session_id)
-        if not state or state.done:
+        if not state or state.done or not delta:
             return
-        payload: StreamPayload = {'type': 'delta', 'message_id': state.message_id, 'content': delta}
-        async with state.lock:
-            state.content += delta
-            subscribers = list(state.subscribers)
-        for queue in subscribers:
-            queue.put_nowait(payload)
+        # Nothing below awaits, so the event loop already serialises access to the state.
+        state.pending.append(delta)
+        state.pending_chars += len(delta)
+        interval_ms = settings.AI_STREAM_FLUSH_INTERVAL_MS
+        if state.pending_chars >= settings.AI_STREAM_FLUSH_CHARS or interval_ms <= 0:
+            self._flush(state)
+        elif state.flush_handle is None:
+            state.flush_handle = asyncio.get_running_loop().call_later(interval_ms / 1000, self._flush, state)
+
+    def _flush(self, state: StreamState) -> None:
+        if state.flush_handle is not None:
+            state.flush_handle.cancel()
+            state.flush_handle = None
+        if not state.pending:
+            return
+        content = state.pending[0] if len(state.pending) == 1 else ''.join(state.pending)
+        state.pending.clear()
+        state.pending_chars = 0
+        self.backend.publish(state.session_id, {'type': 'delta', 'message_id': state.message_id, 'content': content})
 
     async def error(self, session_id: str, message: str) -> None:
         state = self._streams.get(session_id)
         if not state or state.done:
             return
-        payload: StreamPayload = {'type': 'error', 'message_id': state.message_id, 'message': message}
-        async with state.lock:
-            subscribers = list(state.subscribers)
-        for queue in subscribers:
-            queue.put_nowait(payload)
+        self._flush(state)
+        self.backend.publish(session_id, {'type': 'error', 'message_id': state.message_id, 'message': message})
 
     async def finish(self, session_id: str) -> None:
         state = self._streams.get(session_id)
         if not state or state.done:
             return
-        async with state.lock:
-            state.done = True
-            subscribers = list(state.subscribers)
-            state.subscribers.clear()
-        for queue in subscribers:
-            queue.put_nowait(None)
+        self._flush(state)
+        state.done = True
+        self.backend.publish(session_id, None)
         async with self._lock:
             current = self._streams.get(session_id)
             if current is state:
                 self._streams.pop(session_id, None)
 
-    async def subscribe(self, session_id: str) -> Optional[tuple[StreamState, asyncio.Queue[Optional[StreamPayload]], str]]:
-        state = self._streams.get(session_id)
-        if not state or state.done:
-            return None
-        queue: asyncio.Queue[Optional[StreamPayload]] = asyncio.Queue()
-        async with state.lock:
-            snapshot = state.content
-            state.subscribers.add(queue)
-        return state, queue, snapshot
+    async def snapshot(self, session_id: str) -> Optional[tuple[str, str]]:
+        return await self.backend.snapshot(session_id)
+
+    async def subscribe(
+        self,
+        session_id: str,
+        last_event_id: Optional[str] = None,
+        policy: Optional[StreamOverflowPolicy] = None,
+    ) -> Optional[tuple[StreamSubscription, str]]:
+        # Deltas still waiting for a flush are not in the snapshot; the next frame carries them.
+        return await self.backend.subscribe(session_id, last_event_id, policy)
+
+    async def unsubscribe(self, subscription: StreamSubscription) -> None:
+        await self.backend.unsubscribe(subscription)
+
+    def stats(self) -> dict[str, Any]:
+        depths = self.backend.queue_depths()
+        return {
+            'streams': len(self._streams),
+            'subscribers': len(depths),
+            'queued_frames': sum(depths),
+            'max_queue_depth': max(depths, default=0),
+            **asdict(queue_stats),
+        }
+
+    async def aclose(self) -> None:
+        await self.stop_sweeper()
+        for session_id in list(self._streams):
+            await self.finish(session_id)
+        await self.backend.aclose()
+
+
+stream_registry = AiStreamRegistry(build_stream_backend(settings.AI_STREAM_BACKEND, settings.AI_STREAM_BROKER_URL))
+
+_STREAM_GAUGES = {
+    'streams': metrics.gauge('ai_streams_active', 'Chat turns currently generating in this process.'),
+    'subscribers': metrics.gauge('ai_stream_subscribers', 'SSE watchers attached to streams in this process.'),
+    'queued_frames': metrics.gauge('ai_stream_queued_frames', 'Frames waiting in SSE subscriber queues.'),
+    'max_queue_depth': metrics.gauge('ai_stream_max_queue_depth', 'Deepest SSE subscriber queue.'),
+}
+_STREAM_OVERFLOW = metrics.counter(
+    'ai_stream_overflow_events_total',
+    'Subscriber queue overflow handling, by kind.',
+    ('kind',),
+)
+
 
-    async def unsubscribe(self, state: StreamState, queue: asyncio.Queue[Optional[StreamPayload]]) -> None:
-        async with state.lock:
-            state.subscribers.discard(queue)
+def _collect_stream_metrics() -> None:
+    stats = stream_registry.stats()
+    for key, gauge in _STREAM_GAUGES.items():
+        gauge.set(stats[key])
+    for key, value in asdict(queue_stats).items():
+        _STREAM_OVERFLOW.labels(key).set_total(value)
 
 
-stream_registry = AiStreamRegistry()
+metrics.add_collector(_collect_stream_metrics)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Sequence
+
+from app.models.chat_message import ChatMessage
+from app.models.enums import ChatRole
+from app.services.ai_types import AiDeps
+
+_CLARIFY_MARKER = '<!-- Clarification chain -->'
+_CLARIFY_RESPONSE_KEY = 'clarify_chain_response'
+_SKILL_INTENT_PATTERN = re.compile(
+    r'(技能|skill|skill_id|read_skill|generate_skill|create_skill|'
+    r'生成技能|创建技能|保存技能|总结成技能|沉淀技能|技能库|技能模板)',
+    re.IGNORECASE,
+)
+_DRAFT_MIN_REPLY_LEN = 120
+
+
+def role_value(role) -> str:
+    return role.value if hasattr(role, 'value') else str(role)
+
+
+def contains_clarify_chain(text: str) -> bool:
+    return _CLARIFY_MARKER.lower() in text.lower()
+
+
+def is_clarify_response(text: str) -> bool:
+    return _CLARIFY_RESPONSE_KEY in text
+
+
+def looks_like_skill_intent(text: str) -> bool:
+    return bool(_SKILL_INTENT_PATTERN.search(text))
+
+
+def build_context_snippet(
+    history: Sequence[ChatMessage],
+    prompt: str,
+    assistant_content: str = '',
+    limit: int = 6,
+) -> str:
+    lines = ['对话摘要：']
+    recent = list(history)[-limit:] if history else []
+    for item in recent:
+        role = role_value(item.role)
+        if role == ChatRole.USER.value:
+            speaker = '用户'
+        elif role == ChatRole.ASSISTANT.value:
+            speaker = '助手'
+        else:
+            speaker = '系统'
+        content = item.content.strip()
+        if content:
+            lines.append(f'{speaker}: {content}')
+    if prompt.strip():
+        lines.append(f'当前用户输入: {prompt.strip()}')
+    if assistant_content.strip():
+        lines.append(f'最新助手回复: {assistant_content.strip()}')
+    return '\n'.join(lines).strip()
+
+
+def passes_common_gates(deps: AiDeps, prompt: str, assistant_content: str) -> bool:
+    # Turns where suggesting a skill would interrupt: a skill is already in use, or clarification is ongoing.
+    if deps.selected_skill_id:
+        return False
+    if not prompt.strip():
+        return False
+    if contains_clarify_chain(assistant_content):
+        return False
+    if is_clarify_response(prompt):
+        return False
+    if looks_like_skill_intent(prompt):
+        return False
+    return True
+
+
+def draft_eligible(assistant_content: str) -> bool:
+    stripped = assistant_content.strip()
+    if not stripped:
+        return False
+    if looks_like_skill_intent(stripped):
+        return False
+    return len(stripped) >= _DRAFT_MIN_REPLY_LEN
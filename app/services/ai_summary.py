@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from typing import Optional
+
+from loguru import logger
+from pydantic_ai import Agent
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_engine
+from app.models.chat_message import ChatMessage
+from app.models.chat_summary import ChatSummary
+from app.models.enums import ChatMessageStatus, ChatRole
+from app.services.ai_history import message_role, message_tokens
+from app.services.ai_provider import build_openai_chat_model
+from app.services.chat_service import get_summary_async, list_messages_async, save_summary_async
+from app.services.pagination import Cursor
+
+_MESSAGE_CLIP_CHARS = 2000
+_ROLE_LABELS = {
+    ChatRole.USER.value: '用户',
+    ChatRole.ASSISTANT.value: '助手',
+    ChatRole.SYSTEM.value: '系统',
+}
+
+_summary_agent: Agent[None, str] | None = None
+
+
+def _get_summary_agent() -> Agent[None, str]:
+    global _summary_agent
+    if _summary_agent is not None:
+        return _summary_agent
+    _summary_agent = Agent(
+        model=None,
+        output_type=str,
+        system_prompt=(
+            '你是对话摘要器，负责把较早的对话压缩成一段滚动摘要，供后续轮次作为上下文。'
+            '在已有摘要的基础上合并新增对话，保留用户目标、约束、偏好、已确定的结论和未解决的问题，'
+            '删除寒暄和重复内容。直接输出摘要正文，不要标题或解释。'
+        ),
+        defer_model_check=True,
+    )
+    return _summary_agent
+
+
+def unsummarized_history(history: Sequence[ChatMessage], summary: Optional[ChatSummary]) -> list[ChatMessage]:
+    if summary is None:
+        return list(history)
+    for index, message in enumerate(history):
+        if message.id == summary.covered_message_id:
+            return list(history[index + 1:])
+    # The covered message is older than everything loaded.
+    return list(history)
+
+
+def pending_summary_tokens(history: Sequence[ChatMessage]) -> int:
+    return sum(message_tokens(message) for message in history)
+
+
+def select_messages_to_fold(pending: Sequence[ChatMessage], *, keep_recent: bool) -> list[ChatMessage]:
+    end = len(pending)
+    if keep_recent:
+        # The newest turns stay verbatim; only what is about to fall out of the window is folded.
+        recent = 0
+        while end > 0 and recent + message_tokens(pending[end - 1]) <= settings.AI_SUMMARY_RECENT_TOKENS:
+            recent += message_tokens(pending[end - 1])
+            end -= 1
+    folded = list(pending[:end])
+    for index, message in enumerate(folded):
+        if message.status == ChatMessageStatus.STREAMING:
+            folded = folded[:index]
+            break
+    # End on a reply so the verbatim part starts with the question it answers.
+    while folded and message_role(folded[-1]) == ChatRole.USER.value:
+        folded.pop()
+    return folded
+
+
+def _build_summary_prompt(previous: Optional[str], messages: Sequence[ChatMessage]) -> str:
+    lines = []
+    if previous:
+        lines.append(f'已有摘要：\n{previous}\n')
+    lines.append('新增对话：')
+    for message in messages:
+        content = message.content
+        if len(content) > _MESSAGE_CLIP_CHARS:
+            content = f'{content[:_MESSAGE_CLIP_CHARS]}…'
+        lines.append(f'{_ROLE_LABELS.get(message_role(message), message_role(message))}：{content}')
+    return '\n'.join(lines)
+
+
+async def summarize_messages(model_id: str, previous: Optional[str], messages: Sequence[ChatMessage]) -> str:
+    agent = _get_summary_agent()
+    result = await agent.run(_build_summary_prompt(previous, messages), model=build_openai_chat_model(model_id))
+    return result.output.strip()[: settings.AI_SUMMARY_MAX_CHARS]
+
+
+async def fold_session_summary(session_id: str, model_id: str) -> Optional[str]:
+    """Folds messages not yet summarised into the session summary.
+
+    Returns the newest folded message id when a full batch was folded and more may remain.
+    """
+    batch = settings.AI_SUMMARY_BATCH_MESSAGES
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        previous = await get_summary_async(session, session_id)
+        cursor = Cursor(created_at=previous.covered_created_at, id=previous.covered_message_id) if previous else None
+        pending = await list_messages_async(session, session_id, limit=batch, cursor=cursor)
+    more = len(pending) == batch
+    folded = select_messages_to_fold(pending, keep_recent=not more)
+    if not folded:
+        return None
+
+    started = time.perf_counter()
+    content = await summarize_messages(model_id, previous.content if previous else None, folded)
+    if not content:
+        return None
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        saved = await save_summary_async(session, session_id, previous, content, folded[-1], len(folded))
+    logger.info(
+        'ai.summary.folded',
+        session_id=session_id,
+        folded=len(folded),
+        summary_len=len(content),
+        saved=saved,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+    return folded[-1].id if saved and more else None
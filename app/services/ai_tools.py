@@ -3,23 +3,22 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Optional
 
-import anyio
 from loguru import logger
 from pydantic import BaseModel, ConfigDict, Field
 from pydantic_ai import Agent, RunContext
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db.session import engine
+from app.db.session import async_engine
 from app.models.enums import SkillVisibility
 from app.schemas.skill import SkillCreate
 from app.services.ai_prompts import read_prompt_file
 from app.services.ai_provider import build_openai_chat_model
 from app.services.ai_types import AiDeps
 from app.services.skill_service import (
-    create_skill as create_skill_record,
-    get_latest_version,
-    get_skill,
-    get_version,
+    create_skill_async as create_skill_record,
+    get_latest_version_async,
+    get_skill_async,
+    get_version_async,
     skill_tags_to_list,
 )
 
@@ -143,30 +142,27 @@ async def generate_skill_data(
 
 
 async def read_skill_data(deps: AiDeps, *, skill_id: str, version: Optional[int] = None) -> dict:
-    def _fetch() -> dict:
-        with Session(engine) as session:
-            skill = get_skill(session, skill_id)
-            if not skill:
-                raise ValueError('skill not found')
-            if skill.visibility == SkillVisibility.PRIVATE and skill.owner_id != deps.user.id:
-                raise ValueError('skill not accessible')
-            if version is not None:
-                skill_version = get_version(session, skill_id, version)
-            else:
-                skill_version = get_latest_version(session, skill_id)
-            if not skill_version:
-                raise ValueError('skill version not found')
-            return {
-                'id': skill.id,
-                'name': skill.name,
-                'description': skill.description,
-                'tags': skill_tags_to_list(skill),
-                'visibility': skill.visibility.value if hasattr(skill.visibility, 'value') else skill.visibility,
-                'version': skill_version.version,
-                'content': skill_version.content,
-            }
-
-    return await anyio.to_thread.run_sync(_fetch)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        skill = await get_skill_async(session, skill_id)
+        if not skill:
+            raise ValueError('skill not found')
+        if skill.visibility == SkillVisibility.PRIVATE and skill.owner_id != deps.user.id:
+            raise ValueError('skill not accessible')
+        if version is not None:
+            skill_version = await get_version_async(session, skill_id, version)
+        else:
+            skill_version = await get_latest_version_async(session, skill_id)
+        if not skill_version:
+            raise ValueError('skill version not found')
+        return {
+            'id': skill.id,
+            'name': skill.name,
+            'description': skill.description,
+            'tags': skill_tags_to_list(skill),
+            'visibility': skill.visibility.value if hasattr(skill.visibility, 'value') else skill.visibility,
+            'version': skill_version.version,
+            'content': skill_version.content,
+        }
 
 
 async def create_skill_data(
@@ -189,23 +185,20 @@ async def create_skill_data(
         max_len=deps.skill_content_max_len,
     )
 
-    def _create() -> tuple[str, int]:
-        with Session(engine) as session:
-            skill, version = create_skill_record(
-                session,
-                SkillCreate(
-                    name=name_result.name,
-                    description=description.strip(),
-                    visibility=visibility_value,
-                    tags=cleaned_tags,
-                    avatar=avatar,
-                    content=content_value,
-                ),
-                deps.user.id,
-            )
-            return skill.id, version.version
-
-    skill_id, version_number = await anyio.to_thread.run_sync(_create)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        skill, version = await create_skill_record(
+            session,
+            SkillCreate(
+                name=name_result.name,
+                description=description.strip(),
+                visibility=visibility_value,
+                tags=cleaned_tags,
+                avatar=avatar,
+                content=content_value,
+            ),
+            deps.user.id,
+        )
+        skill_id, version_number = skill.id, version.version
     warnings: list[str] = []
     if name_result.normalized:
         warnings.append('name_normalized')
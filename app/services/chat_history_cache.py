@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.chat_message import ChatMessage
+from app.models.enums import ChatMessageStatus
+
+
+def _snapshot(record: ChatMessage) -> ChatMessage:
+    # Detached copies, so callers never share an instance bound to someone else's session.
+    return ChatMessage(**record.model_dump())
+
+
+def _chars(messages: Sequence[ChatMessage]) -> int:
+    return sum(len(message.content) for message in messages)
+
+
+@dataclass
+class _SessionHistory:
+    messages: tuple[ChatMessage, ...]
+    chars: int
+    loaded_at: float = field(default_factory=time.monotonic)
+    # Messages appended here since the database tail was last confirmed to match.
+    unverified: int = 0
+
+
+@dataclass
+class CachedHistory:
+    messages: tuple[ChatMessage, ...]
+    # How many of the newest database ids must match the cached tail for it to be current.
+    depth: int
+
+
+@dataclass
+class HistoryCacheCounters:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    evictions: int = 0
+
+
+class ChatHistoryCache:
+    """Newest messages per chat session, oldest first, bounded by session count, characters and age."""
+
+    def __init__(self) -> None:
+        self._sessions: OrderedDict[str, _SessionHistory] = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self._hooks: list[Callable[[str], None]] = []
+        self.counters = HistoryCacheCounters()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.AI_HISTORY_CACHE_SESSIONS > 0
+
+    def lookup(self, session_id: str) -> Optional[CachedHistory]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and time.monotonic() - entry.loaded_at >= settings.AI_HISTORY_CACHE_TTL_SECONDS:
+                self._drop(session_id)
+                entry = None
+            if entry is None:
+                self.counters.misses += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            return CachedHistory(messages=entry.messages, depth=entry.unverified + 1)
+
+    def confirm(self, session_id: str, cached: CachedHistory, newest_ids: Sequence[str]) -> bool:
+        # Another worker's writes show up as a different tail; a reply still streaming may have moved on since.
+        expected = [message.id for message in reversed(cached.messages[-cached.depth:])]
+        if expected != list(newest_ids) or any(m.status == ChatMessageStatus.STREAMING for m in cached.messages):
+            self.counters.stale += 1
+            self.invalidate(session_id, broadcast=False)
+            return False
+        self.counters.hits += 1
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and entry.messages is cached.messages:
+                entry.unverified = 0
+        return True
+
+    def store(self, session_id: str, messages: Sequence[ChatMessage]) -> None:
+        if not self.enabled:
+            return
+        snapshot = tuple(_snapshot(message) for message in messages)
+        with self._lock:
+            self._put(session_id, _SessionHistory(messages=snapshot, chars=_chars(snapshot)))
+
+    def append(self, record: ChatMessage) -> None:
+        with self._lock:
+            entry = self._sessions.get(record.session_id)
+            if entry is None:
+                return
+            messages = (*entry.messages, _snapshot(record))[-settings.AI_HISTORY_MAX_MESSAGES:]
+            self._put(
+                record.session_id,
+                _SessionHistory(
+                    messages=messages,
+                    chars=_chars(messages),
+                    loaded_at=entry.loaded_at,
+                    unverified=entry.unverified + 1,
+                ),
+            )
+
+    def update(self, record: ChatMessage) -> None:
+        with self._lock:
+            entry = self._sessions.get(record.session_id)
+            if entry is not None:
+                messages = tuple(_snapshot(record) if m.id == record.id else m for m in entry.messages)
+                self._put(
+                    record.session_id,
+                    _SessionHistory(
+                        messages=messages,
+                        chars=_chars(messages),
+                        loaded_at=entry.loaded_at,
+                        unverified=entry.unverified,
+                    ),
+                )
+        self._notify(record.session_id)
+
+    def invalidate(self, session_id: str, *, broadcast: bool = True) -> None:
+        with self._lock:
+            self._drop(session_id)
+        if broadcast:
+            self._notify(session_id)
+
+    def add_invalidation_hook(self, hook: Callable[[str], None]) -> None:
+        # Lets a deployment forward edits to other workers, which apply them with invalidate(broadcast=False).
+        self._hooks.append(hook)
+
+    def stats(self) -> dict[str, Any]:
+        counters = self.counters
+        lookups = counters.hits + counters.misses + counters.stale
+        return {
+            'sessions': len(self._sessions),
+            'chars': self._chars,
+            'hits': counters.hits,
+            'misses': counters.misses,
+            'stale': counters.stale,
+            'evictions': counters.evictions,
+            'hit_rate': round(counters.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._chars = 0
+
+    def _put(self, session_id: str, entry: _SessionHistory) -> None:
+        self._drop(session_id)
+        self._sessions[session_id] = entry
+        self._chars += entry.chars
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > settings.AI_HISTORY_CACHE_SESSIONS
+            or self._chars > settings.AI_HISTORY_CACHE_MAX_CHARS
+        ):
+            oldest = next(iter(self._sessions))
+            self._drop(oldest)
+            self.counters.evictions += 1
+
+    def _drop(self, session_id: str) -> None:
+        entry = self._sessions.pop(session_id, None)
+        if entry is not None:
+            self._chars -= entry.chars
+
+    def _notify(self, session_id: str) -> None:
+        for hook in self._hooks:
+            try:
+                hook(session_id)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning('chat.history_cache.hook_failed', session_id=session_id, error=str(exc))
+
+
+chat_history_cache = ChatHistoryCache()
+
+_CACHE_SESSIONS = metrics.gauge('chat_history_cache_sessions', 'Chat sessions with recent history held in memory.')
+_CACHE_CHARS = metrics.gauge('chat_history_cache_chars', 'Characters of message content held in the history cache.')
+_CACHE_EVENTS = metrics.counter(
+    'chat_history_cache_events_total', 'History cache lookups and evictions, by kind.', ('kind',)
+)
+
+
+def _collect_cache_metrics() -> None:
+    stats = chat_history_cache.stats()
+    _CACHE_SESSIONS.set(stats['sessions'])
+    _CACHE_CHARS.set(stats['chars'])
+    for kind in ('hits', 'misses', 'stale', 'evictions'):
+        _CACHE_EVENTS.labels(kind).set_total(stats[kind])
+
+
+metrics.add_collector(_collect_cache_metrics)
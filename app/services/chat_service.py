@@ -1,9 +1,16 @@
 from typing import Optional
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.chat_session import ChatSession
 from app.models.chat_message import ChatMessage
+from app.models.chat_summary import ChatSummary
 from app.models.skill_suggestion import SkillSuggestion
-from app.models.enums import SkillSuggestionStatus
+from app.models.enums import ChatMessageStatus, SkillSuggestionStatus
+from app.core.config import settings
+from app.services.chat_history_cache import chat_history_cache
+from app.services.pagination import Cursor, paginate
 
 
 def create_session(session: Session, user_id: str, title:Optional[str]) -> ChatSession:
@@ -19,12 +26,16 @@ def list_sessions(
     user_id: str,
     limit:Optional[int] = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = None,
 ) -> list[ChatSession]:
-    statement = select(ChatSession).where(ChatSession.user_id == user_id).order_by(ChatSession.created_at.desc())
-    if offset:
-        statement = statement.offset(offset)
-    if limit is not None:
-        statement = statement.limit(limit)
+    statement = paginate(
+        select(ChatSession).where(ChatSession.user_id == user_id),
+        ChatSession,
+        cursor=cursor,
+        limit=limit,
+        offset=offset,
+        descending=True,
+    )
     return list(session.exec(statement).all())
 
 
@@ -32,6 +43,11 @@ def get_session(session: Session, session_id: str) ->Optional[ChatSession]:
     return session.exec(select(ChatSession).where(ChatSession.id == session_id)).first()
 
 
+async def get_session_async(session: AsyncSession, session_id: str) -> Optional[ChatSession]:
+    result = await session.exec(select(ChatSession).where(ChatSession.id == session_id))
+    return result.first()
+
+
 def update_session_title(session: Session, record: ChatSession, title:Optional[str]) -> ChatSession:
     record.title = title
     session.add(record)
@@ -43,12 +59,16 @@ def update_session_title(session: Session, record: ChatSession, title:Optional[s
 def delete_session(session: Session, record: ChatSession) -> None:
     messages = session.exec(select(ChatMessage).where(ChatMessage.session_id == record.id)).all()
     suggestions = session.exec(select(SkillSuggestion).where(SkillSuggestion.session_id == record.id)).all()
+    summary = session.exec(select(ChatSummary).where(ChatSummary.session_id == record.id)).first()
     for message in messages:
         session.delete(message)
     for suggestion in suggestions:
         session.delete(suggestion)
+    if summary is not None:
+        session.delete(summary)
     session.delete(record)
     session.commit()
+    chat_history_cache.invalidate(record.id)
 
 
 def create_message(
@@ -67,61 +87,231 @@ def create_message(
     session.add(record)
     session.commit()
     session.refresh(record)
+    chat_history_cache.append(record)
+    return record
+
+
+async def create_message_async(
+    session: AsyncSession,
+    session_id: str,
+    role: str,
+    content: str,
+    skill_id: Optional[str],
+    status: ChatMessageStatus = ChatMessageStatus.COMPLETE,
+) -> ChatMessage:
+    record = ChatMessage(
+        session_id=session_id,
+        role=role,
+        content=content,
+        skill_id=skill_id,
+        status=status,
+    )
+    session.add(record)
+    await session.commit()
+    await session.refresh(record)
+    chat_history_cache.append(record)
     return record
 
 
+def _list_messages_statement(
+    session_id: str,
+    limit: Optional[int],
+    offset: int,
+    cursor: Optional[Cursor],
+    descending: bool = False,
+):
+    return paginate(
+        select(ChatMessage).where(ChatMessage.session_id == session_id),
+        ChatMessage,
+        cursor=cursor,
+        limit=limit,
+        offset=offset,
+        descending=descending,
+    )
+
+
 def list_messages(
     session: Session,
     session_id: str,
     limit:Optional[int] = 50,
     offset: int = 0,
+    cursor: Optional[Cursor] = None,
 ) -> list[ChatMessage]:
-    statement = (
-        select(ChatMessage)
-        .where(ChatMessage.session_id == session_id)
-        .order_by(ChatMessage.created_at.asc())
-    )
-    if offset:
-        statement = statement.offset(offset)
-    if limit is not None:
-        statement = statement.limit(limit)
-    return list(session.exec(statement).all())
+    return list(session.exec(_list_messages_statement(session_id, limit, offset, cursor)).all())
+
+
+async def list_messages_async(
+    session: AsyncSession,
+    session_id: str,
+    limit: Optional[int] = 50,
+    offset: int = 0,
+    cursor: Optional[Cursor] = None,
+    descending: bool = False,
+) -> list[ChatMessage]:
+    result = await session.exec(_list_messages_statement(session_id, limit, offset, cursor, descending))
+    return list(result.all())
+
+
+async def list_recent_messages_async(session: AsyncSession, session_id: str, limit: int) -> list[ChatMessage]:
+    # The newest `limit` messages, oldest first; served from the history cache once its tail is confirmed.
+    if limit > settings.AI_HISTORY_MAX_MESSAGES or not chat_history_cache.enabled:
+        records = await list_messages_async(session, session_id, limit=limit, descending=True)
+        records.reverse()
+        return records
+    cached = chat_history_cache.lookup(session_id)
+    if cached is not None:
+        newest = await session.exec(
+            select(ChatMessage.id)
+            .where(ChatMessage.session_id == session_id)
+            .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+            .limit(cached.depth)
+        )
+        if chat_history_cache.confirm(session_id, cached, newest.all()):
+            return list(cached.messages[-limit:])
+    records = await list_messages_async(session, session_id, limit=settings.AI_HISTORY_MAX_MESSAGES, descending=True)
+    records.reverse()
+    chat_history_cache.store(session_id, records)
+    return records[-limit:]
 
 
 def get_message(session: Session, message_id: str) -> Optional[ChatMessage]:
     return session.exec(select(ChatMessage).where(ChatMessage.id == message_id)).first()
 
 
+async def get_message_async(session: AsyncSession, message_id: str) -> Optional[ChatMessage]:
+    result = await session.exec(select(ChatMessage).where(ChatMessage.id == message_id))
+    return result.first()
+
+
 def update_message_content(session: Session, record: ChatMessage, content: str) -> ChatMessage:
     record.content = content
     session.add(record)
     session.commit()
     session.refresh(record)
+    chat_history_cache.update(record)
+    return record
+
+
+async def update_message_content_async(
+    session: AsyncSession,
+    record: ChatMessage,
+    content: str,
+    status: Optional[ChatMessageStatus] = None,
+) -> ChatMessage:
+    record.content = content
+    if status is not None:
+        record.status = status
+    session.add(record)
+    await session.commit()
+    await session.refresh(record)
+    chat_history_cache.update(record)
     return record
 
 
+async def checkpoint_message_content_async(session: AsyncSession, message_id: str, content: str) -> bool:
+    # Guarded on status so a late checkpoint never overwrites the final content.
+    result = await session.exec(
+        update(ChatMessage)
+        .where(ChatMessage.id == message_id)
+        .where(ChatMessage.status == ChatMessageStatus.STREAMING)
+        .values(content=content)
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+async def get_summary_async(session: AsyncSession, session_id: str) -> Optional[ChatSummary]:
+    result = await session.exec(select(ChatSummary).where(ChatSummary.session_id == session_id))
+    return result.first()
+
+
+async def save_summary_async(
+    session: AsyncSession,
+    session_id: str,
+    previous: Optional[ChatSummary],
+    content: str,
+    covered: ChatMessage,
+    folded: int,
+) -> bool:
+    # Compare-and-set on the covered message, so concurrent summarisers cannot fold the same turns twice.
+    if previous is None:
+        session.add(
+            ChatSummary(
+                session_id=session_id,
+                content=content,
+                covered_message_id=covered.id,
+                covered_created_at=covered.created_at,
+                covered_messages=folded,
+            )
+        )
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return False
+        return True
+    result = await session.exec(
+        update(ChatSummary)
+        .where(ChatSummary.id == previous.id)
+        .where(ChatSummary.covered_message_id == previous.covered_message_id)
+        .values(
+            content=content,
+            covered_message_id=covered.id,
+            covered_created_at=covered.created_at,
+            covered_messages=previous.covered_messages + folded,
+        )
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+def _list_suggestions_statement(session_id: str, status: Optional[SkillSuggestionStatus]):
+    statement = select(SkillSuggestion).where(SkillSuggestion.session_id == session_id)
+    if status is not None:
+        statement = statement.where(SkillSuggestion.status == status)
+    return statement.order_by(SkillSuggestion.created_at.asc())
+
+
 def list_suggestions(
     session: Session,
     session_id: str,
     status:Optional[SkillSuggestionStatus] = None,
 ) -> list[SkillSuggestion]:
-    statement = select(SkillSuggestion).where(SkillSuggestion.session_id == session_id)
-    if status is not None:
-        statement = statement.where(SkillSuggestion.status == status)
-    statement = statement.order_by(SkillSuggestion.created_at.asc())
-    return list(session.exec(statement).all())
+    return list(session.exec(_list_suggestions_statement(session_id, status)).all())
+
+
+async def list_suggestions_async(
+    session: AsyncSession,
+    session_id: str,
+    status: Optional[SkillSuggestionStatus] = None,
+) -> list[SkillSuggestion]:
+    result = await session.exec(_list_suggestions_statement(session_id, status))
+    return list(result.all())
+
+
+def _rejection_statement(session_id: str):
+    return select(SkillSuggestion).where(
+        (SkillSuggestion.session_id == session_id)
+        & (SkillSuggestion.status == SkillSuggestionStatus.REJECTED)
+    )
 
 
 def has_rejection(session: Session, session_id: str) -> bool:
-    record = session.exec(
-        select(SkillSuggestion).where(
-            (SkillSuggestion.session_id == session_id)
-            & (SkillSuggestion.status == SkillSuggestionStatus.REJECTED)
-        )
-    ).first()
+    record = session.exec(_rejection_statement(session_id)).first()
     return record is not None
 
 
+async def has_rejection_async(session: AsyncSession, session_id: str) -> bool:
+    result = await session.exec(_rejection_statement(session_id))
+    return result.first() is not None
+
+
+def _existing_suggestion_statement(session_id: str, skill_id: str):
+    return select(SkillSuggestion).where(
+        (SkillSuggestion.session_id == session_id) & (SkillSuggestion.skill_id == skill_id)
+    )
+
+
 def create_suggestion(
     session: Session,
     session_id: str,
@@ -129,11 +319,7 @@ def create_suggestion(
     message_id:Optional[str],
     reason: Optional[str] = None,
 ) -> SkillSuggestion:
-    existing = session.exec(
-        select(SkillSuggestion).where(
-            (SkillSuggestion.session_id == session_id) & (SkillSuggestion.skill_id == skill_id)
-        )
-    ).first()
+    existing = session.exec(_existing_suggestion_statement(session_id, skill_id)).first()
     if existing:
         if reason and not existing.reason:
             existing.reason = reason
@@ -153,6 +339,34 @@ def create_suggestion(
     return record
 
 
+async def create_suggestion_async(
+    session: AsyncSession,
+    session_id: str,
+    skill_id: str,
+    message_id: Optional[str],
+    reason: Optional[str] = None,
+) -> SkillSuggestion:
+    result = await session.exec(_existing_suggestion_statement(session_id, skill_id))
+    existing = result.first()
+    if existing:
+        if reason and not existing.reason:
+            existing.reason = reason
+            session.add(existing)
+            await session.commit()
+            await session.refresh(existing)
+        return existing
+    record = SkillSuggestion(
+        session_id=session_id,
+        skill_id=skill_id,
+        message_id=message_id,
+        reason=reason,
+    )
+    session.add(record)
+    await session.commit()
+    await session.refresh(record)
+    return record
+
+
 def get_suggestion(session: Session, suggestion_id: str) ->Optional[SkillSuggestion]:
     return session.exec(select(SkillSuggestion).where(SkillSuggestion.id == suggestion_id)).first()
 
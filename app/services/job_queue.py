@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from uuid import uuid4
+
+from loguru import logger
+from sqlalchemy import and_, delete, func, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.session import async_engine
+from app.models.enums import JobStatus
+from app.models.job import Job
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+_MAX_ERROR_LEN = 2000
+_PRUNE_INTERVAL_SECONDS = 3600.0
+
+_JOB_SECONDS = metrics.histogram(
+    'job_duration_seconds',
+    'Background job run time by outcome.',
+    ('job_type', 'outcome'),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+_JOB_QUEUE_DEPTH = metrics.gauge(
+    'job_queue_depth', 'Pending and running background jobs across all workers.', ('job_type', 'status')
+)
+_JOB_RUNNING_LOCAL = metrics.gauge('job_worker_running', 'Jobs running in this process.', ('job_type',))
+
+
+@dataclass(frozen=True)
+class JobType:
+    name: str
+    handler: JobHandler
+    concurrency: int
+    max_attempts: int
+
+
+_job_types: dict[str, JobType] = {}
+
+
+def _utc_now() -> datetime:
+    # Job columns hold naive UTC.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def register_job_type(
+    name: str,
+    handler: JobHandler,
+    *,
+    concurrency: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+) -> JobType:
+    job_type = JobType(
+        name=name,
+        handler=handler,
+        concurrency=settings.JOB_CONCURRENCY.get(name, concurrency or settings.JOB_DEFAULT_CONCURRENCY),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    _job_types[name] = job_type
+    return job_type
+
+
+def retry_delay(attempts: int) -> float:
+    return min(settings.JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), settings.JOB_RETRY_MAX_SECONDS)
+
+
+async def enqueue_job_async(
+    session: AsyncSession,
+    job_type: str,
+    idempotency_key: str,
+    payload: dict[str, Any],
+) -> Job:
+    registered = _job_types.get(job_type)
+    record = Job(
+        job_type=job_type,
+        idempotency_key=idempotency_key,
+        payload=json.dumps(payload, ensure_ascii=False),
+        max_attempts=registered.max_attempts if registered else settings.JOB_MAX_ATTEMPTS,
+    )
+    session.add(record)
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        result = await session.exec(
+            select(Job).where(Job.job_type == job_type).where(Job.idempotency_key == idempotency_key)
+        )
+        existing = result.first()
+        if existing is None:
+            raise
+        return existing
+    await session.refresh(record)
+    job_worker.notify()
+    return record
+
+
+def _claimable(job_type: str, now: datetime):
+    stale = now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    return and_(
+        Job.job_type == job_type,
+        or_(
+            and_(Job.status == JobStatus.PENDING, Job.run_after <= now),
+            and_(Job.status == JobStatus.RUNNING, Job.locked_at < stale),
+        ),
+    )
+
+
+async def prune_finished_jobs(session: AsyncSession, now: Optional[datetime] = None) -> int:
+    cutoff = (now or _utc_now()) - timedelta(days=settings.JOB_RETENTION_DAYS)
+    result = await session.exec(
+        delete(Job)
+        .where(Job.status.in_([JobStatus.SUCCEEDED, JobStatus.FAILED]))
+        .where(Job.updated_at < cutoff)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+class JobWorker:
+    def __init__(self) -> None:
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}'
+        self._running: dict[str, set[asyncio.Task[None]]] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task[None]] = None
+        self._pruned_at = 0.0
+
+    def start(self) -> None:
+        if self._loop_task is not None and not self._loop_task.done():
+            return
+        self._wake = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._run())
+        logger.info('jobs.worker.start', worker_id=self.worker_id, job_types=sorted(_job_types))
+
+    def notify(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            try:
+                await self._loop_task
+            except asyncio.CancelledError:
+                pass
+            self._loop_task = None
+        self._wake = None
+        tasks = [task for tasks in self._running.values() for task in tasks]
+        if not tasks:
+            return
+        _done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    def running_counts(self) -> dict[str, int]:
+        return {name: len(tasks) for name, tasks in self._running.items()}
+
+    async def drain(self) -> None:
+        while True:
+            tasks = [task for tasks in self._running.values() for task in tasks]
+            if not tasks:
+                return
+            await asyncio.wait(tasks)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._prune()
+                await self.run_once()
+            except Exception:  # noqa: BLE001
+                logger.exception('jobs.worker.poll_failed')
+            wake = self._wake
+            if wake is None:
+                return
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            wake.clear()
+
+    async def run_once(self) -> int:
+        started = 0
+        for job_type in list(_job_types.values()):
+            running = self._running.setdefault(job_type.name, set())
+            free = job_type.concurrency - len(running)
+            if free <= 0:
+                continue
+            for job in await self._claim(job_type.name, free):
+                task = asyncio.create_task(self._execute(job_type, job))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                started += 1
+        return started
+
+    async def _prune(self) -> None:
+        if settings.JOB_RETENTION_DAYS <= 0 or time.monotonic() - self._pruned_at < _PRUNE_INTERVAL_SECONDS:
+            return
+        self._pruned_at = time.monotonic()
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            removed = await prune_finished_jobs(session)
+        if removed:
+            logger.info('jobs.pruned', removed=removed, retention_days=settings.JOB_RETENTION_DAYS)
+
+    async def _claim(self, job_type: str, limit: int) -> list[Job]:
+        now = _utc_now()
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            result = await session.exec(
+                select(Job.id).where(_claimable(job_type, now)).order_by(Job.run_after).limit(limit)
+            )
+            claimed: list[str] = []
+            for job_id in result.all():
+                # Compare-and-set so only one worker (in any process) wins each job.
+                outcome = await session.exec(
+                    update(Job)
+                    .where(Job.id == job_id)
+                    .where(_claimable(job_type, now))
+                    .values(
+                        status=JobStatus.RUNNING,
+                        locked_by=self.worker_id,
+                        locked_at=now,
+                        attempts=Job.attempts + 1,
+                    )
+                )
+                if outcome.rowcount == 1:
+                    claimed.append(job_id)
+            await session.commit()
+            if not claimed:
+                return []
+            result = await session.exec(select(Job).where(Job.id.in_(claimed)))
+            return list(result.all())
+
+    async def _execute(self, job_type: JobType, job: Job) -> None:
+        started = time.perf_counter()
+        try:
+            await job_type.handler(json.loads(job.payload))
+        except asyncio.CancelledError:
+            await self._finish(job, status=JobStatus.PENDING, attempts=job.attempts - 1)
+            raise
+        except Exception as exc:  # noqa: BLE001
+            _JOB_SECONDS.labels(job.job_type, 'error').observe(time.perf_counter() - started)
+            if job.attempts >= job.max_attempts:
+                await self._finish(job, status=JobStatus.FAILED, error=str(exc))
+                logger.error('jobs.failed', job_id=job.id, job_type=job.job_type, attempts=job.attempts, error=str(exc))
+            else:
+                delay = retry_delay(job.attempts)
+                await self._finish(
+                    job,
+                    status=JobStatus.PENDING,
+                    error=str(exc),
+                    run_after=_utc_now() + timedelta(seconds=delay),
+                )
+                logger.warning(
+                    'jobs.retry',
+                    job_id=job.id,
+                    job_type=job.job_type,
+                    attempts=job.attempts,
+                    delay_s=delay,
+                    error=str(exc),
+                )
+        else:
+            _JOB_SECONDS.labels(job.job_type, 'ok').observe(time.perf_counter() - started)
+            await self._finish(job, status=JobStatus.SUCCEEDED)
+            logger.info(
+                'jobs.done',
+                job_id=job.id,
+                job_type=job.job_type,
+                attempts=job.attempts,
+                elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+            )
+
+    async def _finish(
+        self,
+        job: Job,
+        *,
+        status: JobStatus,
+        error: Optional[str] = None,
+        run_after: Optional[datetime] = None,
+        attempts: Optional[int] = None,
+    ) -> None:
+        values: dict[str, Any] = {'status': status, 'locked_by': None, 'locked_at': None}
+        if error is not None:
+            values['last_error'] = error[:_MAX_ERROR_LEN]
+        if run_after is not None:
+            values['run_after'] = run_after
+        if attempts is not None:
+            values['attempts'] = attempts
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            # Only the lease holder may settle the job; a reclaimed job belongs to its new worker.
+            await session.exec(
+                update(Job).where(Job.id == job.id).where(Job.locked_by == self.worker_id).values(**values)
+            )
+            await session.commit()
+
+
+job_worker = JobWorker()
+
+
+_job_depth_refreshed_at = 0.0
+
+
+async def refresh_job_queue_metrics(session: AsyncSession) -> None:
+    global _job_depth_refreshed_at
+    now = time.monotonic()
+    if now - _job_depth_refreshed_at < settings.METRICS_JOB_DEPTH_CACHE_SECONDS:
+        return
+    _job_depth_refreshed_at = now
+    # The jobs table is shared, so depth is counted there rather than in this worker.
+    result = await session.exec(
+        select(Job.job_type, Job.status, func.count())
+        .where(Job.status.in_([JobStatus.PENDING, JobStatus.RUNNING]))
+        .group_by(Job.job_type, Job.status)
+    )
+    counts = {(job_type, JobStatus(status).value): total for job_type, status, total in result.all()}
+    _JOB_QUEUE_DEPTH.clear()
+    for name in {*_job_types, *(job_type for job_type, _ in counts)}:
+        for status in (JobStatus.PENDING.value, JobStatus.RUNNING.value):
+            _JOB_QUEUE_DEPTH.labels(name, status).set(counts.get((name, status), 0))
+
+
+def _collect_worker_metrics() -> None:
+    for name, running in job_worker.running_counts().items():
+        _JOB_RUNNING_LOCAL.labels(name).set(running)
+
+
+metrics.add_collector(_collect_worker_metrics)
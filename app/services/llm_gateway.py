@@ -2,12 +2,12 @@ from __future__ import annotations
 
 from collections.abc import AsyncGenerator
 
-import json
-
 from loguru import logger
 
 from app.core.env import get_env_value
 from app.core.providers import ProviderConfig, get_provider_registry
+from app.services.ai_debug_trace import digest_messages
+from app.services.ai_provider import get_openai_client
 
 try:
     from openai import AsyncOpenAI
@@ -25,7 +25,7 @@ class LLMGateway:
         api_key = get_env_value(provider.api_key_env)
         if not api_key:
             raise RuntimeError(f"{provider.api_key_env} is missing in environment or .env")
-        return AsyncOpenAI(api_key=api_key, base_url=provider.base_url)
+        return get_openai_client(provider.host, provider.base_url, api_key)
 
     async def stream_chat_completion(
         self,
@@ -34,14 +34,9 @@ class LLMGateway:
         messages: list[dict[str, str]],
     ) -> AsyncGenerator[str, None]:
         logger.info(
-            json.dumps(
-                {
-                    'event': 'llm_gateway.request',
-                    'model': model,
-                    'messages': messages,
-                },
-                ensure_ascii=False,
-            )
+            'llm_gateway.request',
+            model=model,
+            **digest_messages((message.get('role', ''), message.get('content') or '') for message in messages),
         )
         provider = self._registry.provider_for_model(model)
         client = self._build_client(provider)
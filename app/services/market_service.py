@@ -1,5 +1,8 @@
-from typing import Optional, Tuple
-from sqlalchemy import func
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Sequence, Tuple
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 from app.models.skill_favorite import SkillFavorite
 from app.models.skill_rating import SkillRating
@@ -7,8 +10,128 @@ from app.models.skill_comment import SkillComment
 from app.models.skill_comment_reply import SkillCommentReply
 from app.models.skill_comment_like import SkillCommentLike
 from app.models.skill import Skill
+from app.models.skill_stats import SkillStats
 from app.models.enums import SkillVisibility
-from app.services.skill_service import list_skills
+from app.services.pagination import Cursor, paginate
+
+_REPAIR_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class SkillMarketStats:
+    favorites_count: int = 0
+    rating_average: float = 0.0
+    rating_count: int = 0
+    comments_count: int = 0
+
+
+def _to_market_stats(record: Optional[SkillStats]) -> SkillMarketStats:
+    if record is None:
+        return SkillMarketStats()
+    average = record.rating_sum / record.rating_count if record.rating_count else 0.0
+    return SkillMarketStats(
+        favorites_count=record.favorites_count,
+        rating_average=float(average),
+        rating_count=record.rating_count,
+        comments_count=record.comments_count,
+    )
+
+
+def _aggregate_skill_stats(session: Session, skill_ids: Sequence[str]) -> dict[str, tuple[int, int, int, int]]:
+    ids = list(dict.fromkeys(skill_ids))
+    if not ids:
+        return {}
+    favorites = (
+        select(SkillFavorite.skill_id, func.count(SkillFavorite.id).label('favorites_count'))
+        .where(SkillFavorite.skill_id.in_(ids))
+        .group_by(SkillFavorite.skill_id)
+        .subquery()
+    )
+    ratings = (
+        select(
+            SkillRating.skill_id,
+            func.sum(SkillRating.rating).label('rating_sum'),
+            func.count(SkillRating.id).label('rating_count'),
+        )
+        .where(SkillRating.skill_id.in_(ids))
+        .group_by(SkillRating.skill_id)
+        .subquery()
+    )
+    comments = (
+        select(SkillComment.skill_id, func.count(SkillComment.id).label('comments_count'))
+        .where(SkillComment.skill_id.in_(ids))
+        .group_by(SkillComment.skill_id)
+        .subquery()
+    )
+    statement = (
+        select(
+            Skill.id,
+            favorites.c.favorites_count,
+            ratings.c.rating_sum,
+            ratings.c.rating_count,
+            comments.c.comments_count,
+        )
+        .outerjoin(favorites, favorites.c.skill_id == Skill.id)
+        .outerjoin(ratings, ratings.c.skill_id == Skill.id)
+        .outerjoin(comments, comments.c.skill_id == Skill.id)
+        .where(Skill.id.in_(ids))
+    )
+    aggregates = {skill_id: (0, 0, 0, 0) for skill_id in ids}
+    for skill_id, favorites_count, rating_sum, rating_count, comments_count in session.exec(statement).all():
+        aggregates[skill_id] = (
+            int(favorites_count or 0),
+            int(rating_sum or 0),
+            int(rating_count or 0),
+            int(comments_count or 0),
+        )
+    return aggregates
+
+
+def _insert_skill_stats(session: Session, skill_id: str) -> bool:
+    session.flush()
+    favorites_count, rating_sum, rating_count, comments_count = _aggregate_skill_stats(session, [skill_id])[skill_id]
+    try:
+        with session.begin_nested():
+            session.add(
+                SkillStats(
+                    skill_id=skill_id,
+                    favorites_count=favorites_count,
+                    rating_sum=rating_sum,
+                    rating_count=rating_count,
+                    comments_count=comments_count,
+                )
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def _bump_skill_stats(
+    session: Session,
+    skill_id: str,
+    *,
+    favorites: int = 0,
+    rating_sum: int = 0,
+    rating_count: int = 0,
+    comments: int = 0,
+) -> None:
+    statement = (
+        update(SkillStats)
+        .where(SkillStats.skill_id == skill_id)
+        .values(
+            favorites_count=SkillStats.favorites_count + favorites,
+            rating_sum=SkillStats.rating_sum + rating_sum,
+            rating_count=SkillStats.rating_count + rating_count,
+            comments_count=SkillStats.comments_count + comments,
+            updated_at=datetime.now(timezone.utc),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if session.exec(statement).rowcount:
+        return
+    # No row yet: seed it from the source tables, which already include this change.
+    if not _insert_skill_stats(session, skill_id):
+        session.exec(statement)
 
 
 def add_favorite(session: Session, user_id: str, skill_id: str) -> SkillFavorite:
@@ -21,6 +144,7 @@ def add_favorite(session: Session, user_id: str, skill_id: str) -> SkillFavorite
         return existing
     record = SkillFavorite(user_id=user_id, skill_id=skill_id)
     session.add(record)
+    _bump_skill_stats(session, skill_id, favorites=1)
     session.commit()
     session.refresh(record)
     return record
@@ -34,24 +158,27 @@ def remove_favorite(session: Session, user_id: str, skill_id: str) -> None:
     ).first()
     if record:
         session.delete(record)
+        _bump_skill_stats(session, skill_id, favorites=-1)
         session.commit()
 
 
-def list_favorites(session: Session, user_id: str, limit:Optional[int] = 50, offset: int = 0) -> list[SkillFavorite]:
-    statement = select(SkillFavorite).where(SkillFavorite.user_id == user_id)
-    if offset:
-        statement = statement.offset(offset)
-    if limit is not None:
-        statement = statement.limit(limit)
+def list_favorites(
+    session: Session,
+    user_id: str,
+    limit:Optional[int] = 50,
+    offset: int = 0,
+    cursor:Optional[Cursor] = None,
+) -> list[SkillFavorite]:
+    statement = paginate(
+        select(SkillFavorite).where(SkillFavorite.user_id == user_id),
+        SkillFavorite,
+        cursor=cursor,
+        limit=limit,
+        offset=offset,
+    )
     return list(session.exec(statement).all())
 
 
-def count_favorites(session: Session, skill_id: str) -> int:
-    statement = select(func.count(SkillFavorite.id)).where(SkillFavorite.skill_id == skill_id)
-    result = session.exec(statement).one()
-    return int(result or 0)
-
-
 def upsert_rating(session: Session, user_id: str, skill_id: str, rating: int) -> SkillRating:
     record = session.exec(
         select(SkillRating).where(
@@ -59,13 +186,17 @@ def upsert_rating(session: Session, user_id: str, skill_id: str, rating: int) ->
         )
     ).first()
     if record:
+        delta = rating - record.rating
         record.rating = rating
         session.add(record)
+        if delta:
+            _bump_skill_stats(session, skill_id, rating_sum=delta)
         session.commit()
         session.refresh(record)
         return record
     record = SkillRating(user_id=user_id, skill_id=skill_id, rating=rating)
     session.add(record)
+    _bump_skill_stats(session, skill_id, rating_sum=rating, rating_count=1)
     session.commit()
     session.refresh(record)
     return record
@@ -79,44 +210,30 @@ def get_user_rating(session: Session, user_id: str, skill_id: str) ->Optional[Sk
     ).first()
 
 
-def get_rating_summary(session: Session, skill_id: str) -> tuple[float, int]:
-    statement = select(func.avg(SkillRating.rating), func.count(SkillRating.id)).where(
-        SkillRating.skill_id == skill_id
-    )
-    avg, count = session.exec(statement).one()
-    average_value = float(avg or 0)
-    return average_value, int(count or 0)
-
-
 def add_comment(session: Session, user_id: str, skill_id: str, content: str) -> SkillComment:
     record = SkillComment(user_id=user_id, skill_id=skill_id, content=content)
     session.add(record)
+    _bump_skill_stats(session, skill_id, comments=1)
     session.commit()
     session.refresh(record)
     return record
 
 
-def count_comments(session: Session, skill_id: str) -> int:
-    statement = select(func.count(SkillComment.id)).where(SkillComment.skill_id == skill_id)
-    result = session.exec(statement).one()
-    return int(result or 0)
-
-
 def list_comments(
     session: Session,
     skill_id: str,
     limit:Optional[int] = 50,
     offset: int = 0,
+    cursor:Optional[Cursor] = None,
 ) -> list[SkillComment]:
-    statement = (
-        select(SkillComment)
-        .where(SkillComment.skill_id == skill_id)
-        .order_by(SkillComment.created_at.desc())
+    statement = paginate(
+        select(SkillComment).where(SkillComment.skill_id == skill_id),
+        SkillComment,
+        cursor=cursor,
+        limit=limit,
+        offset=offset,
+        descending=True,
     )
-    if offset:
-        statement = statement.offset(offset)
-    if limit is not None:
-        statement = statement.limit(limit)
     return list(session.exec(statement).all())
 
 
@@ -124,8 +241,80 @@ def get_comment(session: Session, comment_id: str) ->Optional[SkillComment]:
     return session.exec(select(SkillComment).where(SkillComment.id == comment_id)).first()
 
 
-def list_market_skills(session: Session, limit: int = 50, offset: int = 0) -> list[Skill]:
-    return list_skills(session, visibility=SkillVisibility.PUBLIC, limit=limit, offset=offset)
+def list_market_skills_with_stats(
+    session: Session,
+    limit: int = 50,
+    offset: int = 0,
+    cursor: Optional[Cursor] = None,
+) -> list[tuple[Skill, SkillMarketStats]]:
+    statement = paginate(
+        select(Skill, SkillStats)
+        .outerjoin(SkillStats, SkillStats.skill_id == Skill.id)
+        .where(Skill.deleted.is_(False))
+        .where(Skill.visibility == SkillVisibility.PUBLIC),
+        Skill,
+        cursor=cursor,
+        limit=limit,
+        offset=offset,
+        descending=True,
+    )
+    return [(skill, _to_market_stats(stats)) for skill, stats in session.exec(statement).all()]
+
+
+def get_market_stats(session: Session, skill_ids: Sequence[str]) -> dict[str, SkillMarketStats]:
+    ids = list(dict.fromkeys(skill_ids))
+    if not ids:
+        return {}
+    records = session.exec(select(SkillStats).where(SkillStats.skill_id.in_(ids))).all()
+    stats = {skill_id: SkillMarketStats() for skill_id in ids}
+    for record in records:
+        stats[record.skill_id] = _to_market_stats(record)
+    return stats
+
+
+def get_skill_market_stats(session: Session, skill_id: str) -> SkillMarketStats:
+    return get_market_stats(session, [skill_id])[skill_id]
+
+
+def repair_skill_stats(session: Session, dry_run: bool = False, batch_size: int = _REPAIR_BATCH_SIZE) -> int:
+    repaired = 0
+    last_id: Optional[str] = None
+    while True:
+        statement = select(Skill.id).order_by(Skill.id).limit(batch_size)
+        if last_id is not None:
+            statement = statement.where(Skill.id > last_id)
+        skill_ids = list(session.exec(statement).all())
+        if not skill_ids:
+            break
+        last_id = skill_ids[-1]
+        expected = _aggregate_skill_stats(session, skill_ids)
+        existing = {
+            record.skill_id: record
+            for record in session.exec(select(SkillStats).where(SkillStats.skill_id.in_(skill_ids))).all()
+        }
+        for skill_id, (favorites_count, rating_sum, rating_count, comments_count) in expected.items():
+            record = existing.get(skill_id)
+            current = (
+                (record.favorites_count, record.rating_sum, record.rating_count, record.comments_count)
+                if record
+                else None
+            )
+            if current == (favorites_count, rating_sum, rating_count, comments_count):
+                continue
+            if current is None and not any((favorites_count, rating_sum, rating_count, comments_count)):
+                continue
+            repaired += 1
+            if dry_run:
+                continue
+            record = record or SkillStats(skill_id=skill_id)
+            record.favorites_count = favorites_count
+            record.rating_sum = rating_sum
+            record.rating_count = rating_count
+            record.comments_count = comments_count
+            session.add(record)
+        if not dry_run:
+            session.commit()
+    return repaired
 
 
 def add_comment_reply(
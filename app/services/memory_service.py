@@ -2,6 +2,7 @@ from typing import Optional
 from sqlmodel import Session, select
 from app.models.memory_item import MemoryItem
 from app.schemas.memory import MemoryCreate, MemoryUpdate
+from app.services.pagination import Cursor, paginate
 
 
 def upsert_memory(session: Session, user_id: str, payload: MemoryCreate) -> MemoryItem:
@@ -36,14 +37,12 @@ def list_memories(
     scope:Optional[str] = None,
     limit:Optional[int] = 50,
     offset: int = 0,
+    cursor:Optional[Cursor] = None,
 ) -> list[MemoryItem]:
     statement = select(MemoryItem).where(MemoryItem.user_id == user_id)
     if scope is not None:
         statement = statement.where(MemoryItem.scope == scope)
-    if offset:
-        statement = statement.offset(offset)
-    if limit is not None:
-        statement = statement.limit(limit)
+    statement = paginate(statement, MemoryItem, cursor=cursor, limit=limit, offset=offset)
     return list(session.exec(statement).all())
 
 
@@ -2,6 +2,7 @@ from typing import Optional
 from sqlmodel import Session, select
 from app.models.notification import Notification
 from app.schemas.notification import NotificationCreate, NotificationUpdate
+from app.services.pagination import Cursor, paginate
 
 
 def create_notification(session: Session, user_id: str, payload: NotificationCreate) -> Notification:
@@ -18,14 +19,12 @@ def list_notifications(
     unread_only: bool = False,
     limit:Optional[int] = 50,
     offset: int = 0,
+    cursor:Optional[Cursor] = None,
 ) -> list[Notification]:
     statement = select(Notification).where(Notification.user_id == user_id)
     if unread_only:
         statement = statement.where(Notification.read.is_(False))
-    if offset:
-        statement = statement.offset(offset)
-    if limit is not None:
-        statement = statement.limit(limit)
+    statement = paginate(statement, Notification, cursor=cursor, limit=limit, offset=offset)
     return list(session.exec(statement).all())
 
 
@@ -0,0 +1,62 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, or_
+
+
+@dataclass(frozen=True)
+class Cursor:
+    created_at: datetime
+    id: str
+
+
+def encode_cursor(record) -> str:
+    raw = json.dumps({'created_at': record.created_at.isoformat(), 'id': record.id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(raw: str) -> Cursor:
+    try:
+        padded = raw + '=' * (-len(raw) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return Cursor(created_at=datetime.fromisoformat(data['created_at']), id=str(data['id']))
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
+def paginate(
+    statement,
+    model,
+    *,
+    cursor: Optional[Cursor],
+    limit: Optional[int],
+    offset: int = 0,
+    descending: bool = False,
+):
+    if descending:
+        statement = statement.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        statement = statement.order_by(model.created_at.asc(), model.id.asc())
+    if cursor is not None:
+        # Keyset seek: rows strictly after the cursor in (created_at, id) order; offset is ignored.
+        if descending:
+            after = or_(
+                model.created_at < cursor.created_at,
+                and_(model.created_at == cursor.created_at, model.id < cursor.id),
+            )
+        else:
+            after = or_(
+                model.created_at > cursor.created_at,
+                and_(model.created_at == cursor.created_at, model.id > cursor.id),
+            )
+        statement = statement.where(after)
+    elif offset:
+        statement = statement.offset(offset)
+    if limit is not None:
+        statement = statement.limit(limit)
+    return statement
+
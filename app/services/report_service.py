@@ -4,6 +4,7 @@ from sqlmodel import Session, select
 from app.models.report import Report
 from app.models.enums import ReportStatus
 from app.schemas.report import ReportCreate, ReportUpdate
+from app.services.pagination import Cursor, paginate
 from app.services.skill_service import get_skill, soft_delete_skill
 
 
@@ -32,14 +33,12 @@ def list_reports(
     status:Optional[ReportStatus] = None,
     limit:Optional[int] = 50,
     offset: int = 0,
+    cursor:Optional[Cursor] = None,
 ) -> list[Report]:
     statement = select(Report).where(Report.user_id == user_id)
     if status is not None:
         statement = statement.where(Report.status == status)
-    if offset:
-        statement = statement.offset(offset)
-    if limit is not None:
-        statement = statement.limit(limit)
+    statement = paginate(statement, Report, cursor=cursor, limit=limit, offset=offset)
     return list(session.exec(statement).all())
 
 
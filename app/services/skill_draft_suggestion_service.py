@@ -1,37 +1,72 @@
 from typing import Optional
 
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.models.enums import SkillSuggestionStatus
 from app.models.skill_draft_suggestion import SkillDraftSuggestion
 
 
+def _list_statement(session_id: str, status: Optional[SkillSuggestionStatus]):
+    statement = select(SkillDraftSuggestion).where(SkillDraftSuggestion.session_id == session_id)
+    if status is not None:
+        statement = statement.where(SkillDraftSuggestion.status == status)
+    return statement.order_by(SkillDraftSuggestion.created_at.asc())
+
+
 def list_skill_draft_suggestions(
     session: Session,
     session_id: str,
     status: Optional[SkillSuggestionStatus] = None,
 ) -> list[SkillDraftSuggestion]:
-    statement = select(SkillDraftSuggestion).where(SkillDraftSuggestion.session_id == session_id)
-    if status is not None:
-        statement = statement.where(SkillDraftSuggestion.status == status)
-    statement = statement.order_by(SkillDraftSuggestion.created_at.asc())
-    return list(session.exec(statement).all())
+    return list(session.exec(_list_statement(session_id, status)).all())
+
+
+async def list_skill_draft_suggestions_async(
+    session: AsyncSession,
+    session_id: str,
+    status: Optional[SkillSuggestionStatus] = None,
+) -> list[SkillDraftSuggestion]:
+    result = await session.exec(_list_statement(session_id, status))
+    return list(result.all())
 
 
 def get_skill_draft_suggestion(session: Session, suggestion_id: str) -> Optional[SkillDraftSuggestion]:
     return session.exec(select(SkillDraftSuggestion).where(SkillDraftSuggestion.id == suggestion_id)).first()
 
 
+async def get_skill_draft_suggestion_async(
+    session: AsyncSession,
+    suggestion_id: str,
+) -> Optional[SkillDraftSuggestion]:
+    result = await session.exec(select(SkillDraftSuggestion).where(SkillDraftSuggestion.id == suggestion_id))
+    return result.first()
+
+
+def _rejection_statement(session_id: str):
+    return select(SkillDraftSuggestion).where(
+        (SkillDraftSuggestion.session_id == session_id)
+        & (SkillDraftSuggestion.status == SkillSuggestionStatus.REJECTED)
+    )
+
+
 def has_draft_rejection(session: Session, session_id: str) -> bool:
-    record = session.exec(
-        select(SkillDraftSuggestion).where(
-            (SkillDraftSuggestion.session_id == session_id)
-            & (SkillDraftSuggestion.status == SkillSuggestionStatus.REJECTED)
-        )
-    ).first()
+    record = session.exec(_rejection_statement(session_id)).first()
     return record is not None
 
 
+async def has_draft_rejection_async(session: AsyncSession, session_id: str) -> bool:
+    result = await session.exec(_rejection_statement(session_id))
+    return result.first() is not None
+
+
+def _existing_statement(session_id: str, message_id: str):
+    return select(SkillDraftSuggestion).where(
+        (SkillDraftSuggestion.session_id == session_id)
+        & (SkillDraftSuggestion.message_id == message_id)
+    )
+
+
 def create_skill_draft_suggestion(
     session: Session,
     session_id: str,
@@ -42,12 +77,7 @@ def create_skill_draft_suggestion(
 ) -> SkillDraftSuggestion:
     existing = None
     if message_id:
-        existing = session.exec(
-            select(SkillDraftSuggestion).where(
-                (SkillDraftSuggestion.session_id == session_id)
-                & (SkillDraftSuggestion.message_id == message_id)
-            )
-        ).first()
+        existing = session.exec(_existing_statement(session_id, message_id)).first()
     if existing:
         if reason and not existing.reason:
             existing.reason = reason
@@ -68,6 +98,38 @@ def create_skill_draft_suggestion(
     return record
 
 
+async def create_skill_draft_suggestion_async(
+    session: AsyncSession,
+    session_id: str,
+    message_id: Optional[str],
+    goal: str,
+    constraints: Optional[str] = None,
+    reason: Optional[str] = None,
+) -> SkillDraftSuggestion:
+    existing = None
+    if message_id:
+        result = await session.exec(_existing_statement(session_id, message_id))
+        existing = result.first()
+    if existing:
+        if reason and not existing.reason:
+            existing.reason = reason
+            session.add(existing)
+            await session.commit()
+            await session.refresh(existing)
+        return existing
+    record = SkillDraftSuggestion(
+        session_id=session_id,
+        message_id=message_id,
+        goal=goal,
+        constraints=constraints,
+        reason=reason,
+    )
+    session.add(record)
+    await session.commit()
+    await session.refresh(record)
+    return record
+
+
 def update_skill_draft_suggestion(
     session: Session,
     suggestion: SkillDraftSuggestion,
@@ -81,3 +143,18 @@ def update_skill_draft_suggestion(
     session.commit()
     session.refresh(suggestion)
     return suggestion
+
+
+async def update_skill_draft_suggestion_async(
+    session: AsyncSession,
+    suggestion: SkillDraftSuggestion,
+    status: SkillSuggestionStatus,
+    created_skill_id: Optional[str] = None,
+) -> SkillDraftSuggestion:
+    suggestion.status = status
+    if created_skill_id:
+        suggestion.created_skill_id = created_skill_id
+    session.add(suggestion)
+    await session.commit()
+    await session.refresh(suggestion)
+    return suggestion
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.mysql import match
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.skill import Skill
+from app.models.skill_search_document import SkillSearchDocument
+from app.models.skill_version import SkillVersion
+from app.services.skill_search_index import SearchEntry, skill_search_index
+
+# Documents committed slightly out of timestamp order are fetched again rather than missed.
+_SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def build_search_document(skill: Skill, tags: list[str], version: SkillVersion) -> SkillSearchDocument:
+    return SkillSearchDocument(
+        skill_id=skill.id,
+        version=version.version,
+        name=skill.name,
+        description=skill.description,
+        tags=' '.join(tags),
+        content=version.content,
+    )
+
+
+def upsert_search_document(
+    session: Session,
+    skill: Skill,
+    tags: list[str],
+    version: Optional[SkillVersion] = None,
+) -> None:
+    record = session.get(SkillSearchDocument, skill.id)
+    if record is None:
+        if version is None:
+            version = session.exec(
+                select(SkillVersion)
+                .where(SkillVersion.skill_id == skill.id)
+                .order_by(SkillVersion.version.desc())
+                .limit(1)
+            ).first()
+        if version is None:
+            return
+        session.add(build_search_document(skill, tags, version))
+        return
+    record.name = skill.name
+    record.description = skill.description
+    record.tags = ' '.join(tags)
+    if version is not None and version.version >= record.version:
+        record.version = version.version
+        record.content = version.content
+    session.add(record)
+
+
+def remove_search_document(session: Session, skill_id: str) -> None:
+    record = session.get(SkillSearchDocument, skill_id)
+    if record is not None:
+        session.delete(record)
+
+
+def _search_fulltext(session: Session, q: str, limit: int, offset: int) -> list[Skill]:
+    score = match(
+        SkillSearchDocument.name,
+        SkillSearchDocument.description,
+        SkillSearchDocument.tags,
+        SkillSearchDocument.content,
+        against=q,
+    ).in_natural_language_mode()
+    statement = (
+        select(Skill)
+        .join(SkillSearchDocument, SkillSearchDocument.skill_id == Skill.id)
+        .where(Skill.deleted.is_(False))
+        .where(score > 0)
+        .order_by(score.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return list(session.exec(statement).all())
+
+
+def _search_index(session: Session, q: str, limit: int, offset: int) -> list[Skill]:
+    skill_ids = skill_search_index.search(q, limit=limit, offset=offset)
+    if not skill_ids:
+        return []
+    statement = select(Skill).where(Skill.id.in_(skill_ids)).where(Skill.deleted.is_(False))
+    skills = {skill.id: skill for skill in session.exec(statement).all()}
+    return [skills[skill_id] for skill_id in skill_ids if skill_id in skills]
+
+
+def _live_documents():
+    return select(SkillSearchDocument).join(Skill, Skill.id == SkillSearchDocument.skill_id).where(
+        Skill.deleted.is_(False)
+    )
+
+
+def _to_entry(row: SkillSearchDocument) -> SearchEntry:
+    return SearchEntry(
+        skill_id=row.skill_id,
+        name=row.name,
+        description=row.description,
+        tags=row.tags,
+        content=row.content,
+    )
+
+
+def _newest(rows) -> Optional[datetime]:
+    return max((row.updated_at for row in rows), default=None)
+
+
+def rebuild_index(session: Session) -> int:
+    rows = session.exec(_live_documents()).all()
+    skill_search_index.rebuild([_to_entry(row) for row in rows], _newest(rows))
+    return len(rows)
+
+
+def refresh_index(session: Session) -> None:
+    # Other workers only update the shared documents table. Rows changed since the last sync are applied
+    # again, this process's own writes included, so edits never force a rebuild; a row count that no
+    # longer matches means documents were removed elsewhere, and only then is the index rebuilt.
+    if (
+        skill_search_index.ready
+        and time.monotonic() - skill_search_index.checked_at < settings.SKILL_SEARCH_INDEX_CHECK_SECONDS
+    ):
+        return
+    synced_through = skill_search_index.synced_through
+    if not skill_search_index.ready or synced_through is None:
+        rebuild_index(session)
+        return
+    changed = _live_documents().where(SkillSearchDocument.updated_at >= synced_through - _SYNC_OVERLAP)
+    rows = session.exec(changed).all()
+    skill_search_index.apply([_to_entry(row) for row in rows], _newest(rows))
+    count = session.exec(select(func.count()).select_from(_live_documents().subquery())).one()
+    if count != len(skill_search_index):
+        rebuild_index(session)
+
+
+def use_fulltext(session: Session) -> bool:
+    backend = settings.SKILL_SEARCH_BACKEND
+    if backend == 'auto':
+        return session.get_bind().dialect.name == 'mysql'
+    return backend == 'fulltext'
+
+
+def search_skills(session: Session, q: str, limit: int = 50, offset: int = 0) -> list[Skill]:
+    if not q.strip():
+        return []
+    if use_fulltext(session):
+        return _search_fulltext(session, q, limit, offset)
+    refresh_index(session)
+    return _search_index(session, q, limit, offset)
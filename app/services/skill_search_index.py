@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+|[㐀-䶿一-鿿]+')
+_CJK_PATTERN = re.compile(r'[㐀-䶿一-鿿]')
+
+# Matches in the name or tags say more about a skill than a mention deep in its SKILL.md.
+_FIELD_WEIGHTS = {
+    'name': 3.0,
+    'tags': 2.0,
+    'description': 2.0,
+    'content': 1.0,
+}
+
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    tokens: list[str] = []
+    for run in _TOKEN_PATTERN.findall(text.lower()):
+        if not _CJK_PATTERN.match(run):
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[index : index + 2] for index in range(len(run) - 1))
+    return tokens
+
+
+@dataclass
+class SearchEntry:
+    skill_id: str
+    name: str = ''
+    description: str = ''
+    tags: str = ''
+    content: str = ''
+    term_freqs: dict[str, float] = field(default_factory=dict)
+    length: float = 0.0
+
+    def reindex(self) -> None:
+        freqs: Counter[str] = Counter()
+        for name, weight in _FIELD_WEIGHTS.items():
+            for token in tokenize(getattr(self, name)):
+                freqs[token] += weight
+        self.term_freqs = dict(freqs)
+        self.length = sum(freqs.values())
+
+
+class SkillSearchIndex:
+    def __init__(self) -> None:
+        self._entries: dict[str, SearchEntry] = {}
+        self._postings: dict[str, dict[str, float]] = {}
+        self._total_length = 0.0
+        self._ready = False
+        self._lock = threading.Lock()
+        # Newest document update applied from the database, and when the table was last compared.
+        self.synced_through: Optional[datetime] = None
+        self.checked_at = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rebuild(self, entries: Iterable[SearchEntry], synced_through: Optional[datetime] = None) -> None:
+        entries_by_id: dict[str, SearchEntry] = {}
+        postings: dict[str, dict[str, float]] = {}
+        total_length = 0.0
+        for entry in entries:
+            entry.reindex()
+            entries_by_id[entry.skill_id] = entry
+            total_length += entry.length
+            for term, freq in entry.term_freqs.items():
+                postings.setdefault(term, {})[entry.skill_id] = freq
+        # Built outside the lock so searches keep using the old index until the swap.
+        with self._lock:
+            self._entries = entries_by_id
+            self._postings = postings
+            self._total_length = total_length
+            self._ready = True
+            self.synced_through = synced_through
+            self.checked_at = time.monotonic()
+
+    def apply(self, entries: Iterable[SearchEntry], synced_through: Optional[datetime]) -> None:
+        prepared = list(entries)
+        for entry in prepared:
+            entry.reindex()
+        with self._lock:
+            for entry in prepared:
+                self._remove(entry.skill_id)
+                self._add(entry)
+            if synced_through is not None and (self.synced_through is None or synced_through > self.synced_through):
+                self.synced_through = synced_through
+            self.checked_at = time.monotonic()
+
+    def upsert(
+        self,
+        skill_id: str,
+        *,
+        name: str,
+        description: str,
+        tags: list[str],
+        content: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            previous = self._remove(skill_id)
+            if content is None:
+                content = previous.content if previous else ''
+            entry = SearchEntry(
+                skill_id=skill_id,
+                name=name,
+                description=description,
+                tags=' '.join(tags),
+                content=content,
+            )
+            entry.reindex()
+            self._add(entry)
+
+    def update_content(self, skill_id: str, content: str) -> None:
+        with self._lock:
+            entry = self._remove(skill_id)
+            if entry is None:
+                return
+            entry.content = content
+            entry.reindex()
+            self._add(entry)
+
+    def remove(self, skill_id: str) -> None:
+        with self._lock:
+            self._remove(skill_id)
+
+    def search(self, q: str, limit: int = 50, offset: int = 0) -> list[str]:
+        query_terms = set(tokenize(q))
+        if not query_terms:
+            return []
+        with self._lock:
+            total = len(self._entries)
+            if not total:
+                return []
+            average_length = self._total_length / total or 1.0
+            scores: dict[str, float] = {}
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for skill_id, freq in postings.items():
+                    norm = 1 - _BM25_B + _BM25_B * self._entries[skill_id].length / average_length
+                    score = idf * freq * (_BM25_K1 + 1) / (freq + _BM25_K1 * norm)
+                    scores[skill_id] = scores.get(skill_id, 0.0) + score
+        ranked = sorted(scores, key=lambda skill_id: (-scores[skill_id], skill_id))
+        return ranked[offset : offset + limit]
+
+    def _add(self, entry: SearchEntry) -> None:
+        self._entries[entry.skill_id] = entry
+        self._total_length += entry.length
+        for term, freq in entry.term_freqs.items():
+            self._postings.setdefault(term, {})[entry.skill_id] = freq
+
+    def _remove(self, skill_id: str) -> Optional[SearchEntry]:
+        entry = self._entries.pop(skill_id, None)
+        if entry is None:
+            return None
+        self._total_length -= entry.length
+        for term in entry.term_freqs:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(skill_id, None)
+            if not postings:
+                del self._postings[term]
+        return entry
+
+
+skill_search_index = SkillSearchIndex()
@@ -3,10 +3,15 @@ import json
 from datetime import datetime, timezone
 from typing import Iterable
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.skill import Skill
 from app.models.enums import SkillVisibility
 from app.models.skill_version import SkillVersion
 from app.schemas.skill import SkillCreate, SkillImport, SkillUpdate
+from app.services import skill_search
+from app.services.pagination import Cursor, paginate
+from app.services.skill_search_index import skill_search_index
+from app.services.skill_summary_cache import skill_summary_cache
 
 
 def _serialize_tags(tags:Optional[list[str]]) ->Optional[str]:
@@ -31,6 +36,23 @@ def skill_tags_to_list(skill: Skill) -> list[str]:
     return _deserialize_tags(skill.tags)
 
 
+def _index_skill(skill: Skill, content: Optional[str] = None) -> None:
+    skill_search_index.upsert(
+        skill.id,
+        name=skill.name,
+        description=skill.description,
+        tags=skill_tags_to_list(skill),
+        content=content,
+    )
+
+
+def _invalidate_skill_summaries(skill: Skill, was_public: bool = False) -> None:
+    skill_summary_cache.invalidate(
+        owner_id=skill.owner_id,
+        public=was_public or skill.visibility == SkillVisibility.PUBLIC,
+    )
+
+
 def create_skill(session: Session, payload: SkillCreate, owner_id:Optional[str]) -> tuple[Skill, SkillVersion]:
     skill = Skill(
         name=payload.name,
@@ -52,8 +74,45 @@ def create_skill(session: Session, payload: SkillCreate, owner_id:Optional[str])
         parent_version_id=None,
     )
     session.add(version)
+    session.add(skill_search.build_search_document(skill, payload.tags or [], version))
     session.commit()
     session.refresh(version)
+    _index_skill(skill, version.content)
+    _invalidate_skill_summaries(skill)
+
+    return skill, version
+
+
+async def create_skill_async(
+    session: AsyncSession,
+    payload: SkillCreate,
+    owner_id: Optional[str],
+) -> tuple[Skill, SkillVersion]:
+    skill = Skill(
+        name=payload.name,
+        description=payload.description,
+        visibility=payload.visibility,
+        tags=_serialize_tags(payload.tags),
+        avatar=payload.avatar,
+        owner_id=owner_id,
+    )
+    session.add(skill)
+    await session.commit()
+    await session.refresh(skill)
+
+    version = SkillVersion(
+        skill_id=skill.id,
+        version=1,
+        content=payload.content,
+        created_by=owner_id,
+        parent_version_id=None,
+    )
+    session.add(version)
+    session.add(skill_search.build_search_document(skill, payload.tags or [], version))
+    await session.commit()
+    await session.refresh(version)
+    _index_skill(skill, version.content)
+    _invalidate_skill_summaries(skill)
 
     return skill, version
 
@@ -67,6 +126,7 @@ def list_skills(
     include_deleted: bool = False,
     limit: int = 50,
     offset: int = 0,
+    cursor:Optional[Cursor] = None,
 ) -> list[Skill]:
     statement = select(Skill)
     if not include_deleted:
@@ -81,18 +141,32 @@ def list_skills(
             statement = statement.where(Skill.tags.like(f"%{tag}%"))
     if owner_id:
         statement = statement.where(Skill.owner_id == owner_id)
-    statement = statement.offset(offset).limit(limit)
+    statement = paginate(statement, Skill, cursor=cursor, limit=limit, offset=offset)
     return list(session.exec(statement).all())
 
 
-def get_skill(session: Session, skill_id: str, include_deleted: bool = False) ->Optional[Skill]:
+def _get_skill_statement(skill_id: str, include_deleted: bool):
     statement = select(Skill).where(Skill.id == skill_id)
     if not include_deleted:
         statement = statement.where(Skill.deleted.is_(False))
-    return session.exec(statement).first()
+    return statement
+
+
+def get_skill(session: Session, skill_id: str, include_deleted: bool = False) ->Optional[Skill]:
+    return session.exec(_get_skill_statement(skill_id, include_deleted)).first()
+
+
+async def get_skill_async(
+    session: AsyncSession,
+    skill_id: str,
+    include_deleted: bool = False,
+) -> Optional[Skill]:
+    result = await session.exec(_get_skill_statement(skill_id, include_deleted))
+    return result.first()
 
 
 def update_skill(session: Session, skill: Skill, payload: SkillUpdate) -> Skill:
+    was_public = skill.visibility == SkillVisibility.PUBLIC
     data = payload.model_dump(exclude_unset=True)
     if 'tags' in data:
         skill.tags = _serialize_tags(data['tags'])
@@ -100,8 +174,12 @@ def update_skill(session: Session, skill: Skill, payload: SkillUpdate) -> Skill:
     for key, value in data.items():
         setattr(skill, key, value)
     session.add(skill)
+    skill_search.upsert_search_document(session, skill, skill_tags_to_list(skill))
     session.commit()
     session.refresh(skill)
+    if not skill.deleted:
+        _index_skill(skill)
+    _invalidate_skill_summaries(skill, was_public)
     return skill
 
 
@@ -109,19 +187,30 @@ def soft_delete_skill(session: Session, skill: Skill) -> Skill:
     skill.deleted = True
     skill.deleted_at = datetime.now(timezone.utc)
     session.add(skill)
+    skill_search.remove_search_document(session, skill.id)
     session.commit()
     session.refresh(skill)
+    skill_search_index.remove(skill.id)
+    _invalidate_skill_summaries(skill)
     return skill
 
 
-def get_latest_version(session: Session, skill_id: str) ->Optional[SkillVersion]:
-    statement = (
+def _latest_version_statement(skill_id: str):
+    return (
         select(SkillVersion)
         .where(SkillVersion.skill_id == skill_id)
         .order_by(SkillVersion.version.desc())
         .limit(1)
     )
-    return session.exec(statement).first()
+
+
+def get_latest_version(session: Session, skill_id: str) ->Optional[SkillVersion]:
+    return session.exec(_latest_version_statement(skill_id)).first()
+
+
+async def get_latest_version_async(session: AsyncSession, skill_id: str) -> Optional[SkillVersion]:
+    result = await session.exec(_latest_version_statement(skill_id))
+    return result.first()
 
 
 def list_versions(
@@ -142,11 +231,19 @@ def list_versions(
     return list(session.exec(statement).all())
 
 
-def get_version(session: Session, skill_id: str, version: int) ->Optional[SkillVersion]:
-    statement = select(SkillVersion).where(
+def _version_statement(skill_id: str, version: int):
+    return select(SkillVersion).where(
         (SkillVersion.skill_id == skill_id) & (SkillVersion.version == version)
     )
-    return session.exec(statement).first()
+
+
+def get_version(session: Session, skill_id: str, version: int) ->Optional[SkillVersion]:
+    return session.exec(_version_statement(skill_id, version)).first()
+
+
+async def get_version_async(session: AsyncSession, skill_id: str, version: int) -> Optional[SkillVersion]:
+    result = await session.exec(_version_statement(skill_id, version))
+    return result.first()
 
 
 def create_version(
@@ -167,8 +264,12 @@ def create_version(
         parent_version_id=parent_id,
     )
     session.add(version)
+    skill = get_skill(session, skill_id, include_deleted=True)
+    if skill is not None and not skill.deleted:
+        skill_search.upsert_search_document(session, skill, skill_tags_to_list(skill), version)
     session.commit()
     session.refresh(version)
+    skill_search_index.update_content(skill_id, version.content)
     return version
 
 
@@ -212,8 +313,11 @@ def import_skill(session: Session, payload: SkillImport, owner_id:Optional[str])
             parent_version_id=None,
         )
         session.add(version)
+        session.add(skill_search.build_search_document(skill, payload.tags or [], version))
         session.commit()
         session.refresh(version)
+        _index_skill(skill, version.content)
+        _invalidate_skill_summaries(skill)
         return skill, version
 
     next_version = 1
@@ -230,26 +334,14 @@ def import_skill(session: Session, payload: SkillImport, owner_id:Optional[str])
                 parent_version_id=item.parent_version_id,
             )
         )
-    _apply_versions(session, skill.id, created_versions)
     latest = max(created_versions, key=lambda v: v.version)
+    session.add(skill_search.build_search_document(skill, payload.tags or [], latest))
+    _apply_versions(session, skill.id, created_versions)
     session.refresh(latest)
+    _index_skill(skill, latest.content)
+    _invalidate_skill_summaries(skill)
     return skill, latest
 
 
 def search_skills(session: Session, q: str, limit: int = 50, offset: int = 0) -> list[Skill]:
-    like = f"%{q}%"
-    statement = (
-        select(Skill)
-        .join(SkillVersion, SkillVersion.skill_id == Skill.id, isouter=True)
-        .where(Skill.deleted.is_(False))
-        .where(
-            (Skill.name.like(like))
-            | (Skill.description.like(like))
-            | (Skill.tags.like(like))
-            | (SkillVersion.content.like(like))
-        )
-        .distinct()
-        .offset(offset)
-        .limit(limit)
-    )
-    return list(session.exec(statement).all())
+    return skill_search.search_skills(session, q, limit=limit, offset=offset)
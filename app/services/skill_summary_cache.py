@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Optional
+
+from app.core.config import settings
+from app.services.skill_search_index import SearchEntry, SkillSearchIndex
+
+_MAX_USER_OVERLAYS = 1024
+
+
+@dataclass(frozen=True)
+class SkillSummaries:
+    items: list[dict]
+    payload: str
+    ids: frozenset[str]
+
+    def __bool__(self) -> bool:
+        return bool(self.items)
+
+    @cached_property
+    def index(self) -> SkillSearchIndex:
+        # Built on first use and kept for as long as this snapshot stays cached.
+        index = SkillSearchIndex()
+        index.rebuild(
+            SearchEntry(
+                skill_id=item['id'],
+                name=item.get('name') or '',
+                description=item.get('description') or '',
+                tags=' '.join(item.get('tags') or []),
+            )
+            for item in self.items
+        )
+        return index
+
+
+def build_summaries(items: list[dict]) -> SkillSummaries:
+    return SkillSummaries(
+        items=items,
+        payload=json.dumps(items, ensure_ascii=False),
+        ids=frozenset(item['id'] for item in items),
+    )
+
+
+def _merge(public: SkillSummaries, private: SkillSummaries) -> SkillSummaries:
+    if not private:
+        return public
+    if not public:
+        return private
+    items = public.items + [item for item in private.items if item['id'] not in public.ids]
+    if len(items) == len(public.items) + len(private.items):
+        # Both payloads are JSON arrays, so splice them instead of re-serialising every summary.
+        payload = f'{public.payload[:-1]},{private.payload[1:]}'
+    else:
+        payload = json.dumps(items, ensure_ascii=False)
+    return SkillSummaries(items=items, payload=payload, ids=public.ids | private.ids)
+
+
+@dataclass
+class _UserOverlay:
+    private: SkillSummaries
+    built_at: float
+    public_version: int = -1
+    combined: Optional[SkillSummaries] = None
+
+
+@dataclass
+class _PublicSnapshot:
+    summaries: SkillSummaries
+    built_at: float = field(default_factory=time.monotonic)
+
+
+class SkillSummaryCache:
+    def __init__(self) -> None:
+        self._public: Optional[_PublicSnapshot] = None
+        self._public_version = 0
+        self._overlays: OrderedDict[str, _UserOverlay] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def public_version(self) -> int:
+        return self._public_version
+
+    def _fresh(self, built_at: float) -> bool:
+        return time.monotonic() - built_at < settings.SKILL_SUMMARY_CACHE_TTL_SECONDS
+
+    def get_public(self) -> Optional[SkillSummaries]:
+        snapshot = self._public
+        if snapshot is None or not self._fresh(snapshot.built_at):
+            return None
+        return snapshot.summaries
+
+    def store_public(self, summaries: SkillSummaries, version: int) -> None:
+        with self._lock:
+            # Skip the store if a skill changed while the snapshot was being loaded.
+            if version == self._public_version:
+                self._public = _PublicSnapshot(summaries=summaries)
+
+    def get(self, user_id: str) -> Optional[SkillSummaries]:
+        public = self.get_public()
+        if public is None:
+            return None
+        with self._lock:
+            overlay = self._overlays.get(user_id)
+            if overlay is None or not self._fresh(overlay.built_at):
+                return None
+            self._overlays.move_to_end(user_id)
+            if overlay.combined is None or overlay.public_version != self._public_version:
+                overlay.combined = _merge(public, overlay.private)
+                overlay.public_version = self._public_version
+            return overlay.combined
+
+    def store_user(
+        self,
+        user_id: str,
+        private: SkillSummaries,
+        public: SkillSummaries,
+        version: int,
+    ) -> SkillSummaries:
+        combined = _merge(public, private)
+        with self._lock:
+            self._overlays[user_id] = _UserOverlay(
+                private=private,
+                built_at=time.monotonic(),
+                public_version=version,
+                combined=combined,
+            )
+            self._overlays.move_to_end(user_id)
+            while len(self._overlays) > _MAX_USER_OVERLAYS:
+                self._overlays.popitem(last=False)
+        return combined
+
+    def invalidate(self, owner_id: Optional[str] = None, public: bool = True) -> None:
+        with self._lock:
+            if public:
+                self._public = None
+                self._public_version += 1
+            if owner_id is not None:
+                self._overlays.pop(owner_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._public = None
+            self._public_version += 1
+            self._overlays.clear()
+
+
+skill_summary_cache = SkillSummaryCache()
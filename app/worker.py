@@ -0,0 +1,24 @@
+import asyncio
+
+from app.core.config import settings
+from app.core.logging import configure_logging
+from app.db.session import async_engine
+from app.services import ai_jobs  # noqa: F401
+from app.services.ai_provider import close_openai_clients
+from app.services.job_queue import job_worker
+
+configure_logging(settings.LOG_LEVEL)
+
+
+async def main() -> None:
+    job_worker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await job_worker.stop()
+        await close_openai_clients()
+        await async_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.providers import available_models
+from app.models.chat_message import ChatMessage
+from app.models.enums import ChatRole
+from app.models.user import User
+from app.services.ai_post_turn import analyze_post_turn
+from app.services.ai_skill_draft_suggestion import suggest_draft
+from app.services.ai_skill_suggestion import match_skill, resolve_match
+from app.services.ai_suggestion_common import draft_eligible, passes_common_gates
+from app.services.ai_types import AiDeps
+from app.services.skill_summary_cache import build_summaries
+
+DEFAULT_CASES = Path(__file__).with_name('post_turn_eval_cases.jsonl')
+
+
+def _load_cases(path: Path) -> list[dict]:
+    with path.open(encoding='utf-8') as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def _history(case: dict) -> list[ChatMessage]:
+    return [
+        ChatMessage(session_id='eval', role=ChatRole(item['role']), content=item['content'], skill_id=None)
+        for item in case.get('history', [])
+    ]
+
+
+async def _run_split(deps: AiDeps, case: dict, summaries, want_draft: bool) -> tuple[str | None, bool, int]:
+    history = _history(case)
+    calls = 0
+    skill_id = None
+    if summaries:
+        calls += 1
+        match = await match_skill(deps, prompt=case['prompt'], history=history, summaries=summaries)
+        match = resolve_match(match, prompt=case['prompt'], history=history, summaries=summaries, session_id='eval')
+        skill_id = match.skill_id if match else None
+    drafted = False
+    if want_draft:
+        calls += 1
+        draft = await suggest_draft(
+            deps,
+            prompt=case['prompt'],
+            history=history,
+            assistant_content=case['assistant_content'],
+        )
+        drafted = draft is not None
+    return skill_id, drafted, calls
+
+
+async def _run_merged(deps: AiDeps, case: dict, summaries, want_draft: bool) -> tuple[str | None, bool, int]:
+    outcome = await analyze_post_turn(
+        deps,
+        prompt=case['prompt'],
+        history=_history(case),
+        assistant_content=case['assistant_content'],
+        summaries=summaries,
+        want_draft=want_draft,
+    )
+    calls = 1 if summaries or want_draft else 0
+    return (outcome.match.skill_id if outcome.match else None), outcome.draft is not None, calls
+
+
+async def evaluate(cases: list[dict], model_id: str) -> dict[str, dict[str, float]]:
+    deps = AiDeps(
+        user=User(email='eval@example.com', hashed_password='x'),
+        session_id='eval',
+        model_id=model_id,
+        selected_skill_id=None,
+        skill_content_max_len=settings.SKILL_CONTENT_MAX_LEN,
+    )
+    totals = {
+        name: {'match_correct': 0, 'draft_correct': 0, 'calls': 0, 'seconds': 0.0}
+        for name in ('split', 'merged')
+    }
+    agree = 0
+    evaluated = 0
+    for case in cases:
+        if not passes_common_gates(deps, case['prompt'], case['assistant_content']):
+            continue
+        evaluated += 1
+        summaries = build_summaries(case.get('skills', []))
+        want_draft = draft_eligible(case['assistant_content'])
+        results = {}
+        for name, runner in (('split', _run_split), ('merged', _run_merged)):
+            started = time.perf_counter()
+            skill_id, drafted, calls = await runner(deps, case, summaries, want_draft)
+            totals[name]['seconds'] += time.perf_counter() - started
+            totals[name]['calls'] += calls
+            totals[name]['match_correct'] += int(skill_id == case.get('expected_skill_id'))
+            totals[name]['draft_correct'] += int(drafted == bool(case.get('expected_draft')))
+            results[name] = (skill_id, drafted)
+        agree += int(results['split'] == results['merged'])
+        print(f"{case.get('id', evaluated)}: split={results['split']} merged={results['merged']}")
+    for name, values in totals.items():
+        values['match_accuracy'] = values['match_correct'] / evaluated if evaluated else 0.0
+        values['draft_accuracy'] = values['draft_correct'] / evaluated if evaluated else 0.0
+    totals['agreement'] = {'rate': agree / evaluated if evaluated else 0.0, 'cases': evaluated}
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare split and merged post-turn skill analysis on labelled cases.')
+    parser.add_argument('--cases', type=Path, default=DEFAULT_CASES, help='JSONL file of labelled turns')
+    parser.add_argument('--model', default=None, help='Model id to evaluate (defaults to the first configured model)')
+    args = parser.parse_args()
+
+    model_id = args.model or available_models()[0]['id']
+    totals = asyncio.run(evaluate(_load_cases(args.cases), model_id))
+    print(json.dumps(totals, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import argparse
+
+from sqlmodel import Session
+
+from app.db.session import engine
+from app.services.market_service import repair_skill_stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Recompute skill_stats rows that drifted from source tables.')
+    parser.add_argument('--dry-run', action='store_true', help='Report drift only, do not write to DB')
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        repaired = repair_skill_stats(session, dry_run=args.dry_run)
+    if args.dry_run:
+        print(f"skill stats drift: {repaired} rows")
+        return
+    print(f"repaired skill stats: {repaired} rows")
+
+
+if __name__ == '__main__':
+    main()
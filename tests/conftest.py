@@ -25,6 +25,7 @@ TEST_DB_URL = os.getenv("TEST_DB_URL", DEFAULT_TEST_DB_URL)
 os.environ["DATABASE_URL"] = TEST_DB_URL
 os.environ.setdefault("OPENAI_API_KEY", "test")
 
+from app.core import config
 from app.core.config import settings
 from app.core.providers import reset_provider_registry
 from app.db.init_db import init_db
@@ -83,6 +84,12 @@ def _configure_providers():
         reset_provider_registry()
 
 
+@pytest.fixture(autouse=True)
+def _isolate_ai_debug_log(tmp_path, monkeypatch):
+    # Debug traces hold full chat payloads; keep them out of the working tree.
+    monkeypatch.setattr(config, "AI_DEBUG_LOG_PATH", tmp_path / "ai-debug.jsonl")
+
+
 @pytest.fixture(autouse=True, scope="session")
 def _configure_test_database():
     _ensure_mysql_database(TEST_DB_URL)
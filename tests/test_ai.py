@@ -1,16 +1,24 @@
+import asyncio
 import json
 import os
 from contextlib import contextmanager
 from uuid import uuid4
 
+import anyio
 import pytest
 from fastapi.testclient import TestClient
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
 from app.core.providers import get_provider_registry, reset_provider_registry
 from app.db.init_db import init_db
+from app.db.session import async_engine, engine
 from app.main import app
 from app.api.v1 import ai as ai_module
+from app.models.chat_message import ChatMessage
+from app.models.enums import ChatMessageStatus
+from app.services.chat_service import checkpoint_message_content_async
 
 PROVIDERS_JSON = json.dumps(
     [
@@ -130,6 +138,55 @@ def test_ai_stream_persists_message(monkeypatch: pytest.MonkeyPatch):
             assert len(messages) == 2
             assert messages[-1]['role'] == 'assistant'
             assert messages[-1]['content'] == 'hello world'
+            assert messages[-1]['status'] == 'complete'
+
+
+def _stored_message(message_id: str):
+    with Session(engine) as session:
+        return session.get(ChatMessage, message_id)
+
+
+async def _checkpoint(message_id: str, content: str) -> bool:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        return await checkpoint_message_content_async(session, message_id, content)
+
+
+def test_ai_stream_checkpoints_partial_message(monkeypatch: pytest.MonkeyPatch):
+    init_db(drop_all=True)
+    monkeypatch.setattr(settings, 'AI_STREAM_CHECKPOINT_INTERVAL_MS', 1)
+    monkeypatch.setattr(settings, 'AI_STREAM_CHECKPOINT_CHARS', 1)
+    observed = []
+
+    async def fake_stream_agent_text(*args, **kwargs):
+        state = await ai_module.stream_registry.get(kwargs['deps'].session_id)
+        yield "partial"
+        for _ in range(100):
+            record = await asyncio.to_thread(_stored_message, state.message_id)
+            if record.content:
+                break
+            await asyncio.sleep(0.01)
+        observed.append((record.content, record.status))
+        raise RuntimeError('provider went away')
+
+    with _temp_providers(PROVIDERS_JSON), _temp_env('OPENAI_API_KEY', 'test'):
+        monkeypatch.setattr(ai_module, 'stream_agent_text', fake_stream_agent_text)
+        with TestClient(app) as client:
+            headers = _auth_headers(client)
+            session_id = client.post('/api/v1/chats', json={'title': 'test'}, headers=headers).json()['id']
+            response = client.post(
+                '/api/v1/ai/chat/stream',
+                json={'session_id': session_id, 'content': 'hello', 'model': 'gpt-5.2-2025-12-11'},
+                headers=headers,
+            )
+            assert '"type": "error"' in response.text
+            assert observed == [('partial', ChatMessageStatus.STREAMING)]
+            messages = client.get(f"/api/v1/chats/{session_id}/messages", headers=headers).json()
+            assert messages[-1]['content'] == 'partial'
+            assert messages[-1]['status'] == 'error'
+
+            # A checkpoint that lands after the final write must not touch it.
+            assert anyio.run(_checkpoint, messages[-1]['id'], 'stale') is False
+            assert _stored_message(messages[-1]['id']).content == 'partial'
 
 
 def test_provider_registry_rejects_duplicate_models():
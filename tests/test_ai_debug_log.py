@@ -1,8 +1,10 @@
+import gzip
 import json
 
 from app.api.v1.ai import _append_ai_debug_record
 from app.core import config
 from app.core.config import settings
+from app.services.ai_debug_trace import debug_trace_writer, digest_messages
 
 
 def test_append_ai_debug_record_writes_jsonl(tmp_path, monkeypatch):
@@ -11,6 +13,7 @@ def test_append_ai_debug_record_writes_jsonl(tmp_path, monkeypatch):
     monkeypatch.setattr(settings, "ENV", "development")
     record = {"event": "test", "messages": [{"role": "user", "content": "hi"}]}
     _append_ai_debug_record(record)
+    debug_trace_writer.flush()
     content = log_path.read_text(encoding='utf-8').strip()
     payload = json.loads(content)
     assert payload["event"] == "test"
@@ -23,4 +26,30 @@ def test_append_ai_debug_record_skips_in_production(tmp_path, monkeypatch):
     monkeypatch.setattr(settings, "ENV", "production")
     record = {"event": "test", "messages": [{"role": "user", "content": "hi"}]}
     _append_ai_debug_record(record)
+    debug_trace_writer.flush()
     assert not log_path.exists()
+
+
+def test_debug_trace_rotates_into_compressed_archives(tmp_path, monkeypatch):
+    log_path = tmp_path / 'ai-debug.jsonl'
+    monkeypatch.setattr(config, "AI_DEBUG_LOG_PATH", log_path)
+    monkeypatch.setattr(settings, "ENV", "development")
+    monkeypatch.setattr(settings, "AI_DEBUG_TRACE_MAX_BYTES", 100)
+    monkeypatch.setattr(settings, "AI_DEBUG_TRACE_BACKUPS", 2)
+    for index in range(4):
+        _append_ai_debug_record({"event": "test", "index": index, "content": "x" * 100})
+        debug_trace_writer.flush()
+
+    archives = sorted(tmp_path.glob('ai-debug.jsonl.*.gz'))
+    assert len(archives) == 2
+    lines = [json.loads(line) for archive in archives for line in gzip.open(archive, 'rt', encoding='utf-8')]
+    assert sorted(line["index"] for line in lines) == [1, 2]
+    assert json.loads(log_path.read_text(encoding='utf-8'))["index"] == 3
+
+
+def test_digest_messages_fingerprints_history_without_content():
+    first = digest_messages([("user", "secret question"), ("assistant", "answer")])
+    assert first["message_count"] == 2
+    assert first["message_chars"] == len("secret question") + len("answer")
+    assert "secret" not in json.dumps(first)
+    assert digest_messages([("user", "secret question"), ("assistant", "answer!")]) != first
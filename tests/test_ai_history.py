@@ -0,0 +1,66 @@
+from pydantic_ai import messages as ai_messages
+
+from app.core.config import settings
+from app.models.chat_message import ChatMessage
+from app.models.enums import ChatRole
+from app.services.ai_history import (
+    build_message_history,
+    estimate_tokens,
+    history_token_budget,
+    message_tokens,
+    window_history,
+)
+
+
+def _message(role: ChatRole, content: str) -> ChatMessage:
+    return ChatMessage(session_id='s1', role=role, content=content, skill_id=None)
+
+
+def _conversation(turns: int) -> list[ChatMessage]:
+    history = []
+    for index in range(turns):
+        history.append(_message(ChatRole.USER, f'question {index} ' + 'x' * 400))
+        history.append(_message(ChatRole.ASSISTANT, f'answer {index} ' + '答' * 100))
+    return history
+
+
+def test_estimate_tokens_counts_wide_characters_individually():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('abcdefgh') == 2
+    assert estimate_tokens('你好世界') == 4
+    assert estimate_tokens('你好 abcd') == 4
+
+
+def test_window_history_keeps_newest_turns_within_budget(monkeypatch):
+    monkeypatch.setattr(settings, 'AI_HISTORY_TOKEN_BUDGETS', {'small-model': 700})
+    budget = history_token_budget('small-model')
+    assert history_token_budget('other-model') == settings.AI_HISTORY_TOKEN_BUDGET
+
+    for turns in (10, 100, 1000):
+        history = _conversation(turns)
+        window = window_history(history, budget=budget)
+        assert window.tokens <= budget
+        assert window.messages == history[-len(window.messages):]
+        assert window.omitted == history[: len(history) - len(window.messages)]
+        assert window.messages[0].role == ChatRole.USER
+        assert len(window.messages) == 6
+        assert window.tokens == sum(message_tokens(message) for message in window.messages)
+
+
+def test_window_history_always_keeps_latest_message():
+    history = [_message(ChatRole.USER, 'x' * 4000)]
+    window = window_history(history, budget=10)
+    assert window.messages == history
+    assert window.omitted == []
+
+
+def test_build_message_history_prepends_summary():
+    history = _conversation(1)
+    window = window_history(history, budget=1000, summary='用户在做市场分析')
+    messages = build_message_history(window.messages, window.summary)
+    assert len(messages) == 3
+    first = messages[0]
+    assert isinstance(first, ai_messages.ModelRequest)
+    assert isinstance(first.parts[0], ai_messages.SystemPromptPart)
+    assert '用户在做市场分析' in first.parts[0].content
+    assert window.tokens > sum(message_tokens(message) for message in window.messages)
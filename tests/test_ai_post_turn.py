@@ -0,0 +1,121 @@
+import anyio
+
+from app.core.config import settings
+from app.db.init_db import init_db
+from app.db.session import engine
+from app.models.chat_message import ChatMessage
+from app.models.enums import ChatRole, SkillVisibility
+from app.schemas.skill import SkillCreate
+from app.services.ai_post_turn import PostTurnAnalysis, maybe_run_post_turn_analysis
+from app.services.ai_skill_draft_suggestion import SkillDraftSuggestionResult
+from app.services.ai_skill_suggestion import SkillMatchResult
+from app.services.ai_types import AiDeps
+from app.services.auth_service import create_user
+from app.services.chat_service import list_suggestions
+from app.services.skill_draft_suggestion_service import list_skill_draft_suggestions
+from app.services.skill_service import create_skill
+from app.services.skill_summary_cache import skill_summary_cache
+from sqlmodel import Session
+
+
+class _StubResult:
+    def __init__(self, data):
+        self.output = data
+
+
+class _CountingAgent:
+    def __init__(self, data):
+        self._data = data
+        self.calls = 0
+        self.instructions = None
+
+    async def run(self, _prompt, *, model=None, deps=None, instructions=None):  # noqa: ARG002
+        self.calls += 1
+        self.instructions = instructions
+        return _StubResult(self._data)
+
+
+def _setup(email: str):
+    init_db(drop_all=True)
+    skill_summary_cache.clear()
+    with Session(engine) as session:
+        user = create_user(session, email, 'secret123')
+        session.refresh(user)
+        skill, _version = create_skill(
+            session,
+            SkillCreate(
+                name='write-paper',
+                description='用于撰写论文与结构化梳理',
+                visibility=SkillVisibility.PRIVATE,
+                tags=['论文', '写作'],
+                content='## Instructions\n- Step\n\n## Examples\n- Example',
+            ),
+            user.id,
+        )
+        session.refresh(user)
+        return user, skill.id
+
+
+def _deps(user, session_id: str) -> AiDeps:
+    return AiDeps(
+        user=user,
+        session_id=session_id,
+        model_id='gpt-5.2-2025-12-11',
+        selected_skill_id=None,
+        skill_content_max_len=settings.SKILL_CONTENT_MAX_LEN,
+    )
+
+
+def _run(deps: AiDeps, prompt: str, assistant_content: str) -> None:
+    history = [ChatMessage(session_id=deps.session_id, role=ChatRole.USER, content=prompt, skill_id=None)]
+    anyio.run(
+        lambda: maybe_run_post_turn_analysis(
+            deps=deps,
+            prompt=prompt,
+            history=history,
+            assistant_message_id='assistant-1',
+            assistant_content=assistant_content,
+        )
+    )
+
+
+def test_post_turn_analysis_creates_match_and_draft_with_one_call(monkeypatch):
+    user, skill_id = _setup('post-turn@example.com')
+    deps = _deps(user, 'session-post-turn')
+    agent = _CountingAgent(
+        PostTurnAnalysis(
+            skill_match=SkillMatchResult(matched=True, skill_id=skill_id, reason='论文写作'),
+            skill_draft=SkillDraftSuggestionResult(should_suggest=True, goal='论文结构梳理', reason='可复用'),
+        )
+    )
+    monkeypatch.setattr('app.services.ai_post_turn._get_post_turn_agent', lambda: agent)
+    monkeypatch.setattr('app.services.ai_post_turn.build_openai_chat_model', lambda _model: None)
+
+    _run(deps, '我要写一篇论文，帮我梳理结构', '论文结构建议如下：' + '先交代背景与问题，再说明方法与实验。' * 8)
+
+    assert agent.calls == 1
+    with Session(engine) as session:
+        assert [item.skill_id for item in list_suggestions(session, deps.session_id)] == [skill_id]
+        drafts = list_skill_draft_suggestions(session, deps.session_id)
+        assert [item.goal for item in drafts] == ['论文结构梳理']
+
+
+def test_post_turn_analysis_skips_draft_for_short_replies(monkeypatch):
+    user, skill_id = _setup('post-turn-short@example.com')
+    deps = _deps(user, 'session-post-turn-short')
+    agent = _CountingAgent(
+        PostTurnAnalysis(
+            skill_match=SkillMatchResult(matched=True, skill_id=skill_id, reason='论文写作'),
+            skill_draft=SkillDraftSuggestionResult(should_suggest=True, goal='不应保存', reason='可复用'),
+        )
+    )
+    monkeypatch.setattr('app.services.ai_post_turn._get_post_turn_agent', lambda: agent)
+    monkeypatch.setattr('app.services.ai_post_turn.build_openai_chat_model', lambda _model: None)
+
+    _run(deps, '我要写论文', '好的，我来帮你规划论文结构。')
+
+    assert agent.calls == 1
+    assert any('skill_draft' in item for item in agent.instructions)
+    with Session(engine) as session:
+        assert len(list_suggestions(session, deps.session_id)) == 1
+        assert list_skill_draft_suggestions(session, deps.session_id) == []
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services.ai_provider import OpenAIClientPool
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.mark.anyio
+async def test_client_pool_reuses_clients_per_key(monkeypatch):
+    pool = OpenAIClientPool()
+    first = pool.get('openai', 'https://api.openai.com/v1', 'key-a')
+    assert pool.get('openai', 'https://api.openai.com/v1', 'key-a') is first
+    rotated = pool.get('openai', 'https://api.openai.com/v1', 'key-b')
+    assert rotated.client is not first.client
+
+    monkeypatch.setattr(settings, 'AI_CLIENT_TTL_SECONDS', 0)
+    refreshed = pool.get('openai', 'https://api.openai.com/v1', 'key-a')
+    assert refreshed.client is not first.client
+    assert not first.client.is_closed()
+
+    await pool.aclose()
+    assert first.client.is_closed()
+    assert refreshed.client.is_closed()
+    assert rotated.client.is_closed()
+
+
+@pytest.mark.anyio
+async def test_client_pool_retires_client_when_signature_changes(monkeypatch):
+    monkeypatch.setattr('app.services.ai_provider._RETIRED_CLIENT_GRACE_SECONDS', 0.0)
+    pool = OpenAIClientPool()
+    first = pool.get('openai', 'https://api.openai.com/v1', 'key-a')
+    rotated = pool.get('openai', 'https://api.openai.com/v1', 'key-b')
+    moved = pool.get('openai', 'https://proxy.example.com/v1', 'key-b')
+    assert pool._clients == {'openai': moved}
+
+    await asyncio.sleep(0.01)
+    assert first.client.is_closed()
+    assert rotated.client.is_closed()
+    assert not moved.client.is_closed()
+
+    await pool.aclose()
+    assert moved.client.is_closed()
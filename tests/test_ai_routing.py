@@ -1,8 +1,10 @@
+from app.core.config import settings
 from app.models.chat_message import ChatMessage
 from app.models.enums import ChatRole
 from app.services.ai_agent import (
     _ensure_clarify_marker,
     _force_clarify,
+    _local_clarify_decision,
     should_use_skill_agent,
 )
 
@@ -59,3 +61,55 @@ def test_ensure_clarify_marker_prefixes_json():
     payload = '{"clarify_chain": []}'
     result = _ensure_clarify_marker(payload)
     assert result.startswith('<!-- Clarification chain -->')
+
+
+def test_local_clarify_decision_settles_clear_cut_prompts():
+    assert _local_clarify_decision('你好', [], None).should_clarify is False
+    long_prompt = '请用 Python 写一个函数，读取 data.csv 并按日期汇总每天的订单数量，输出为 JSON，附上单元测试示例。'
+    assert _local_clarify_decision(long_prompt, [], None).should_clarify is False
+    clarify_answer = '```json\n{"clarify_chain_response": {"single_choice": "是"}}\n```'
+    assert _local_clarify_decision(clarify_answer, [], None).should_clarify is False
+    assert _local_clarify_decision('这个呀', [], None).should_clarify is True
+
+
+def test_local_clarify_decision_escalates_ambiguous_prompts():
+    verdict = _local_clarify_decision('请给个计划', [], None)
+    assert verdict.should_clarify is None
+
+
+def test_local_clarify_decision_ignores_plain_english_words():
+    assert 'concrete_detail' not in _local_clarify_decision('hello there friend', [], None).features
+    vague = _local_clarify_decision('what should I do about this thing?', [], None)
+    assert 'concrete_detail' not in vague.features
+    assert vague.should_clarify is None
+    long_vague = 'could you help me figure out what I should be doing with all of this stuff'
+    assert _local_clarify_decision(long_vague, [], None).should_clarify is None
+
+
+def test_local_clarify_decision_settles_concrete_english_prompts():
+    for prompt in (
+        'why does read_skill raise KeyError when the skill_id is missing from the catalogue?',
+        'how do I call fetchUserProfile from the settings page without a second request?',
+        'the request to https://example.com/api returns 502 after about thirty seconds of waiting',
+    ):
+        verdict = _local_clarify_decision(prompt, [], None)
+        assert 'concrete_detail' in verdict.features
+        assert verdict.should_clarify is False
+
+
+def test_local_clarify_decision_answers_typical_clear_prompts_without_the_decider():
+    for prompt in (
+        'What is Python?',
+        '帮我写一篇关于春天的散文',
+        'Explain the differences between TCP and UDP including reliability, ordering, and typical use cases',
+        '请解释一下TCP和UDP在可靠性、连接方式和适用场景上的区别，并举例说明',
+    ):
+        assert _local_clarify_decision(prompt, [], None).should_clarify is False, prompt
+
+
+def test_local_clarify_thresholds_come_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'AI_LOCAL_CLARIFY_NO_SCORE', -3.0)
+    assert _local_clarify_decision('What is Python?', [], None).should_clarify is None
+    assert _local_clarify_decision('好的', [], None).should_clarify is None
+    monkeypatch.setattr(settings, 'AI_LOCAL_CLARIFY_YES_SCORE', 1.5)
+    assert _local_clarify_decision('好的', [], None).should_clarify is True
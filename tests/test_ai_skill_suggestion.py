@@ -1,3 +1,5 @@
+import json
+
 import anyio
 
 from app.core.config import settings
@@ -5,12 +7,13 @@ from app.db.init_db import init_db
 from app.db.session import engine
 from app.models.chat_message import ChatMessage
 from app.models.enums import ChatRole, SkillVisibility
-from app.schemas.skill import SkillCreate
-from app.services.ai_skill_suggestion import SkillMatchResult, maybe_create_skill_suggestion
+from app.schemas.skill import SkillCreate, SkillUpdate
+from app.services.ai_skill_suggestion import SkillMatchResult, build_skill_summaries, maybe_create_skill_suggestion
 from app.services.ai_types import AiDeps
 from app.services.auth_service import create_user
 from app.services.chat_service import list_suggestions
-from app.services.skill_service import create_skill
+from app.services.skill_service import create_skill, get_skill, update_skill
+from app.services.skill_summary_cache import skill_summary_cache
 from sqlmodel import Session
 
 
@@ -168,3 +171,71 @@ def test_maybe_create_skill_suggestion_fallback_market_sizing(monkeypatch):
         suggestions = list_suggestions(session, deps.session_id)
         assert len(suggestions) == 1
         assert suggestions[0].skill_id == skill_id
+
+
+def test_skill_summaries_cache_invalidates_on_skill_changes():
+    init_db(drop_all=True)
+    skill_summary_cache.clear()
+    owner = _make_user('summary-owner@example.com')
+    viewer = _make_user('summary-viewer@example.com')
+    public_id = _make_skill_named(owner.id, 'public-one', ['公开'], SkillVisibility.PUBLIC)
+    private_id = _make_skill_named(owner.id, 'private-one', ['私有'], SkillVisibility.PRIVATE)
+
+    owner_view = _run_async(build_skill_summaries, owner.id)
+    viewer_view = _run_async(build_skill_summaries, viewer.id)
+    assert owner_view.ids == {public_id, private_id}
+    assert viewer_view.ids == {public_id}
+    assert json.loads(owner_view.payload) == owner_view.items
+    assert _run_async(build_skill_summaries, viewer.id) is viewer_view
+
+    second_id = _make_skill_named(owner.id, 'public-two', ['公开'], SkillVisibility.PUBLIC)
+    assert _run_async(build_skill_summaries, viewer.id).ids == {public_id, second_id}
+
+    with Session(engine) as session:
+        skill = get_skill(session, private_id)
+        update_skill(session, skill, SkillUpdate(visibility=SkillVisibility.PUBLIC))
+    assert _run_async(build_skill_summaries, viewer.id).ids == {public_id, second_id, private_id}
+
+
+def test_match_skill_sends_only_top_ranked_candidates(monkeypatch):
+    init_db(drop_all=True)
+    skill_summary_cache.clear()
+    owner = _make_user('prerank-owner@example.com')
+    user = _make_user('prerank-viewer@example.com')
+    for index in range(6):
+        _make_skill_named(owner.id, f'generic-{index}', ['通用'], SkillVisibility.PUBLIC)
+    target_id = _make_skill_named(owner.id, 'pitch-deck', ['融资', '路演'], SkillVisibility.PUBLIC)
+    deps = AiDeps(
+        user=user,
+        session_id='session-prerank',
+        model_id='gpt-5.2-2025-12-11',
+        selected_skill_id=None,
+        skill_content_max_len=settings.SKILL_CONTENT_MAX_LEN,
+    )
+    seen: list[str] = []
+
+    class _RecordingAgent(_StubAgent):
+        async def run(self, _prompt, *, model=None, deps=None, instructions=None):  # noqa: ARG002
+            seen.extend(instructions or [])
+            return _StubResult(self._data)
+
+    stub_agent = _RecordingAgent(SkillMatchResult(matched=True, skill_id=target_id, reason='路演材料'))
+    monkeypatch.setattr(settings, 'SKILL_MATCH_TOP_K', 3)
+    monkeypatch.setattr('app.services.ai_skill_suggestion._get_skill_match_agent', lambda: stub_agent)
+    monkeypatch.setattr('app.services.ai_skill_suggestion.build_openai_chat_model', lambda _model: None)
+
+    _run_async(
+        maybe_create_skill_suggestion,
+        deps=deps,
+        prompt='帮我准备融资路演的 pitch deck',
+        history=[],
+        assistant_message_id='assistant-prerank',
+        assistant_content='好的，我们先梳理故事线。',
+    )
+
+    candidates = json.loads(seen[0].split('\n', 1)[1])
+    assert len(candidates) == 3
+    assert target_id in {item['id'] for item in candidates}
+    with Session(engine) as session:
+        suggestions = list_suggestions(session, deps.session_id)
+        assert [item.skill_id for item in suggestions] == [target_id]
@@ -1,7 +1,15 @@
+import asyncio
+
 import pytest
+from sqlmodel import Session, select
 
+from app.core.config import settings
+from app.db.init_db import init_db
+from app.db.session import engine
+from app.models.skill import Skill
 from app.models.user import User
-from app.services.ai_agent import ClarifyDecision, stream_agent_text
+from app.services.ai_agent import ClarifyDecision, LocalClarifyVerdict, stream_agent_text
+from app.services.ai_tools import create_skill_data
 from app.services.ai_types import AiDeps
 
 
@@ -24,6 +32,26 @@ class FakeStream:
         return self._output
 
 
+class TrackedStream(FakeStream):
+    def __init__(self, deltas: list[str], *, hang: bool = False) -> None:
+        super().__init__(deltas, "")
+        self._hang = hang
+        self.started = asyncio.Event()
+        self.closed = False
+
+    async def __aexit__(self, exc_type, exc, tb):  # noqa: D401
+        self.closed = True
+        return False
+
+    async def stream_text(self, *, delta: bool = False, debounce_by=None):  # noqa: ANN001,D401
+        self.started.set()
+        for item in self._deltas:
+            await asyncio.sleep(0)
+            yield item
+        if self._hang:
+            await asyncio.sleep(3600)
+
+
 class FakeAgent:
     def __init__(self, stream: FakeStream) -> None:
         self._stream = stream
@@ -32,6 +60,21 @@ class FakeAgent:
         return self._stream
 
 
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _deps() -> AiDeps:
+    return AiDeps(
+        user=User(email="user@example.com", hashed_password="x"),
+        session_id="s1",
+        model_id="gpt-test",
+        selected_skill_id=None,
+        skill_content_max_len=2000,
+    )
+
+
 @pytest.mark.anyio
 async def test_stream_agent_text_fallback_when_no_deltas(monkeypatch):
     fake_stream = FakeStream([], "fallback reply")
@@ -62,3 +105,132 @@ async def test_stream_agent_text_fallback_when_no_deltas(monkeypatch):
         output += delta
 
     assert output == "fallback reply"
+
+
+async def _collect(prompt: str) -> list[str]:
+    return [
+        delta
+        async for delta in stream_agent_text(
+            deps=_deps(),
+            prompt=prompt,
+            message_history=[],
+            raw_history=[],
+        )
+    ]
+
+
+@pytest.mark.anyio
+async def test_speculative_stream_is_cancelled_when_decider_clarifies(monkeypatch):
+    slow_stream = TrackedStream(["draft answer"], hang=True)
+
+    async def fake_should_trigger_clarify(*args, **kwargs):
+        await slow_stream.started.wait()
+        return ClarifyDecision(should_clarify=True, reason="test")
+
+    class FakeClarifyResult:
+        output = '{"clarify_chain": []}'
+
+    class FakeClarifyAgent:
+        async def run(self, *args, **kwargs):  # noqa: ANN001,D401
+            return FakeClarifyResult()
+
+    monkeypatch.setattr(settings, "AI_SPECULATIVE_CLARIFY", True)
+    monkeypatch.setattr("app.services.ai_agent.get_general_agent", lambda: FakeAgent(slow_stream))
+    monkeypatch.setattr("app.services.ai_agent.get_clarify_agent", lambda: FakeClarifyAgent())
+    monkeypatch.setattr("app.services.ai_agent._should_trigger_clarify", fake_should_trigger_clarify)
+    monkeypatch.setattr("app.services.ai_agent.build_openai_chat_model", lambda _: None)
+
+    chunks = await _collect("请给个计划")
+
+    assert chunks == ['<!-- Clarification chain -->\n{"clarify_chain": []}']
+    assert slow_stream.closed is True
+
+
+@pytest.mark.anyio
+async def test_speculative_stream_starts_agent_before_decider_returns(monkeypatch):
+    stream = TrackedStream(["hello", " world"])
+
+    async def fake_should_trigger_clarify(*args, **kwargs):
+        await asyncio.wait_for(stream.started.wait(), timeout=1)
+        return ClarifyDecision(should_clarify=False, reason="test")
+
+    monkeypatch.setattr(settings, "AI_SPECULATIVE_CLARIFY", True)
+    monkeypatch.setattr("app.services.ai_agent.get_general_agent", lambda: FakeAgent(stream))
+    monkeypatch.setattr("app.services.ai_agent._should_trigger_clarify", fake_should_trigger_clarify)
+    monkeypatch.setattr("app.services.ai_agent.build_openai_chat_model", lambda _: None)
+
+    assert await _collect("请给个计划") == ["hello", " world"]
+
+
+def _escalate(prompt, history, selected_skill_id):  # noqa: ANN001
+    return LocalClarifyVerdict(should_clarify=None, score=0.0, features=())
+
+
+class SkillToolStream(TrackedStream):
+    """Stands in for a skill agent run whose first step is the create_skill tool."""
+
+    def __init__(self, deps: AiDeps) -> None:
+        super().__init__(["saved"])
+        self._deps = deps
+
+    async def stream_text(self, *, delta: bool = False, debounce_by=None):  # noqa: ANN001,D401
+        self.started.set()
+        await create_skill_data(
+            self._deps,
+            name="speculated-skill",
+            description="should never be saved",
+            tags=["a", "b", "c"],
+            content="# speculated-skill",
+        )
+        yield "saved"
+
+
+@pytest.mark.anyio
+async def test_skill_route_waits_for_decider_before_running_tools(monkeypatch):
+    init_db(drop_all=True)
+    with Session(engine) as session:
+        user = User(email="skill-spec@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+    deps = AiDeps(
+        user=user,
+        session_id="s1",
+        model_id="gpt-test",
+        selected_skill_id=None,
+        skill_content_max_len=2000,
+    )
+    stream = SkillToolStream(deps)
+
+    async def fake_should_trigger_clarify(*args, **kwargs):
+        await asyncio.sleep(0.05)
+        return ClarifyDecision(should_clarify=True, reason="test")
+
+    class FakeClarifyResult:
+        output = '{"clarify_chain": []}'
+
+    class FakeClarifyAgent:
+        async def run(self, *args, **kwargs):  # noqa: ANN001,D401
+            return FakeClarifyResult()
+
+    monkeypatch.setattr(settings, "AI_SPECULATIVE_CLARIFY", True)
+    monkeypatch.setattr("app.services.ai_agent.get_skill_agent", lambda: FakeAgent(stream))
+    monkeypatch.setattr("app.services.ai_agent.get_clarify_agent", lambda: FakeClarifyAgent())
+    monkeypatch.setattr("app.services.ai_agent._should_trigger_clarify", fake_should_trigger_clarify)
+    monkeypatch.setattr("app.services.ai_agent._local_clarify_decision", _escalate)
+    monkeypatch.setattr("app.services.ai_agent.build_openai_chat_model", lambda _: None)
+
+    chunks = [
+        delta
+        async for delta in stream_agent_text(
+            deps=deps,
+            prompt="帮我整理一个技能",
+            message_history=[],
+            raw_history=[],
+        )
+    ]
+
+    assert chunks == ['<!-- Clarification chain -->\n{"clarify_chain": []}']
+    assert not stream.started.is_set()
+    with Session(engine) as session:
+        assert session.exec(select(Skill).where(Skill.name == "speculated-skill")).first() is None
@@ -1,6 +1,23 @@
+import asyncio
+import json
+
 import pytest
 
-from app.services.ai_stream_registry import stream_registry
+from app.core.config import settings
+from app.services.ai_stream_backends import BrokerStreamBackend, StreamOverflowPolicy, open_broker_connection
+from app.services.ai_stream_broker import StreamBroker
+from app.services.ai_stream_registry import (
+    SSE_DONE,
+    AiStreamRegistry,
+    format_sse,
+    iter_sse_frames,
+    stream_registry,
+)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
 
 
 @pytest.mark.anyio
@@ -10,7 +27,8 @@ async def test_stream_registry_snapshot_and_delta():
     await stream_registry.start(session_id, message_id)
     subscription = await stream_registry.subscribe(session_id)
     assert subscription is not None
-    state, queue, snapshot = subscription
+    state, snapshot = subscription
+    queue = state.queue
     assert state.session_id == session_id
     assert snapshot == ""
 
@@ -24,3 +42,286 @@ async def test_stream_registry_snapshot_and_delta():
     await stream_registry.finish(session_id)
     done = await queue.get()
     assert done is None
+
+
+@pytest.mark.anyio
+async def test_stream_registry_coalesces_deltas(monkeypatch):
+    monkeypatch.setattr(settings, "AI_STREAM_FLUSH_INTERVAL_MS", 10_000)
+    monkeypatch.setattr(settings, "AI_STREAM_FLUSH_CHARS", 8)
+    await stream_registry.start("session-2", "message-2")
+    subscription, _snapshot = await stream_registry.subscribe("session-2")
+    queue = subscription.queue
+
+    for delta in ["ab", "cd", "ef"]:
+        await stream_registry.append("session-2", delta)
+    assert queue.empty()
+    late = await stream_registry.subscribe("session-2")
+    assert late[1] == ""
+
+    await stream_registry.append("session-2", "gh")
+    assert queue.get_nowait()["content"] == "abcdefgh"
+    await stream_registry.append("session-2", "ij")
+    assert (await stream_registry.subscribe("session-2"))[1] == "abcdefgh"
+
+    await stream_registry.finish("session-2")
+    frames = [frame async for frame in iter_sse_frames(queue)]
+    assert frames == [format_sse({"type": "delta", "message_id": "message-2", "content": "ij", "seq": 2}) + SSE_DONE]
+    assert frames[0].startswith("id: message-2:2\n")
+
+
+@pytest.mark.anyio
+async def test_stream_registry_resumes_from_last_event_id(monkeypatch):
+    monkeypatch.setattr(settings, "AI_STREAM_FLUSH_INTERVAL_MS", 0)
+    monkeypatch.setattr(settings, "AI_STREAM_REPLAY_FRAMES", 2)
+    await stream_registry.start("session-6", "message-6")
+    for delta in ["a", "b", "c"]:
+        await stream_registry.append("session-6", delta)
+
+    subscription, snapshot = await stream_registry.subscribe("session-6", "message-6:1")
+    queue = subscription.queue
+    assert subscription.resumed is True
+    assert snapshot == ""
+    assert [queue.get_nowait()["content"] for _ in range(2)] == ["b", "c"]
+
+    # Frame 1 has already left the ring buffer, and other messages cannot be resumed.
+    for last_event_id in ["message-6:0", "other:2", "message-6:9", "garbage"]:
+        subscription, snapshot = await stream_registry.subscribe("session-6", last_event_id)
+        assert subscription.resumed is False
+        assert subscription.seq == 3
+        assert snapshot == "abc"
+    await stream_registry.finish("session-6")
+
+
+async def _eventually_snapshot(registry, session_id):
+    # The producer and the watcher reach the broker over separate connections.
+    for _ in range(50):
+        snapshot = await registry.snapshot(session_id)
+        if snapshot and snapshot[1]:
+            return snapshot
+        await asyncio.sleep(0.01)
+    return None
+
+
+@pytest.mark.anyio
+async def test_broker_backend_relays_stream_to_other_worker(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "AI_STREAM_FLUSH_INTERVAL_MS", 0)
+    url = f"unix://{tmp_path}/broker.sock"
+    broker = StreamBroker()
+    await broker.start(url)
+    producer = AiStreamRegistry(BrokerStreamBackend(url))
+    watcher = AiStreamRegistry(BrokerStreamBackend(url))
+    try:
+        await producer.start("session-3", "message-3")
+        await producer.append("session-3", "hello")
+        assert await _eventually_snapshot(watcher, "session-3") == ("message-3", "hello")
+
+        subscription, snapshot = await watcher.subscribe("session-3")
+        queue = subscription.queue
+        assert subscription.message_id == "message-3"
+        assert snapshot == "hello"
+        # The producing worker learns about the remote watcher, so the stream is not treated as abandoned.
+        for _ in range(50):
+            if producer.backend.subscriber_count("session-3"):
+                break
+            await asyncio.sleep(0.01)
+        assert producer.backend.subscriber_count("session-3") == 1
+
+        await producer.append("session-3", " world")
+        item = await asyncio.wait_for(queue.get(), timeout=1)
+        assert item["content"] == " world"
+
+        await producer.finish("session-3")
+        assert await asyncio.wait_for(queue.get(), timeout=1) is None
+        assert await watcher.subscribe("session-3") is None
+    finally:
+        await producer.aclose()
+        await watcher.aclose()
+        await broker.close()
+
+
+@pytest.mark.anyio
+async def test_broker_backend_falls_back_to_local_streams(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "AI_STREAM_FLUSH_INTERVAL_MS", 0)
+    registry = AiStreamRegistry(BrokerStreamBackend(f"unix://{tmp_path}/missing.sock"))
+    await registry.start("session-4", "message-4")
+    subscription, _snapshot = await registry.subscribe("session-4")
+    queue = subscription.queue
+    await registry.append("session-4", "local")
+    assert queue.get_nowait()["content"] == "local"
+    assert await registry.subscribe("session-5") is None
+    await registry.aclose()
+
+
+async def _until(predicate):
+    for _ in range(100):
+        if predicate():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+@pytest.mark.anyio
+async def test_broker_drops_peer_that_stops_reading(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "AI_STREAM_FLUSH_INTERVAL_MS", 0)
+    monkeypatch.setattr(settings, "AI_STREAM_BROKER_MAX_BUFFER_BYTES", 64 * 1024)
+    path = tmp_path / "broker.sock"
+    broker = StreamBroker()
+    await broker.start(f"unix://{path}")
+    producer = AiStreamRegistry(BrokerStreamBackend(f"unix://{path}"))
+    # A tiny read limit makes this peer stop draining its socket, like a stalled worker.
+    _reader, writer = await asyncio.open_unix_connection(str(path), limit=1024)
+    try:
+        await producer.start("session-slow", "message-slow")
+        assert await _until(lambda: "session-slow" in broker._channels)
+        writer.write(json.dumps({"op": "subscribe", "session_id": "session-slow"}).encode() + b"\n")
+        assert await _until(lambda: broker._watchers.get("session-slow"))
+
+        for _ in range(200):
+            await producer.append("session-slow", "y" * 32 * 1024)
+            await asyncio.sleep(0.001)
+            if not broker._watchers.get("session-slow"):
+                break
+        assert not broker._watchers.get("session-slow")
+        # The producer's own connection keeps working.
+        assert "session-slow" in broker._channels
+    finally:
+        writer.close()
+        await producer.aclose()
+        await broker.close()
+
+
+@pytest.mark.anyio
+async def test_broker_requires_token_beyond_loopback(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "AI_STREAM_FLUSH_INTERVAL_MS", 0)
+    with pytest.raises(ValueError):
+        await StreamBroker().start("tcp://0.0.0.0:0")
+
+    monkeypatch.setattr(settings, "AI_STREAM_BROKER_TOKEN", "secret")
+    url = f"unix://{tmp_path}/broker.sock"
+    broker = StreamBroker()
+    await broker.start(url)
+    producer = AiStreamRegistry(BrokerStreamBackend(url))
+    watcher = AiStreamRegistry(BrokerStreamBackend(url))
+    try:
+        reader, writer = await open_broker_connection(url)
+        writer.write(json.dumps({"op": "snapshot", "session_id": "session-t"}).encode() + b"\n")
+        assert await asyncio.wait_for(reader.readline(), timeout=1) == b""
+        writer.close()
+
+        await producer.start("session-t", "message-t")
+        await producer.append("session-t", "hello")
+        assert await _eventually_snapshot(watcher, "session-t") == ("message-t", "hello")
+    finally:
+        await producer.aclose()
+        await watcher.aclose()
+        await broker.close()
+
+
+async def _slow_subscriber(monkeypatch, session_id, policy):
+    monkeypatch.setattr(settings, "AI_STREAM_FLUSH_INTERVAL_MS", 0)
+    monkeypatch.setattr(settings, "AI_STREAM_SUBSCRIBER_QUEUE_SIZE", 2)
+    await stream_registry.start(session_id, f"message-{session_id}")
+    subscription, _snapshot = await stream_registry.subscribe(session_id, policy=policy)
+    queue = subscription.queue
+    for delta in ["a", "b", "c", "d"]:
+        await stream_registry.append(session_id, delta)
+    return queue
+
+
+@pytest.mark.anyio
+async def test_overflowing_subscriber_is_resnapshotted(monkeypatch):
+    dropped = stream_registry.stats()["dropped_frames"]
+    queue = await _slow_subscriber(monkeypatch, "session-7", StreamOverflowPolicy.RESNAPSHOT)
+    assert stream_registry.stats()["max_queue_depth"] == 2
+    await stream_registry.error("session-7", "boom")
+    await stream_registry.finish("session-7")
+
+    frames = [queue.get_nowait() for _ in range(queue.qsize())]
+    # "c" and the error each overflowed the queue; the error frame itself is kept.
+    assert [frame and frame["type"] for frame in frames] == ["snapshot", "error", None]
+    assert frames[0]["content"] == "abcd"
+    assert frames[0]["seq"] == 4
+    assert stream_registry.stats()["dropped_frames"] == dropped + 5
+
+
+@pytest.mark.anyio
+async def test_overflowing_subscriber_is_coalesced(monkeypatch):
+    queue = await _slow_subscriber(monkeypatch, "session-8", StreamOverflowPolicy.COALESCE)
+    await stream_registry.finish("session-8")
+    frames = [queue.get_nowait() for _ in range(queue.qsize())]
+    assert frames == [
+        {"type": "delta", "message_id": "message-session-8", "content": "abc", "seq": 3},
+        {"type": "delta", "message_id": "message-session-8", "content": "d", "seq": 4},
+        None,
+    ]
+
+
+@pytest.mark.anyio
+async def test_overflowing_subscriber_is_disconnected(monkeypatch):
+    queue = await _slow_subscriber(monkeypatch, "session-9", StreamOverflowPolicy.DISCONNECT)
+    assert queue.get_nowait() is None
+    assert stream_registry.backend.channel("session-9").subscribers == set()
+    await stream_registry.append("session-9", "e")
+    assert queue.empty()
+    await stream_registry.finish("session-9")
+
+
+async def _tracked_stream(session_id):
+    state = await stream_registry.start(session_id, f"message-{session_id}")
+
+    async def produce():
+        try:
+            await asyncio.sleep(3600)
+        finally:
+            await stream_registry.finish(session_id)
+
+    task = asyncio.create_task(produce())
+    stream_registry.track(state, task)
+    await asyncio.sleep(0)
+    return state, task
+
+
+@pytest.mark.anyio
+async def test_sweeper_cancels_unwatched_streams_after_grace(monkeypatch):
+    monkeypatch.setattr(settings, "AI_STREAM_UNWATCHED_GRACE_SECONDS", 0)
+    watched_state, watched = await _tracked_stream("session-10")
+    subscription, _snapshot = await stream_registry.subscribe("session-10")
+    _state, unwatched = await _tracked_stream("session-11")
+
+    await stream_registry.sweep()
+    await asyncio.sleep(0)
+    assert unwatched.cancelled()
+    assert await stream_registry.get("session-11") is None
+    assert not watched.done()
+
+    # The grace period restarts from when the last subscriber left.
+    monkeypatch.setattr(settings, "AI_STREAM_UNWATCHED_GRACE_SECONDS", 60)
+    await stream_registry.unsubscribe(subscription)
+    await stream_registry.sweep()
+    assert watched_state.unwatched_since is not None
+    assert not watched.done()
+    watched_state.unwatched_since -= 60
+    await stream_registry.sweep()
+    await asyncio.sleep(0)
+    assert watched.cancelled()
+
+
+@pytest.mark.anyio
+async def test_sweeper_enforces_max_duration_and_reaps_dead_streams(monkeypatch):
+    monkeypatch.setattr(settings, "AI_STREAM_FLUSH_INTERVAL_MS", 0)
+    monkeypatch.setattr(settings, "AI_STREAM_MAX_DURATION_SECONDS", 60)
+    state, task = await _tracked_stream("session-12")
+    subscription, _snapshot = await stream_registry.subscribe("session-12")
+    queue = subscription.queue
+    state.started_at -= 61
+    await stream_registry.sweep()
+    await asyncio.sleep(0)
+    assert task.cancelled()
+    assert queue.get_nowait()["type"] == "error"
+    assert queue.get_nowait() is None
+
+    dead = await stream_registry.start("session-13", "message-13")
+    stream_registry.track(dead, asyncio.create_task(asyncio.sleep(0)))
+    await asyncio.sleep(0.01)
+    assert await stream_registry.sweep() == 1
+    assert await stream_registry.get("session-13") is None
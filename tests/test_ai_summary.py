@@ -0,0 +1,86 @@
+import anyio
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.init_db import init_db
+from app.db.session import engine
+from app.models.chat_summary import ChatSummary
+from app.models.enums import ChatMessageStatus, ChatRole
+from app.services import ai_summary
+from app.services.ai_history import window_history
+from app.services.ai_summary import fold_session_summary, select_messages_to_fold, unsummarized_history
+from app.services.chat_service import create_message, create_session, delete_session, get_session, list_messages
+
+
+class _StubResult:
+    def __init__(self, data):
+        self.output = data
+
+
+class _RecordingAgent:
+    def __init__(self):
+        self.prompts = []
+
+    async def run(self, prompt, *, model=None):  # noqa: ARG002
+        self.prompts.append(prompt)
+        return _StubResult(f'summary {len(self.prompts)}')
+
+
+def _add_turns(session: Session, session_id: str, start: int, count: int) -> None:
+    for index in range(start, start + count):
+        create_message(session, session_id, ChatRole.USER, f'question {index} ' + 'x' * 400, None)
+        create_message(session, session_id, ChatRole.ASSISTANT, f'answer {index} ' + 'y' * 400, None)
+
+
+def test_select_messages_to_fold_keeps_recent_turns_verbatim(monkeypatch):
+    monkeypatch.setattr(settings, 'AI_SUMMARY_RECENT_TOKENS', 250)
+    init_db(drop_all=True)
+    with Session(engine) as session:
+        chat = create_session(session, 'user-1', 'long chat')
+        _add_turns(session, chat.id, 0, 4)
+        messages = list_messages(session, chat.id, limit=None)
+
+    folded = select_messages_to_fold(messages, keep_recent=True)
+    assert folded == messages[:6]
+    # Whole batches fold everything up to the last reply.
+    assert select_messages_to_fold(messages + messages[:1], keep_recent=False) == messages
+
+    messages[3].status = ChatMessageStatus.STREAMING
+    assert select_messages_to_fold(messages, keep_recent=True) == messages[:2]
+
+
+def test_fold_session_summary_only_folds_new_messages(monkeypatch):
+    monkeypatch.setattr(settings, 'AI_SUMMARY_RECENT_TOKENS', 250)
+    agent = _RecordingAgent()
+    monkeypatch.setattr(ai_summary, '_get_summary_agent', lambda: agent)
+    monkeypatch.setattr(ai_summary, 'build_openai_chat_model', lambda _model_id: None)
+    init_db(drop_all=True)
+    with Session(engine) as session:
+        chat = create_session(session, 'user-1', 'long chat')
+        chat_id = chat.id
+        _add_turns(session, chat_id, 0, 3)
+
+    assert anyio.run(fold_session_summary, chat_id, 'gpt-5.2-2025-12-11') is None
+    assert 'answer 1' in agent.prompts[0] and 'question 2' not in agent.prompts[0]
+
+    with Session(engine) as session:
+        _add_turns(session, chat_id, 3, 2)
+    anyio.run(fold_session_summary, chat_id, 'gpt-5.2-2025-12-11')
+    second = agent.prompts[1]
+    assert 'summary 1' in second
+    assert 'answer 1' not in second
+    assert 'question 2' in second and 'answer 3' in second and 'question 4' not in second
+
+    with Session(engine) as session:
+        summary = session.exec(select(ChatSummary).where(ChatSummary.session_id == chat_id)).one()
+        assert summary.content == 'summary 2'
+        assert summary.covered_messages == 8
+        history = list_messages(session, chat_id, limit=None)
+        pending = unsummarized_history(history, summary)
+        assert pending == history[8:]
+        window = window_history(pending, budget=10_000, summary=summary.content)
+        assert window.summary == 'summary 2'
+        assert window.omitted == []
+
+        delete_session(session, get_session(session, chat_id))
+        assert session.exec(select(ChatSummary)).first() is None
@@ -85,3 +85,42 @@ def test_chat_flow():
 
         deleted = client.delete(f"/api/v1/chats/{session_id}", headers=headers)
         assert deleted.status_code == 200
+
+
+def test_message_cursor_pagination():
+    init_db(drop_all=True)
+    with TestClient(app) as client:
+        headers = _auth_headers(client)
+        session_id = client.post('/api/v1/chats', json={'title': 'paged'}, headers=headers).json()['id']
+        for index in range(5):
+            client.post(
+                f"/api/v1/chats/{session_id}/messages",
+                json={'role': 'user', 'content': f"m{index}"},
+                headers=headers,
+            )
+
+        seen: list[str] = []
+        params = {'limit': 2}
+        while True:
+            page = client.get(f"/api/v1/chats/{session_id}/messages", params=params, headers=headers)
+            assert page.status_code == 200
+            seen.extend(item['content'] for item in page.json())
+            cursor = page.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            params = {'limit': 2, 'cursor': cursor}
+        assert seen == [f"m{index}" for index in range(5)]
+
+        offset_page = client.get(
+            f"/api/v1/chats/{session_id}/messages",
+            params={'limit': 2, 'offset': 2},
+            headers=headers,
+        )
+        assert [item['content'] for item in offset_page.json()] == ['m2', 'm3']
+
+        invalid = client.get(
+            f"/api/v1/chats/{session_id}/messages",
+            params={'cursor': 'not-a-cursor'},
+            headers=headers,
+        )
+        assert invalid.status_code == 400
@@ -0,0 +1,89 @@
+import pytest
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.init_db import init_db
+from app.db.session import async_engine, engine
+from app.models.chat_message import ChatMessage
+from app.models.enums import ChatMessageStatus, ChatRole
+from app.services.chat_history_cache import chat_history_cache
+from app.services.chat_service import (
+    create_message_async,
+    create_session,
+    delete_session,
+    get_session,
+    list_recent_messages_async,
+    update_message_content_async,
+)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _new_chat() -> str:
+    with Session(engine) as session:
+        return create_session(session, "user-1", "cached").id
+
+
+def _counters() -> tuple[int, int, int]:
+    stats = chat_history_cache.stats()
+    return stats["hits"], stats["misses"], stats["stale"]
+
+
+@pytest.mark.anyio
+async def test_history_cache_serves_turns_and_detects_foreign_writes():
+    init_db(drop_all=True)
+    chat_history_cache.clear()
+    chat_id = _new_chat()
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        await create_message_async(session, chat_id, ChatRole.USER, "hello", None)
+        hits, misses, stale = _counters()
+        assert [m.content for m in await list_recent_messages_async(session, chat_id, 50)] == ["hello"]
+        assert _counters() == (hits, misses + 1, stale)
+
+        reply = await create_message_async(
+            session, chat_id, ChatRole.ASSISTANT, "", None, status=ChatMessageStatus.STREAMING
+        )
+        await update_message_content_async(session, reply, "hi there", ChatMessageStatus.COMPLETE)
+        await create_message_async(session, chat_id, ChatRole.USER, "again", None)
+        history = await list_recent_messages_async(session, chat_id, 50)
+        assert [m.content for m in history] == ["hello", "hi there", "again"]
+        assert _counters() == (hits + 1, misses + 1, stale)
+        assert await list_recent_messages_async(session, chat_id, 2) == history[-2:]
+
+        # A write from another worker never reaches this cache, so the tail no longer matches.
+        session.add(ChatMessage(session_id=chat_id, role=ChatRole.ASSISTANT, content="elsewhere", skill_id=None))
+        await session.commit()
+        history = await list_recent_messages_async(session, chat_id, 50)
+        assert [m.content for m in history][-1] == "elsewhere"
+        assert _counters() == (hits + 2, misses + 1, stale + 1)
+
+    with Session(engine) as session:
+        delete_session(session, get_session(session, chat_id))
+    assert chat_history_cache.lookup(chat_id) is None
+
+
+@pytest.mark.anyio
+async def test_history_cache_is_bounded(monkeypatch):
+    init_db(drop_all=True)
+    chat_history_cache.clear()
+    monkeypatch.setattr(settings, "AI_HISTORY_CACHE_SESSIONS", 2)
+    chats = [_new_chat() for _ in range(3)]
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        for chat_id in chats:
+            await create_message_async(session, chat_id, ChatRole.USER, "x" * 10, None)
+            await list_recent_messages_async(session, chat_id, 50)
+    assert chat_history_cache.stats()["sessions"] == 2
+    assert chat_history_cache.lookup(chats[0]) is None
+
+    monkeypatch.setattr(settings, "AI_HISTORY_CACHE_MAX_CHARS", 15)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        await list_recent_messages_async(session, chats[0], 50)
+    assert chat_history_cache.stats()["sessions"] == 1
+    assert chat_history_cache.stats()["chars"] == 10
+
+    monkeypatch.setattr(settings, "AI_HISTORY_CACHE_TTL_SECONDS", 0)
+    assert chat_history_cache.lookup(chats[0]) is None
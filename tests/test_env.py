@@ -1,5 +1,8 @@
+import os
+
+from app.core import env as env_module
 from app.core.config import Settings
-from app.core.env import get_env_value
+from app.core.env import get_env_value, reload_env
 
 
 def test_get_env_value_prefers_env_file(monkeypatch, tmp_path):
@@ -23,3 +26,30 @@ def test_get_env_value_falls_back_to_env_when_env_file_absent(monkeypatch, tmp_p
     monkeypatch.setattr(Settings, "model_config", {"env_file": str(env_path)}, raising=False)
     monkeypatch.setenv("OPENAI_API_KEY", "env-key")
     assert get_env_value("OPENAI_API_KEY") == "env-key"
+
+
+def test_get_env_value_caches_until_env_file_changes(monkeypatch, tmp_path):
+    env_path = tmp_path / ".env"
+    env_path.write_text("OPENAI_API_KEY=old-key\n", encoding="utf-8")
+    monkeypatch.setattr(Settings, "model_config", {"env_file": str(env_path)}, raising=False)
+    parse_calls = []
+    parse_env_file = env_module._parse_env_file
+
+    def _counting_parse(path):
+        parse_calls.append(path)
+        return parse_env_file(path)
+
+    monkeypatch.setattr(env_module, "_parse_env_file", _counting_parse)
+    assert get_env_value("OPENAI_API_KEY") == "old-key"
+    assert get_env_value("OPENAI_API_KEY") == "old-key"
+    assert len(parse_calls) == 1
+
+    env_path.write_text("OPENAI_API_KEY=rotated-key\n", encoding="utf-8")
+    stat = env_path.stat()
+    os.utime(env_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert get_env_value("OPENAI_API_KEY") == "rotated-key"
+    assert len(parse_calls) == 2
+
+    reload_env()
+    assert get_env_value("OPENAI_API_KEY") == "rotated-key"
+    assert len(parse_calls) == 3
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.init_db import init_db
+from app.db.session import async_engine, engine
+from app.models.enums import JobStatus
+from app.models.job import Job
+from app.services.job_queue import JobWorker, enqueue_job_async, prune_finished_jobs, register_job_type
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.fixture
+def job_types(monkeypatch):
+    init_db(drop_all=True)
+    monkeypatch.setattr('app.services.job_queue._job_types', {})
+    monkeypatch.setattr(settings, 'JOB_RETRY_BASE_SECONDS', 0.0)
+
+
+async def _enqueue(job_type: str, key: str, payload: dict) -> Job:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        return await enqueue_job_async(session, job_type, key, payload)
+
+
+def _jobs(job_type: str) -> list[Job]:
+    with Session(engine) as session:
+        return list(session.exec(select(Job).where(Job.job_type == job_type)).all())
+
+
+@pytest.mark.anyio
+async def test_enqueue_is_idempotent_per_key(job_types):
+    seen: list[dict] = []
+
+    async def handler(payload):
+        seen.append(payload)
+
+    register_job_type('test.echo', handler)
+    first = await _enqueue('test.echo', 's1:m1', {'n': 1})
+    second = await _enqueue('test.echo', 's1:m1', {'n': 2})
+    assert first.id == second.id
+
+    worker = JobWorker()
+    assert await worker.run_once() == 1
+    await worker.drain()
+
+    assert seen == [{'n': 1}]
+    [job] = _jobs('test.echo')
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.attempts == 1
+
+
+@pytest.mark.anyio
+async def test_failed_job_is_retried_until_max_attempts(job_types):
+    calls = 0
+
+    async def handler(_payload):
+        nonlocal calls
+        calls += 1
+        raise RuntimeError('boom')
+
+    register_job_type('test.flaky', handler, max_attempts=2)
+    await _enqueue('test.flaky', 's1:m1', {})
+
+    worker = JobWorker()
+    await worker.run_once()
+    await worker.drain()
+    [job] = _jobs('test.flaky')
+    assert job.status == JobStatus.PENDING
+    assert job.last_error == 'boom'
+
+    await worker.run_once()
+    await worker.drain()
+    [job] = _jobs('test.flaky')
+    assert job.status == JobStatus.FAILED
+    assert job.attempts == 2
+    assert await worker.run_once() == 0
+    assert calls == 2
+
+
+@pytest.mark.anyio
+async def test_concurrency_limit_per_job_type(job_types):
+    release = asyncio.Event()
+
+    async def handler(_payload):
+        await release.wait()
+
+    register_job_type('test.slow', handler, concurrency=1)
+    for index in range(3):
+        await _enqueue('test.slow', f's1:m{index}', {})
+
+    worker = JobWorker()
+    assert await worker.run_once() == 1
+    assert await worker.run_once() == 0
+    release.set()
+    await worker.drain()
+    assert await worker.run_once() == 1
+    await worker.drain()
+    assert await worker.run_once() == 1
+    await worker.drain()
+    assert {job.status for job in _jobs('test.slow')} == {JobStatus.SUCCEEDED}
+
+
+@pytest.mark.anyio
+async def test_prune_removes_only_old_settled_jobs(job_types, monkeypatch):
+    monkeypatch.setattr(settings, 'JOB_RETENTION_DAYS', 7)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    old = now - timedelta(days=8)
+    with Session(engine) as session:
+        for key, status, updated_at in (
+            ('old-ok', JobStatus.SUCCEEDED, old),
+            ('old-dead', JobStatus.FAILED, old),
+            ('old-pending', JobStatus.PENDING, old),
+            ('new-ok', JobStatus.SUCCEEDED, now),
+        ):
+            session.add(Job(job_type='test.prune', idempotency_key=key, payload='{}', status=status, updated_at=updated_at))
+        session.commit()
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        assert await prune_finished_jobs(session, now) == 2
+
+    assert sorted(job.idempotency_key for job in _jobs('test.prune')) == ['new-ok', 'old-pending']
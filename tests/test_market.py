@@ -1,7 +1,13 @@
+from contextlib import contextmanager
 from uuid import uuid4
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from app.main import app
 from app.db.init_db import init_db
+from app.db.session import engine
+from app.models.skill_stats import SkillStats
+from app.services.market_service import repair_skill_stats
+from sqlmodel import Session
 
 
 def _auth_headers(client: TestClient) -> dict:
@@ -24,6 +30,20 @@ def _create_skill(client: TestClient, headers: dict) -> str:
     return created.json()['id']
 
 
+@contextmanager
+def _count_queries():
+    statements: list[str] = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):  # noqa: ARG001
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', _before_cursor_execute)
+
+
 def test_market_flow():
     init_db(drop_all=True)
     with TestClient(app) as client:
@@ -93,6 +113,85 @@ def test_market_list_and_detail():
         assert 'avatar' in detail.json()
 
 
+def test_market_list_reads_stats_in_one_query():
+    init_db(drop_all=True)
+    with TestClient(app) as client:
+        headers = _auth_headers(client)
+        skill_ids = [_create_skill(client, headers) for _ in range(5)]
+        client.post('/api/v1/market/favorites', json={'skill_id': skill_ids[0]}, headers=headers)
+        client.post('/api/v1/market/ratings', json={'skill_id': skill_ids[0], 'rating': 5}, headers=headers)
+        client.post('/api/v1/market/ratings', json={'skill_id': skill_ids[1], 'rating': 2}, headers=headers)
+        client.post(
+            '/api/v1/market/comments',
+            json={'skill_id': skill_ids[1], 'content': 'nice'},
+            headers=headers,
+        )
+
+        with _count_queries() as statements:
+            market_list = client.get('/api/v1/market/skills')
+        assert market_list.status_code == 200
+        assert len(statements) == 1
+
+        items = {item['id']: item for item in market_list.json()}
+        assert items[skill_ids[0]]['favorites_count'] == 1
+        assert items[skill_ids[0]]['rating'] == {'skill_id': skill_ids[0], 'average': 5.0, 'count': 1}
+        assert items[skill_ids[1]]['comments_count'] == 1
+        assert items[skill_ids[1]]['rating']['average'] == 2.0
+        assert items[skill_ids[2]]['favorites_count'] == 0
+        assert items[skill_ids[2]]['rating']['count'] == 0
+        assert [item['id'] for item in market_list.json()] == list(reversed(skill_ids))
+
+        first_page = client.get('/api/v1/market/skills', params={'limit': 2})
+        second_page = client.get(
+            '/api/v1/market/skills',
+            params={'limit': 2, 'cursor': first_page.headers['X-Next-Cursor']},
+        )
+        assert [item['id'] for item in first_page.json()] == skill_ids[:-3:-1]
+        assert [item['id'] for item in second_page.json()] == skill_ids[-3:-5:-1]
+
+        with _count_queries() as statements:
+            detail = client.get(f"/api/v1/market/skills/{skill_ids[0]}")
+        assert detail.status_code == 200
+        assert len(statements) == 2
+        assert detail.json()['favorites_count'] == 1
+
+
+def test_skill_stats_track_rating_deltas_and_repair():
+    init_db(drop_all=True)
+    with TestClient(app) as client:
+        headers1 = _auth_headers(client)
+        headers2 = _auth_headers(client)
+        skill_id = _create_skill(client, headers1)
+
+        client.post('/api/v1/market/ratings', json={'skill_id': skill_id, 'rating': 5}, headers=headers1)
+        client.post('/api/v1/market/ratings', json={'skill_id': skill_id, 'rating': 3}, headers=headers2)
+        client.post('/api/v1/market/ratings', json={'skill_id': skill_id, 'rating': 1}, headers=headers1)
+        client.post('/api/v1/market/favorites', json={'skill_id': skill_id}, headers=headers1)
+        client.post('/api/v1/market/favorites', json={'skill_id': skill_id}, headers=headers2)
+        client.delete(f"/api/v1/market/favorites/{skill_id}", headers=headers2)
+
+        summary = client.get(f"/api/v1/market/ratings/{skill_id}").json()
+        assert summary['average'] == 2.0
+        assert summary['count'] == 2
+
+        with Session(engine) as session:
+            stats = session.get(SkillStats, skill_id)
+            assert (stats.favorites_count, stats.rating_sum, stats.rating_count) == (1, 4, 2)
+            stats.favorites_count = 10
+            stats.comments_count = 7
+            session.add(stats)
+            session.commit()
+
+        with Session(engine) as session:
+            assert repair_skill_stats(session, dry_run=True) == 1
+            assert repair_skill_stats(session) == 1
+            assert repair_skill_stats(session) == 0
+
+        stats = client.get(f"/api/v1/market/skills/{skill_id}/stats").json()
+        assert stats['favorites_count'] == 1
+        assert stats['comments_count'] == 0
+
+
 def test_skill_search_by_content():
     init_db(drop_all=True)
     with TestClient(app) as client:
@@ -111,6 +210,46 @@ def test_skill_search_by_content():
         assert 'avatar' in item
 
 
+def test_skill_search_ranks_latest_version_only():
+    init_db(drop_all=True)
+    with TestClient(app) as client:
+        headers = _auth_headers(client)
+        content_skill = _create_skill(client, headers)
+        client.post(
+            f"/api/v1/skills/{content_skill}/versions",
+            json={'content': 'Summarize 会议纪要 quickly'},
+            headers=headers,
+        )
+        client.post(
+            f"/api/v1/skills/{content_skill}/versions",
+            json={'content': 'Translate documents'},
+            headers=headers,
+        )
+        named = client.post(
+            '/api/v1/skills',
+            json={
+                'name': 'translate helper',
+                'description': 'translate anything',
+                'visibility': 'public',
+                'tags': ['translate'],
+                'content': 'v1',
+            },
+            headers=headers,
+        )
+        named_skill = named.json()['id']
+
+        stale = client.get('/api/v1/search/skills', params={'q': '会议'})
+        assert stale.status_code == 200
+        assert stale.json() == []
+
+        ranked = client.get('/api/v1/search/skills', params={'q': 'translate'})
+        assert [item['id'] for item in ranked.json()] == [named_skill, content_skill]
+
+        client.delete(f"/api/v1/skills/{named_skill}", headers=headers)
+        ranked = client.get('/api/v1/search/skills', params={'q': 'translate'})
+        assert [item['id'] for item in ranked.json()] == [content_skill]
+
+
 def test_comment_reply_and_like():
     init_db(drop_all=True)
     with TestClient(app) as client:
@@ -0,0 +1,94 @@
+import re
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.metrics import MetricsRegistry
+from app.db.init_db import init_db
+from app.db.session import engine
+from app.main import app
+from app.models.enums import UserRole
+from app.models.user import User
+
+
+def _sample(body: str, name: str) -> float:
+    match = re.search(rf'^{re.escape(name)} (\S+)$', body, re.MULTILINE)
+    assert match, name
+    return float(match.group(1))
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    latency = registry.histogram('demo_seconds', 'Demo latency.', ('route',), buckets=(0.1, 1))
+    latency.labels('/a"b').observe(0.05)
+    latency.labels('/a"b').observe(0.5)
+    latency.labels('/a"b').observe(5)
+    registry.counter('demo_total', 'Demo count.').inc(2)
+    assert registry.histogram('demo_seconds', 'Demo latency.', ('route',)) is latency
+
+    body = registry.render()
+    assert '# TYPE demo_seconds histogram' in body
+    assert 'demo_seconds_bucket{route="/a\\"b",le="0.1"} 1' in body
+    assert 'demo_seconds_bucket{route="/a\\"b",le="1"} 2' in body
+    assert 'demo_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in body
+    assert 'demo_seconds_sum{route="/a\\"b"} 5.55' in body
+    assert 'demo_seconds_count{route="/a\\"b"} 3' in body
+    assert 'demo_total 2' in body
+
+
+def test_metrics_endpoint_reports_request_db_work(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, 'METRICS_TOKEN', 'scrape-secret')
+    scrape = {'Authorization': 'Bearer scrape-secret'}
+    init_db(drop_all=True)
+    with TestClient(app) as client:
+        email = f'{uuid4()}@b.com'
+        client.post('/api/v1/auth/register', json={'email': email, 'password': 'secret123'})
+        token = client.post('/api/v1/auth/login', json={'email': email, 'password': 'secret123'}).json()['access_token']
+        headers = {'Authorization': f'Bearer {token}'}
+        before = client.get('/api/v1/metrics', headers=scrape).text
+        label = '{method="GET",route="/api/v1/chats"}'
+        seen = 0.0
+        if f'http_request_db_queries_count{label}' in before:
+            seen = _sample(before, f'http_request_db_queries_count{label}')
+        assert client.get('/api/v1/chats', headers=headers).status_code == 200
+        assert client.get('/api/v1/chats/missing/messages', headers=headers).status_code == 404
+
+        resp = client.get('/api/v1/metrics', headers=scrape)
+    assert resp.status_code == 200
+    assert resp.headers['content-type'].startswith('text/plain; version=0.0.4')
+    body = resp.text
+    assert _sample(body, f'http_request_db_queries_count{label}') == seen + 1
+    assert _sample(body, f'http_request_db_queries_sum{label}') >= 1
+    assert 'http_requests_total{method="GET",route="/api/v1/chats/{session_id}/messages",status="404"}' in body
+    assert _sample(body, 'db_query_duration_seconds_count') > 0
+    assert _sample(body, 'ai_streams_active') == 0
+    assert 'job_queue_depth{job_type="ai.post_turn",status="pending"}' in body
+    assert '# TYPE chat_history_cache_events_total counter' in body
+    assert '# TYPE ai_stream_overflow_events_total counter' in body
+    for name in ('ai_stream_first_token_seconds', 'ai_stream_duration_seconds', 'ai_clarify_decider_seconds'):
+        assert f'# TYPE {name} histogram' in body
+
+
+def test_metrics_endpoint_requires_token_or_admin(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, 'METRICS_TOKEN', 'scrape-secret')
+    init_db(drop_all=True)
+    with TestClient(app) as client:
+        email = f'{uuid4()}@b.com'
+        client.post('/api/v1/auth/register', json={'email': email, 'password': 'secret123'})
+        token = client.post('/api/v1/auth/login', json={'email': email, 'password': 'secret123'}).json()['access_token']
+
+        assert client.get('/api/v1/metrics').status_code in (401, 403)
+        assert client.get('/api/v1/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+        user_resp = client.get('/api/v1/metrics', headers={'Authorization': f'Bearer {token}'})
+        assert user_resp.status_code == 403
+
+        with Session(engine) as session:
+            user = session.exec(select(User).where(User.email == email)).one()
+            user.role = UserRole.ADMIN
+            session.add(user)
+            session.commit()
+        admin_resp = client.get('/api/v1/metrics', headers={'Authorization': f'Bearer {token}'})
+        assert admin_resp.status_code == 200
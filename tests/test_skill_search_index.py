@@ -0,0 +1,84 @@
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.init_db import init_db
+from app.db.session import engine
+from app.models.skill import Skill
+from app.models.skill_search_document import SkillSearchDocument
+from app.schemas.skill import SkillCreate, SkillUpdate
+from app.services.skill_search_index import SearchEntry, SkillSearchIndex, skill_search_index, tokenize
+from app.services.skill_service import create_skill, search_skills, update_skill
+
+
+def test_tokenize_emits_ascii_words_and_cjk_bigrams():
+    assert tokenize('Write 会议纪要 v2') == ['write', '会议', '议纪', '纪要', 'v2']
+    assert tokenize('写') == ['写']
+
+
+def test_index_ranks_and_tracks_updates():
+    index = SkillSearchIndex()
+    index.rebuild(
+        [
+            SearchEntry(skill_id='a', name='会议纪要助手', description='整理会议', content='notes'),
+            SearchEntry(skill_id='b', name='translator', description='translate', content='会议 translate'),
+        ]
+    )
+    assert index.search('会议纪要') == ['a', 'b']
+    assert index.search('translate') == ['b']
+
+    index.update_content('a', 'translate everything')
+    assert index.search('translate') == ['b', 'a']
+
+    index.upsert('b', name='writer', description='write', tags=['draft'])
+    assert sorted(index.search('translate')) == ['a', 'b']
+
+    index.remove('a')
+    assert 'a' not in index.search('translate')
+    assert index.search('draft') == ['b']
+
+
+def test_search_picks_up_skills_written_by_other_workers(monkeypatch):
+    init_db(drop_all=True)
+    monkeypatch.setattr(settings, 'SKILL_SEARCH_BACKEND', 'memory')
+    monkeypatch.setattr(settings, 'SKILL_SEARCH_INDEX_CHECK_SECONDS', 0)
+    with Session(engine) as session:
+        create_skill(session, SkillCreate(name='meeting-notes', description='会议纪要', content='notes'), None)
+        assert [skill.name for skill in search_skills(session, '会议纪要')] == ['meeting-notes']
+
+        # Rows another process wrote never went through this process's index.
+        other = Skill(name='minutes-writer', description='会议纪要整理')
+        session.add(other)
+        session.flush()
+        session.add(
+            SkillSearchDocument(
+                skill_id=other.id, name=other.name, description=other.description, content='会议纪要 会议纪要'
+            )
+        )
+        session.commit()
+        assert [skill.name for skill in search_skills(session, '会议纪要')] == ['minutes-writer', 'meeting-notes']
+
+
+def test_local_edits_stay_incremental_and_remote_deletes_rebuild(monkeypatch):
+    init_db(drop_all=True)
+    monkeypatch.setattr(settings, 'SKILL_SEARCH_BACKEND', 'memory')
+    monkeypatch.setattr(settings, 'SKILL_SEARCH_INDEX_CHECK_SECONDS', 0)
+    with Session(engine) as session:
+        notes, _ = create_skill(session, SkillCreate(name='meeting-notes', description='会议纪要', content='notes'), None)
+        create_skill(session, SkillCreate(name='translator', description='翻译', content='translate'), None)
+        assert [skill.name for skill in search_skills(session, '会议纪要')] == ['meeting-notes']
+
+        rebuilds = []
+        original = skill_search_index.rebuild
+        monkeypatch.setattr(
+            skill_search_index, 'rebuild', lambda *args, **kwargs: (rebuilds.append(1), original(*args, **kwargs))
+        )
+        update_skill(session, notes, SkillUpdate(description='周报模板'))
+        assert search_skills(session, '会议纪要') == []
+        assert [skill.name for skill in search_skills(session, '周报')] == ['meeting-notes']
+        assert rebuilds == []
+
+        # Another worker deleting a document is only visible as a smaller row count.
+        session.delete(session.get(SkillSearchDocument, notes.id))
+        session.commit()
+        assert search_skills(session, '周报') == []
+        assert rebuilds == [1]